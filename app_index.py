@@ -0,0 +1,297 @@
+"""
+App Index - Installed applications from PATH and desktop entries, cached on disk
+"""
+import json
+import os
+import shlex
+import sys
+import threading
+import time
+
+from metrics import metrics
+
+APP_INDEX_FILE = "jarvis_app_index.json"
+
+# Bumped when the cache layout changes; older caches are rebuilt
+INDEX_VERSION = 1
+
+# Executable extensions dropped to give an app's spoken name, e.g. 'Code.exe' -> 'code'
+LAUNCHER_EXTENSIONS = {'.exe', '.com', '.bat', '.cmd'}
+
+# Exec field codes in .desktop files that stand for files or URLs to open
+DESKTOP_FIELD_CODES = {'%f', '%F', '%u', '%U', '%d', '%D', '%n', '%N', '%i', '%c', '%k', '%v', '%m'}
+
+
+def path_directories():
+    """Directories on PATH that exist, in search order"""
+    seen, directories = set(), []
+    for directory in os.environ.get('PATH', '').split(os.pathsep):
+        directory = os.path.normcase(os.path.abspath(directory)) if directory else ''
+        if directory and directory not in seen and os.path.isdir(directory):
+            seen.add(directory)
+            directories.append(directory)
+    return directories
+
+
+def desktop_directories():
+    """Where desktop entries live: Start-menu folders on Windows, XDG application folders elsewhere"""
+    if sys.platform == 'win32':
+        roots = [os.environ.get('APPDATA'), os.environ.get('PROGRAMDATA')]
+        candidates = [os.path.join(root, 'Microsoft', 'Windows', 'Start Menu', 'Programs') for root in roots if root]
+    else:
+        data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+        data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+        candidates = [os.path.join(root, 'applications') for root in [data_home] + data_dirs.split(':') if root]
+        candidates.append('/var/lib/flatpak/exports/share/applications')
+    return [directory for directory in candidates if os.path.isdir(directory)]
+
+
+def executable_extensions():
+    """File extensions that make a file runnable on Windows, or None where the mode bits decide"""
+    if sys.platform != 'win32':
+        return None
+    return {ext.lower() for ext in os.environ.get('PATHEXT', '.COM;.EXE;.BAT;.CMD').split(';') if ext}
+
+
+def registered_app_path(executable):
+    """Path Windows registers for an executable under App Paths, e.g. chrome.exe, or None
+
+    This is how 'start chrome' finds browsers that are not on PATH.
+    """
+    if sys.platform != 'win32':
+        return None
+    import winreg
+    subkey = rf"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths\{executable}"
+    for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        try:
+            with winreg.OpenKey(root, subkey) as key:
+                value = winreg.QueryValueEx(key, '')[0]
+        except OSError:
+            continue
+        path = os.path.expandvars(str(value).strip().strip('"'))
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+class AppEntry:
+    """An application the index can launch: the names it answers to and its command line"""
+    
+    def __init__(self, name, command, source, path):
+        self.name = name
+        self.command = command
+        self.source = source
+        self.path = path
+    
+    def to_list(self):
+        return [self.name, self.command, self.source, self.path]
+    
+    @classmethod
+    def from_list(cls, row):
+        return cls(*row)
+    
+    def __repr__(self):
+        return f"AppEntry({self.name!r}, {self.source!r})"
+
+
+def parse_desktop_file(path):
+    """AppEntry for a .desktop application entry, or None"""
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    if in_entry:
+                        break
+                    in_entry = line == '[Desktop Entry]'
+                elif in_entry and '=' in line:
+                    key, value = line.split('=', 1)
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    
+    if fields.get('Type', 'Application') != 'Application' or fields.get('Hidden') == 'true':
+        return None
+    name, exec_line = fields.get('Name'), fields.get('Exec')
+    if not name or not exec_line:
+        return None
+    try:
+        command = [arg for arg in shlex.split(exec_line) if arg not in DESKTOP_FIELD_CODES]
+    except ValueError:
+        return None
+    if not command:
+        return None
+    return AppEntry(name, command, 'desktop', path)
+
+
+def shortcut_entry(path):
+    """AppEntry for a Start-menu shortcut, launched through the shell so Windows resolves it"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return AppEntry(name, ['cmd', '/c', 'start', '', path], 'shortcut', path)
+
+
+class AppIndex:
+    """Maps application names to launch commands, persisted with per-directory mtimes
+
+    PATH directories are scanned for executables and desktop directories,
+    recursively, for .desktop files and .lnk shortcuts. Each scanned
+    directory is cached with its mtime, its entries and its subdirectories;
+    a refresh only rescans directories whose mtime changed, so a warm start
+    costs one stat per directory. Desktop entries win over PATH executables
+    of the same name.
+    """
+    
+    def __init__(self, path=APP_INDEX_FILE, path_dirs=None, desktop_dirs=None):
+        self.path = path
+        self.path_dirs = path_dirs
+        self.desktop_dirs = desktop_dirs
+        self.directories = {}
+        self.names = {}
+        self.loaded = False
+        self.refreshing = False
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+    
+    def load(self):
+        """Read the cached scan from disk"""
+        self.loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.directories = data['directories']
+        except Exception as e:
+            print(f"Error loading app index: {e}")
+    
+    def save(self):
+        """Write the scan to disk"""
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'directories': self.directories}, f)
+        except Exception as e:
+            print(f"Error saving app index: {e}")
+    
+    def start(self):
+        """Load the cache and refresh it on a background thread, unless a refresh is already running"""
+        with self._lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        thread = threading.Thread(target=self._refresh_in_background, name="app-index")
+        thread.daemon = True
+        thread.start()
+    
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"App index error: {e}")
+        finally:
+            self.refreshing = False
+    
+    def refresh(self):
+        """Rescan directories that changed since the last scan; returns (rescanned, reused) directory counts"""
+        started = time.perf_counter()
+        if not self.loaded:
+            self.load()
+        path_dirs = path_directories() if self.path_dirs is None else self.path_dirs
+        desktop_dirs = desktop_directories() if self.desktop_dirs is None else self.desktop_dirs
+        extensions = executable_extensions()
+        directories = {}
+        counts = [0, 0]
+        
+        for directory in path_dirs:
+            self._scan(directory, 'path', directories, counts, extensions)
+        for directory in desktop_dirs:
+            pending = [directory]
+            while pending:
+                pending.extend(self._scan(pending.pop(), 'desktop', directories, counts, extensions))
+        
+        changed = counts[0] > 0 or set(directories) != set(self.directories)
+        # Desktop entries first so their names win over bare executables,
+        # and full file names over names with the extension dropped
+        names, stems = {}, {}
+        for kind in ('desktop', 'path'):
+            for cached in directories.values():
+                if cached['kind'] != kind:
+                    continue
+                for row in cached['entries']:
+                    name = row[0].lower()
+                    names.setdefault(name, row)
+                    stem, ext = os.path.splitext(name)
+                    if kind == 'path' and ext in LAUNCHER_EXTENSIONS:
+                        stems.setdefault(stem, row)
+        for stem, row in stems.items():
+            names.setdefault(stem, row)
+        
+        with self._lock:
+            self.directories = directories
+            self.names = names
+        if changed:
+            self.save()
+        metrics.observe('app_index.refresh_time', time.perf_counter() - started)
+        metrics.set_gauge('app_index.entries', len(names))
+        self.ready.set()
+        return counts[0], counts[1]
+    
+    def resolve(self, name):
+        """AppEntry for an application name, ignoring case, or None"""
+        with self._lock:
+            row = self.names.get(name.lower().strip())
+        return AppEntry.from_list(row) if row else None
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def _scan(self, directory, kind, directories, counts, extensions):
+        """Cache one directory, reusing the previous scan if its mtime is unchanged; returns subdirectories"""
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return []
+        cached = self.directories.get(directory)
+        if cached and cached['mtime'] == mtime and cached['kind'] == kind:
+            directories[directory] = cached
+            counts[1] += 1
+            return cached['subdirs']
+        
+        entries, subdirs = [], []
+        try:
+            with os.scandir(directory) as listing:
+                for item in listing:
+                    try:
+                        if item.is_dir():
+                            if kind == 'desktop':
+                                subdirs.append(item.path)
+                            continue
+                        entry = self._entry(item, kind, extensions)
+                    except OSError:
+                        continue
+                    if entry is not None:
+                        entries.append(entry.to_list())
+        except OSError:
+            return []
+        directories[directory] = {'mtime': mtime, 'kind': kind, 'entries': entries, 'subdirs': subdirs}
+        counts[0] += 1
+        return subdirs
+    
+    def _entry(self, item, kind, extensions):
+        lower = item.name.lower()
+        if kind == 'desktop':
+            if lower.endswith('.desktop'):
+                return parse_desktop_file(item.path)
+            if lower.endswith('.lnk'):
+                return shortcut_entry(item.path)
+            return None
+        if extensions is not None:
+            if os.path.splitext(lower)[1] not in extensions:
+                return None
+        elif not item.is_file() or not item.stat().st_mode & 0o111:
+            return None
+        return AppEntry(item.name, [item.path], 'path', item.path)
@@ -0,0 +1,84 @@
+"""
+Audio Processing - NumPy helpers for analysing captured speech
+"""
+import numpy as np
+
+# Analysis frame length
+FRAME_MS = 30
+
+
+def pcm_to_samples(frame_data, sample_width=2):
+    """Convert little-endian PCM bytes to float32 samples in [-1, 1]"""
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[sample_width]
+    samples = np.frombuffer(frame_data, dtype=dtype).astype(np.float32)
+    if sample_width == 1:
+        # 8-bit WAV data is unsigned
+        return (samples - 128.0) / 128.0
+    return samples / float(2 ** (8 * sample_width - 1))
+
+
+def frame_energy(samples, frame_length):
+    """RMS energy of consecutive non-overlapping frames"""
+    frames = len(samples) // frame_length
+    if frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    framed = samples[:frames * frame_length].reshape(frames, frame_length)
+    return np.sqrt(np.mean(framed * framed, axis=1))
+
+
+def frame_zero_crossings(samples, frame_length):
+    """Fraction of sign changes in consecutive non-overlapping frames"""
+    frames = len(samples) // frame_length
+    if frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    signs = np.signbit(samples[:frames * frame_length]).reshape(frames, frame_length)
+    return np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(frame_length - 1 or 1)
+
+
+def silence_threshold(energy, floor_percentile=10, ratio=3.0, minimum=1e-3):
+    """Energy below which a frame counts as silence, relative to the noise floor"""
+    if len(energy) == 0:
+        return minimum
+    return max(float(np.percentile(energy, floor_percentile)) * ratio, minimum)
+
+
+def find_silences(energy, threshold, min_frames):
+    """(start, end) frame ranges of runs of at least min_frames silent frames"""
+    silent = np.concatenate(([False], energy < threshold, [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = ends - starts >= min_frames
+    return list(zip(starts[keep], ends[keep]))
+
+
+def split_points(samples, sample_rate, min_silence_ms=300, min_chunk_s=2.0, max_chunk_s=15.0):
+    """Sample offsets at which to cut long audio into independently recognizable chunks
+
+    Cuts fall in the middle of pauses so no word is split. A chunk that runs
+    past max_chunk_s without a pause is cut at its quietest frame.
+    """
+    frame_length = max(1, int(sample_rate * FRAME_MS / 1000))
+    energy = frame_energy(samples, frame_length)
+    if len(energy) == 0:
+        return [0, len(samples)]
+    
+    threshold = silence_threshold(energy)
+    min_frames = max(1, int(min_silence_ms / FRAME_MS))
+    pauses = [int(start + end) // 2 for start, end in find_silences(energy, threshold, min_frames)]
+    min_chunk = int(min_chunk_s * 1000 / FRAME_MS)
+    max_chunk = int(max_chunk_s * 1000 / FRAME_MS)
+    
+    cuts = [0]
+    for pause in pauses + [len(energy)]:
+        while pause - cuts[-1] > max_chunk:
+            window = energy[cuts[-1] + min_chunk:cuts[-1] + max_chunk]
+            cuts.append(cuts[-1] + min_chunk + int(np.argmin(window)))
+        if pause - cuts[-1] >= min_chunk and pause < len(energy):
+            cuts.append(pause)
+    
+    points = [cut * frame_length for cut in cuts]
+    if len(samples) - points[-1] < min_chunk * frame_length and len(points) > 1:
+        # Fold a short tail into the previous chunk
+        points.pop()
+    return points + [len(samples)]
+
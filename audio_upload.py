@@ -0,0 +1,87 @@
+"""
+Audio Upload - Trim, downsample and meter speech before it is sent to a cloud recognizer
+"""
+import time
+
+import numpy as np
+
+from audio_processing import FRAME_MS, frame_energy, pcm_to_samples, silence_threshold
+from startup import profiler
+
+# Cloud recognizers gain nothing from more than this
+UPLOAD_SAMPLE_RATE = 16000
+
+# Audio kept either side of the speech so word edges are not clipped
+TRIM_PAD_MS = 200
+
+# Length of the anti-aliasing filter applied before downsampling
+LOWPASS_TAPS = 63
+
+_metered_class = None
+
+
+def speech_bounds(samples, sample_rate, pad_ms=TRIM_PAD_MS):
+    """(start, end) sample offsets of the speech in samples, padded; the whole clip if none is found"""
+    frame_length = max(1, int(sample_rate * FRAME_MS / 1000))
+    energy = frame_energy(samples, frame_length)
+    loud = np.flatnonzero(energy > silence_threshold(energy))
+    if len(loud) == 0:
+        return 0, len(samples)
+    pad = int(sample_rate * pad_ms / 1000)
+    return max(0, loud[0] * frame_length - pad), min(len(samples), (loud[-1] + 1) * frame_length + pad)
+
+
+def lowpass(samples, cutoff):
+    """Windowed-sinc low-pass filter; cutoff is a fraction of the sample rate"""
+    n = np.arange(LOWPASS_TAPS) - (LOWPASS_TAPS - 1) / 2.0
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(LOWPASS_TAPS)
+    return np.convolve(samples, taps / taps.sum(), mode='same')
+
+
+def resample(samples, from_rate, to_rate):
+    """Resample float samples, filtering first when going down in rate"""
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    if to_rate < from_rate:
+        samples = lowpass(samples, 0.45 * to_rate / from_rate)
+    length = int(round(len(samples) * to_rate / float(from_rate)))
+    positions = np.arange(length) * (from_rate / float(to_rate))
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def metered(frame_data, sample_rate, sample_width):
+    """speech_recognition AudioData that records the size and cost of its FLAC encoding
+
+    Recognizers encode audio through get_flac_data just before uploading it,
+    so after recognition bytes_sent and encode_time describe the upload.
+    """
+    global _metered_class
+    if _metered_class is None:
+        sr = profiler.import_module('speech_recognition')
+        
+        class MeteredAudioData(sr.AudioData):
+            bytes_sent = 0
+            encode_time = 0.0
+            
+            def get_flac_data(self, *args, **kwargs):
+                started = time.perf_counter()
+                data = super().get_flac_data(*args, **kwargs)
+                self.encode_time += time.perf_counter() - started
+                self.bytes_sent += len(data)
+                return data
+        
+        _metered_class = MeteredAudioData
+    return _metered_class(frame_data, sample_rate, sample_width)
+
+
+def prepare_for_upload(audio, sample_rate=UPLOAD_SAMPLE_RATE):
+    """Trim silence from audio and bring it down to sample_rate 16-bit PCM; returns metered AudioData
+
+    Microphone audio from speech_recognition is already mono.
+    """
+    samples = pcm_to_samples(audio.frame_data, audio.sample_width)
+    start, end = speech_bounds(samples, audio.sample_rate)
+    rate = min(sample_rate, audio.sample_rate)
+    samples = resample(samples[start:end], audio.sample_rate, rate)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+    return metered(pcm, rate, 2)
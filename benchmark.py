@@ -0,0 +1,1651 @@
+"""
+Benchmark script for JARVIS performance-sensitive components
+Run: python benchmark.py <name> [options]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+
+def legacy_route(text):
+    """Keyword chain that JarvisEngine used before the intent router"""
+    input_lower = text.lower()
+    
+    if any(word in input_lower for word in ['what time', 'current time', 'time is it']):
+        return 'time'
+    if any(word in input_lower for word in ['what date', 'today date', 'what day']):
+        return 'date'
+    if any(word in input_lower for word in ['open', 'launch', 'start', 'run']):
+        for pattern in [r'open\s+(.+)', r'launch\s+(.+)', r'start\s+(.+)', r'run\s+(.+)']:
+            if re.search(pattern, text.lower()):
+                return 'open_app'
+    if any(word in input_lower for word in ['close', 'quit', 'exit', 'stop']):
+        for pattern in [r'close\s+(.+)', r'quit\s+(.+)', r'exit\s+(.+)', r'stop\s+(.+)']:
+            match = re.search(pattern, text.lower())
+            if match and match.group(1).strip() not in ['jarvis', 'yourself']:
+                return 'close_app'
+    if 'search google' in input_lower or 'google search' in input_lower:
+        return 'search_google'
+    if 'open website' in input_lower or 'go to' in input_lower:
+        return 'open_website'
+    if 'system info' in input_lower or 'system status' in input_lower:
+        return 'system_info'
+    if 'minimize all' in input_lower or 'minimize windows' in input_lower:
+        return 'minimize_windows'
+    if 'running apps' in input_lower or 'open apps' in input_lower:
+        return 'running_apps'
+    if 'shutdown' in input_lower and 'computer' in input_lower:
+        return 'shutdown'
+    if 'restart' in input_lower and 'computer' in input_lower:
+        return 'restart'
+    return None
+
+
+def make_utterance_corpus(size, seed=0):
+    """Build a mixed corpus of commands and free-form questions"""
+    rng = random.Random(seed)
+    apps = ['notepad', 'chrome', 'spotify', 'visual studio code', 'calculator', 'discord']
+    topics = ['a marathon', 'python scripts', 'the dishwasher', 'a business', 'my car', 'a podcast']
+    templates = [
+        lambda: 'What time is it?',
+        lambda: 'what day is it today',
+        lambda: f'open {rng.choice(apps)}',
+        lambda: f'please launch {rng.choice(apps)}',
+        lambda: f'close {rng.choice(apps)}',
+        lambda: f'search google for {rng.choice(topics)}',
+        lambda: 'open website github.com',
+        lambda: 'system status',
+        lambda: 'show me the running apps',
+        lambda: 'minimize all windows',
+        lambda: f'how do I start {rng.choice(topics)}',
+        lambda: f'what is the best way to run {rng.choice(topics)}',
+        lambda: f'how can I stop {rng.choice(topics)} from breaking',
+        lambda: 'tell me a joke',
+        lambda: 'why does my computer shutdown randomly',
+        lambda: 'explain quantum computing in simple terms',
+        lambda: 'who wrote the lord of the rings',
+    ]
+    return [rng.choice(templates)() for _ in range(size)]
+
+
+# Utterances and the intent they must route to; None leaves them to Gemini
+ROUTING_CASES = [
+    ("open notepad", 'open_app'),
+    ("please launch visual studio code", 'open_app'),
+    ("can you open chrome", 'open_app'),
+    ("close spotify please", 'close_app'),
+    ("jarvis, close discord now", 'close_app'),
+    ("shut down the computer", 'shutdown'),
+    ("what time is it", 'time'),
+    ("what's the time", 'time'),
+    ("search google for marathon training please", 'search_google'),
+    ("Can you stop talking about politics?", None),
+    ("could you close notepad", None),
+    ("could you shut down the computer", None),
+    ("close the window please", None),
+    ("What time does the store close?", None),
+    ("how do I start a business", None),
+    ("stop the music", None),
+]
+ROUTING_APPS = {'notepad', 'chrome', 'spotify', 'visual studio code', 'calculator', 'discord'}
+
+
+def bench_intent_router(args):
+    """Routing throughput of IntentRouter against the legacy keyword chain, and labelled routing cases"""
+    from intent_router import IntentRouter
+    
+    corpus = make_utterance_corpus(args.size)
+    
+    start = time.perf_counter()
+    router = IntentRouter(slot_checks={'app': lambda app: app in ROUTING_APPS})
+    compile_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    legacy = [legacy_route(text) for text in corpus]
+    legacy_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    routed = [router.match(text) for text in corpus]
+    router_time = time.perf_counter() - start
+    
+    changed = sum(1 for old, new in zip(legacy, routed) if old != (new.name if new else None))
+    
+    print(f"Utterances:        {len(corpus)}")
+    print(f"Router compile:    {compile_time * 1000:.2f} ms")
+    print(f"Legacy chain:      {legacy_time:.3f} s ({len(corpus) / legacy_time:,.0f} utterances/s)")
+    print(f"Intent router:     {router_time:.3f} s ({len(corpus) / router_time:,.0f} utterances/s)")
+    print(f"Routing changed:   {changed} utterances (misrouted questions and commands)")
+    
+    wrong = []
+    for text, expected in ROUTING_CASES:
+        routed = router.match(text)
+        if (routed.name if routed else None) != expected:
+            wrong.append(f"{text!r} -> {routed} (expected {expected})")
+    print(f"Labelled cases:    {len(ROUTING_CASES) - len(wrong)}/{len(ROUTING_CASES)} routed as expected")
+    for line in wrong:
+        print(f"  {line}")
+    return 1 if wrong else 0
+
+
+def make_engine(model, response_cache=None, system_controller=None, speculative=False):
+    """Build a JarvisEngine around a fake model with no persistent state"""
+    from config import Config
+    from jarvis_engine import JarvisEngine
+    
+    config = Config()
+    config.response_cache_enabled = False
+    config.semantic_cache_enabled = False
+    config.conversation_store_enabled = False
+    config.speculative_execution_enabled = speculative
+    engine = JarvisEngine(config, system_controller, model=model)
+    engine.response_cache = response_cache
+    return engine
+
+
+def bench_response_cache(args):
+    """Repeated-query workload against a fake Gemini with and without the cache"""
+    from fake_gemini import FakeGenerativeModel
+    from response_cache import ResponseCache
+    
+    rng = random.Random(0)
+    questions = [f"what is the definition of word number {i}" for i in range(50)]
+    questions += ['tell me a joke', "what's the weather like usually", 'who are you']
+    workload = [rng.choice(questions) for _ in range(min(args.size, 500))]
+    
+    for label, cache in [('no cache', None), ('cache', ResponseCache(':memory:'))]:
+        model = FakeGenerativeModel(latency=args.latency)
+        engine = make_engine(model, cache)
+        start = time.perf_counter()
+        for query in workload:
+            engine.process_command(query)
+        elapsed = time.perf_counter() - start
+        print(f"{label:10s} {elapsed:7.3f} s for {len(workload)} queries, {model.calls} Gemini calls")
+        if cache:
+            stats = cache.stats()
+            print(f"           hit rate {stats['hit_rate']:.1%}, latency saved {stats['latency_saved']:.2f} s")
+
+
+def bench_semantic_cache(args):
+    """Lookup latency of the semantic cache index at growing sizes"""
+    import numpy as np
+    from semantic_cache import VectorIndex
+    
+    rng = np.random.default_rng(0)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    for size in sizes:
+        index = VectorIndex(args.dim, size)
+        block = 100000
+        for start in range(0, size, block):
+            vectors = rng.standard_normal((min(block, size - start), args.dim), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            index.vectors[start:start + len(vectors)] = vectors
+        index.size = size
+        
+        queries = rng.standard_normal((64, args.dim), dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        
+        single = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, k=5)
+            single.append(time.perf_counter() - start)
+        single.sort()
+        
+        start = time.perf_counter()
+        index.search_batch(queries, k=5)
+        batched = (time.perf_counter() - start) / len(queries)
+        
+        print(f"{size:>9,} entries  p50 {single[len(single) // 2] * 1000:8.3f} ms  "
+              f"p99 {single[int(len(single) * 0.99)] * 1000:8.3f} ms  "
+              f"batched {batched * 1000:8.3f} ms/query  ({index.vectors.nbytes / 2**20:,.0f} MiB)")
+
+
+# Tuning set: the semantic cache's synonyms and threshold were chosen on these.
+# Queries that ask the same thing: a cached answer to one should serve the other
+PARAPHRASE_PAIRS = [
+    ('who made you', 'who created you'),
+    ('who made you', 'who built you'),
+    ('what is the capital of france', "what's the capital of france"),
+    ('what is the capital of france', 'tell me the capital of france'),
+    ('what is the capital of france', 'jarvis what is the capital city of france'),
+    ('how tall is mount everest', 'what is the height of mount everest'),
+    ('how tall is mount everest', 'how high is mount everest'),
+    ('tell me a joke', 'tell me a joke please'),
+    ('tell me a joke', 'can you tell me a joke'),
+    ('tell me a joke', 'say a joke'),
+    ('what is your name', "what's your name"),
+    ('what is your name', 'what are you called'),
+    ('who wrote romeo and juliet', 'who is the author of romeo and juliet'),
+    ('who wrote hamlet', 'who was hamlet written by'),
+    ('how far is the moon from earth', 'what is the distance from the earth to the moon'),
+    ('how far away is the moon', 'how far is the moon'),
+    ('what is photosynthesis', 'explain photosynthesis'),
+    ('what is photosynthesis', 'can you explain what photosynthesis is'),
+    ('what does dna stand for', 'what is dna short for'),
+    ('how many legs does a spider have', 'how many legs do spiders have'),
+    ('what is the largest planet', 'which planet is the biggest'),
+    ('what is the largest ocean', "what's the biggest ocean"),
+    ('how do i boil an egg', 'how to boil an egg'),
+    ('how do you make pancakes', 'how do i make pancakes'),
+    ('what is machine learning', 'define machine learning'),
+    ('who invented the telephone', 'who was the inventor of the telephone'),
+    ('who discovered penicillin', 'who found penicillin'),
+    ('what is the speed of light', 'how fast is light'),
+    ('what are you', 'what exactly are you'),
+    ('what can you do', 'what are you able to do'),
+]
+
+# Queries that look alike but ask different things: never served from each other
+DIFFERENT_PAIRS = [
+    ('who made you', 'who made python'),
+    ('who made you', 'who are you'),
+    ('what is the capital of france', 'what is the capital of spain'),
+    ('what is the capital of france', 'what is the population of france'),
+    ('what is the capital of france', 'what is the currency of france'),
+    ('how tall is mount everest', 'how old is mount everest'),
+    ('how tall is mount everest', 'how tall is k2'),
+    ('tell me a joke', 'tell me a story'),
+    ('tell me a joke', 'tell me a fact'),
+    ('what is your name', 'what is my name'),
+    ('who wrote romeo and juliet', 'who wrote hamlet'),
+    ('who wrote hamlet', 'who is hamlet'),
+    ('how far is the moon from earth', 'how far is the sun from earth'),
+    ('how far is the moon from earth', 'how big is the moon'),
+    ('what is photosynthesis', 'what is respiration'),
+    ('what does dna stand for', 'what does nasa stand for'),
+    ('how many legs does a spider have', 'how many legs does an ant have'),
+    ('how many legs does a spider have', 'how many eyes does a spider have'),
+    ('what is the largest planet', 'what is the smallest planet'),
+    ('what is the largest planet', 'what is the largest ocean'),
+    ('how do i boil an egg', 'how do i fry an egg'),
+    ('how do you make pancakes', 'how do you make waffles'),
+    ('what is machine learning', 'what is deep learning'),
+    ('who invented the telephone', 'who invented the television'),
+    ('who discovered penicillin', 'who discovered gravity'),
+    ('what is the speed of light', 'what is the speed of sound'),
+    ('what can you do', 'what can i do'),
+    ('convert miles to kilometers', 'convert kilometers to miles'),
+    ('is a tomato a fruit', 'is a tomato a vegetable'),
+    ('who is the president of france', 'who is the president of the united states'),
+    ('what is the boiling point of water', 'what is the freezing point of water'),
+    ('translate hello to spanish', 'translate hello to french'),
+]
+
+# Held-out set, never used for tuning: the same kinds of pairs on other topics,
+# plus negations and conversions the other way round
+HELD_OUT_PARAPHRASES = [
+    ('who created python', 'who made python'),
+    ('what is the capital of japan', "what's the capital city of japan"),
+    ('how tall is the eiffel tower', 'what is the height of the eiffel tower'),
+    ('tell me a fun fact', 'can you tell me a fun fact'),
+    ('who wrote pride and prejudice', 'who is the author of pride and prejudice'),
+    ('how far is mars from earth', 'what is the distance from earth to mars'),
+    ('what is gravity', 'explain gravity'),
+    ('what does nasa stand for', 'what is nasa short for'),
+    ('how many moons does jupiter have', 'how many moons do jupiter have'),
+    ('what is the biggest country', 'which country is the largest'),
+    ('how do i tie a tie', 'how to tie a tie'),
+    ('who invented the light bulb', 'who was the inventor of the light bulb'),
+    ('who discovered electricity', 'who found electricity'),
+    ('what is the speed of sound', 'how fast is sound'),
+    ('what is quantum computing', 'define quantum computing'),
+    ('how do you make bread', 'how do i make bread please'),
+    ('what is your purpose', "what's your purpose"),
+    ('what is the tallest building', 'which building is the tallest'),
+    ('what is blockchain', 'can you explain blockchain'),
+    ('convert miles to km', 'convert miles to kilometers'),
+]
+HELD_OUT_DIFFERENT = [
+    ('is a tomato a fruit', 'is a tomato not a fruit'),
+    ('is coffee bad for you', 'is coffee not bad for you'),
+    ('should i use tabs', 'should i not use tabs'),
+    ('convert miles to km', 'convert km to miles'),
+    ('how many pounds in a kilogram', 'how many kilograms in a pound'),
+    ('translate english to spanish', 'translate spanish to english'),
+    ('who created python', 'who created java'),
+    ('what is the capital of japan', 'what is the capital of china'),
+    ('how tall is the eiffel tower', 'how old is the eiffel tower'),
+    ('tell me a fun fact', 'tell me a sad story'),
+    ('who wrote pride and prejudice', 'who wrote war and peace'),
+    ('what is gravity', 'what is magnetism'),
+    ('how many moons does jupiter have', 'how many moons does saturn have'),
+    ('what is the biggest country', 'what is the smallest country'),
+    ('how do i tie a tie', 'how do i tie a knot'),
+    ('who invented the light bulb', 'who invented the radio'),
+    ('what is the speed of sound', 'what is the speed of a cheetah'),
+    ('what is your purpose', 'what is my purpose'),
+    ('what is the tallest building', 'what is the oldest building'),
+    ('is swimming after eating safe', 'is swimming after eating unsafe'),
+]
+
+# Share of PARAPHRASE_PAIRS the semantic cache must serve
+PARAPHRASE_RECALL_TARGET = 0.8
+
+# Share of held-out hits that must be right
+HELD_OUT_PRECISION_TARGET = 0.95
+
+
+def bench_semantic_pairs(args):
+    """Semantic cache hits on labelled pairs: the tuning set, then precision on a held-out set"""
+    from semantic_cache import SemanticCache
+    
+    def served(cached, asked):
+        cache = SemanticCache(capacity=4)
+        cache.put(cached, "answer")
+        return cache.get(asked) is not None
+    
+    reference = SemanticCache(capacity=1)
+    
+    def score(a, b):
+        return float(reference.embedder.embed(a) @ reference.embedder.embed(b))
+    
+    def evaluate(label, paraphrases, different):
+        missed = [(a, b) for a, b in paraphrases if not served(a, b)]
+        wrong = [(a, b) for a, b in different if served(a, b) or served(b, a)]
+        hits = len(paraphrases) - len(missed)
+        precision = hits / (hits + len(wrong)) if hits + len(wrong) else 1.0
+        print(f"{label}")
+        print(f"  paraphrases served   {hits}/{len(paraphrases)} ({hits / len(paraphrases):.0%})")
+        print(f"  look-alikes served   {len(wrong)}/{len(different)}, closest scores "
+              f"{max(score(a, b) for a, b in different):.2f}")
+        print(f"  precision            {precision:.1%}")
+        for a, b in missed:
+            print(f"    missed  {score(a, b):.2f}  {a!r} / {b!r}")
+        for a, b in wrong:
+            print(f"    WRONG   {score(a, b):.2f}  {a!r} / {b!r}")
+        return hits / len(paraphrases), wrong, precision
+    
+    print(f"threshold {reference.threshold:.2f}")
+    recall, wrong, _ = evaluate("tuning set", PARAPHRASE_PAIRS, DIFFERENT_PAIRS)
+    _, _, held_out_precision = evaluate("held-out set", HELD_OUT_PARAPHRASES, HELD_OUT_DIFFERENT)
+    if wrong or recall < PARAPHRASE_RECALL_TARGET or held_out_precision < HELD_OUT_PRECISION_TARGET:
+        print("FAILED")
+        return 1
+    return 0
+
+
+def bench_context_window(args):
+    """Prompt size and latency over a long session, unbounded vs rolling context"""
+    from conversation_context import ConversationContext
+    from fake_gemini import FakeGenerativeModel
+    from metrics import metrics
+    
+    turns = min(args.size, 500)
+    answer = "Here is a reasonably detailed answer that covers the main points you asked about. " * 3
+    
+    for label, budget, max_turns in [('unbounded', 10 ** 9, 10 ** 9), ('rolling', 2000, 10)]:
+        model = FakeGenerativeModel(responder=lambda prompt: answer, token_latency=args.latency / 1000)
+        engine = make_engine(model)
+        engine.context = ConversationContext(
+            summarizer=engine._summarize, token_budget=budget, max_turns=max_turns
+        )
+        engine.prompt_accountant.on_alert = lambda record: None
+        metrics.reset()
+        checkpoints = {1, turns // 4, turns // 2, turns}
+        print(label)
+        for turn in range(1, turns + 1):
+            start = time.perf_counter()
+            engine.process_command(f"question number {turn} about topic {turn % 37}")
+            elapsed = time.perf_counter() - start
+            if turn in checkpoints:
+                print(f"  turn {turn:4d}: {engine.last_prompt_tokens:7,d} prompt tokens, {elapsed * 1000:7.1f} ms")
+        summary = engine.prompt_accountant.summary()
+        print(f"  {summary['tokens_sent']:,} tokens sent in total, {summary['boilerplate_ratio']:.1%} boilerplate, "
+              f"{metrics.count('prompt.bloat_alerts')} bloat alerts")
+
+
+
+def bench_pipeline(args):
+    """Double-submitted voice and text requests, engine called directly vs through the request pipeline"""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from fake_gemini import FakeGenerativeModel
+    from metrics import metrics
+    from request_pipeline import Request, RequestPipeline
+    
+    unique = min(args.size, 100)
+    # Every request arrives twice, like a double press of Enter or a voice
+    # command repeated by typing it
+    workload = [(f"explain concept number {i}", 'voice' if i % 4 == 0 else 'text') for i in range(unique)]
+    
+    model = FakeGenerativeModel(latency=args.latency)
+    engine = make_engine(model)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for text, source in workload:
+            list(pool.map(engine.process_command, [text, text]))
+    print(f"direct     {time.perf_counter() - start:7.3f} s for {unique * 2} requests, {model.calls} Gemini calls")
+    
+    model = FakeGenerativeModel(latency=args.latency)
+    engine = make_engine(model)
+    finished = {}
+    
+    def on_status(request):
+        if request.status in (Request.DONE, Request.CANCELLED, Request.FAILED):
+            finished.setdefault(request.id, threading.Event()).set()
+    
+    pipeline = RequestPipeline(engine, on_status=on_status)
+    metrics.reset()
+    start = time.perf_counter()
+    for text, source in workload:
+        first = pipeline.submit(text, source)
+        second = pipeline.submit(text, 'text' if source == 'voice' else 'voice')
+        for request in {first, second}:
+            finished.setdefault(request.id, threading.Event()).wait()
+    print(f"pipeline   {time.perf_counter() - start:7.3f} s for {unique * 2} requests, {model.calls} Gemini calls")
+    wait = metrics.summary('pipeline.queue_wait')
+    print(f"           {metrics.count('pipeline.coalesced')} coalesced, "
+          f"queue wait p50 {wait['p50'] * 1000:.1f} ms, p95 {wait['p95'] * 1000:.1f} ms")
+    pipeline.shutdown()
+
+
+def bench_conversation_store(args):
+    """Append throughput and search latency over a large conversation history"""
+    import os
+    import tempfile
+    from conversation_store import ConversationStore, time_range
+    
+    topics = ['python', 'weather', 'football', 'recipes', 'taxes', 'guitar', 'mars', 'chess',
+              'history', 'music', 'gardening', 'bitcoin', 'yoga', 'photography', 'coffee', 'poetry']
+    turns = args.size
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp()
+    store = ConversationStore(os.path.join(directory, 'history.db'), batch_size=5000)
+    
+    # Spread the turns evenly over the last 90 days
+    now = time.time()
+    step = 90 * 24 * 3600 / turns
+    start = time.perf_counter()
+    for i in range(turns):
+        topic = rng.choice(topics)
+        store.append(f"tell me something about {topic} number {i % 1000}",
+                     f"Here is a fact about {topic}: item {rng.randrange(10 ** 6)}.",
+                     timestamp=now - (turns - i) * step)
+    appended = time.perf_counter() - start
+    store.flush()
+    total = time.perf_counter() - start
+    print(f"append     {turns / appended:12,.0f} turns/s on the request path")
+    print(f"commit     {turns / total:12,.0f} turns/s to SQLite ({store.count():,} turns)")
+    
+    since, until = time_range('last week')
+    for label, kwargs in [('all time', {}), ('last week', {'since': since, 'until': until})]:
+        timings = []
+        for topic in topics * 5:
+            query_start = time.perf_counter()
+            store.search(topic, limit=5, **kwargs)
+            store.count_matches(topic, **kwargs)
+            timings.append(time.perf_counter() - query_start)
+        timings.sort()
+        print(f"search     {label:10s} p50 {timings[len(timings) // 2] * 1000:6.2f} ms, "
+              f"max {timings[-1] * 1000:6.2f} ms")
+    store.close()
+
+
+
+def make_dictation_audio(seconds, sample_rate=16000, seed=0):
+    """Synthetic speech: voiced bursts of 1-4 s separated by short pauses"""
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = 0
+    while total < seconds * sample_rate:
+        burst = int(rng.uniform(1.0, 4.0) * sample_rate)
+        t = np.arange(burst) / sample_rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+        voiced = 0.3 * envelope * np.sin(2 * np.pi * rng.uniform(120, 220) * t) + 0.05 * rng.standard_normal(burst)
+        pause = int(rng.uniform(0.35, 0.8) * sample_rate)
+        parts += [voiced, 0.003 * rng.standard_normal(pause)]
+        total += burst + pause
+    samples = np.concatenate(parts)
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def bench_dictation(args):
+    """Long dictation recognized single-shot vs in parallel silence-split chunks"""
+    import speech_recognition as sr
+    from voice_handler import VoiceHandler
+    from config import Config
+    
+    seconds = 60
+    sample_rate = 16000
+    audio = sr.AudioData(make_dictation_audio(seconds, sample_rate), sample_rate, 2)
+    
+    # Stand-in for a cloud recognizer: round trip plus time proportional to audio length
+    def recognize(chunk):
+        duration = len(chunk.frame_data) / (chunk.sample_rate * chunk.sample_width)
+        time.sleep(args.latency * 30 + duration * 0.05)
+        return f"<{duration:.1f}s>"
+    
+    start = time.perf_counter()
+    recognize(audio)
+    single = time.perf_counter() - start
+    print(f"single-shot {single:7.3f} s for {seconds} s of audio")
+    
+    voice_handler = VoiceHandler(Config())
+    for workers in [1, 4, 8]:
+        start = time.perf_counter()
+        success, text = voice_handler.transcribe_dictation(audio, recognize=recognize, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"chunked x{workers}  {elapsed:7.3f} s, {len(text.split())} chunks")
+
+
+
+def bench_resilience(args):
+    """Latency and success rate against a slow, flaky fake Gemini, plain vs resilient vs hedged client"""
+    from conversation_context import ConversationContext
+    from fake_gemini import FakeGenerativeModel, latency_distribution
+    from resilient_client import ResilientClient, CircuitBreaker
+    
+    requests = min(args.size, 300)
+    median = args.latency * 5
+    
+    def plain_client():
+        return ResilientClient('plain', hedge=False, max_retries=0, breaker=CircuitBreaker(failure_threshold=10 ** 9))
+    
+    def run(label, model, client=None, count=requests):
+        engine = make_engine(model)
+        engine.context = ConversationContext(summarizer=None)
+        if client:
+            engine.gemini_client = client
+        # Let the latency tracker learn the backend first
+        for i in range(50):
+            engine.process_command(f"warm-up {i}")
+        model.calls = 0
+        timings = []
+        failures = 0
+        for i in range(count):
+            start = time.perf_counter()
+            response = engine.process_command(f"question {i}")
+            timings.append(time.perf_counter() - start)
+            failures += not response.startswith("Answer to:")
+        timings.sort()
+        print(f"  {label:10s} p50 {timings[len(timings) // 2] * 1000:7.1f} ms, "
+              f"p99 {timings[int(len(timings) * 0.99)] * 1000:7.1f} ms, "
+              f"{failures / len(timings):6.1%} failed, {model.calls} backend calls")
+    
+    print(f"degraded backend (median {median * 1000:.0f} ms, 3% stalls x20, 5% errors)")
+    hedged_client = ResilientClient('hedged', hedge=True)
+    for label, client in [('plain', plain_client()), ('resilient', None), ('hedged', hedged_client)]:
+        sampler = latency_distribution(median, sigma=0.4, tail_probability=0.03)
+        run(label, FakeGenerativeModel(latency_sampler=sampler, error_rate=0.05), client)
+    
+    print("backend down (every call fails after 200 ms)")
+    for label, client in [('plain', plain_client()), ('resilient', None)]:
+        run(label, FakeGenerativeModel(latency=1.0, error_rate=1.0), client, count=20)
+
+
+def make_traffic_corpus(size, seed=0):
+    """Utterance corpus with the computable queries real users ask mixed in"""
+    rng = random.Random(seed)
+    units = [('km', 'miles'), ('pounds', 'kg'), ('fahrenheit', 'celsius'), ('cups', 'ml'), ('gb', 'mb')]
+    templates = [
+        lambda: f"what's {rng.randint(2, 99)} times {rng.randint(2, 99)}",
+        lambda: f"what is {rng.randint(5, 50)}% of {rng.randint(10, 500)}",
+        lambda: f"calculate {rng.randint(100, 9999)} divided by {rng.randint(2, 30)}",
+        lambda: "convert {} {} to {}".format(rng.randint(1, 200), *rng.choice(units)),
+        lambda: "{} {} in {}".format(rng.randint(1, 200), *rng.choice(units)),
+        lambda: f"what day is march {rng.randint(1, 28)} next year",
+        lambda: 'how many days until christmas',
+        lambda: f"set a timer for {rng.randint(1, 30)} minutes",
+    ]
+    corpus = make_utterance_corpus(size, seed)
+    # Roughly one in five utterances is computable
+    return [rng.choice(templates)() if rng.random() < 0.2 else text for text in corpus]
+
+
+def bench_local_answerers(args):
+    """Share of traffic answered locally, and how long each answerer takes to claim"""
+    import os
+    from conversation_store import ConversationStore, STORE_FILE
+    from intent_router import IntentRouter
+    from local_answerers import LocalAnswerers, diversion_report
+    
+    queries = []
+    if os.path.exists(STORE_FILE):
+        # Replay the user's own conversation history
+        store = ConversationStore()
+        queries = [turn['user'] for turn in store.recent(args.size)]
+        store.close()
+    source = f"{len(queries):,} turns from {STORE_FILE}"
+    if not queries:
+        queries = make_traffic_corpus(min(args.size, 20000))
+        source = f"{len(queries):,} synthetic utterances"
+    
+    answerers = LocalAnswerers()
+    router = IntentRouter()
+    report = diversion_report(queries, answerers, router)
+    print(f"traffic    {source}")
+    for name in [a.name for a in answerers.answerers] + ['system_command', 'gemini']:
+        count = report.get(name, 0)
+        print(f"{name:16s} {count:8,} ({count / report['total']:6.1%})")
+    print(f"answered locally: {report['diverted']:.1%} of queries, "
+          f"saving ~{report['total'] * report['diverted'] * args.latency:,.1f} s of Gemini round trips at {args.latency:.2f} s each")
+    
+    normalized = [' '.join(q.lower().split()) for q in queries]
+    for answerer in answerers.answerers:
+        start = time.perf_counter()
+        for query in normalized:
+            answerer.claim(query)
+        elapsed = time.perf_counter() - start
+        print(f"claim      {answerer.name:16s} {elapsed / len(queries) * 1e6:7.1f} us/query")
+
+
+def bench_warmup(args):
+    """First-request latency on a cold connection, after warm-up, and after idling with and without keep-alive"""
+    from fake_gemini import FakeGenerativeModel
+    
+    connect_latency, idle_timeout = 0.4, 1.0
+    
+    def first_request(warmup=False, idle=None, keepalive=3600):
+        model = FakeGenerativeModel(latency=args.latency, connect_latency=connect_latency, idle_timeout=idle_timeout)
+        engine = make_engine(model)
+        engine.config.keepalive_interval = keepalive
+        if warmup:
+            engine.start_warmup()
+            engine.warmer.warmed.wait()
+        if idle is not None:
+            engine.process_command('an earlier question')
+            time.sleep(idle)
+        start = time.perf_counter()
+        engine.process_command('what is the speed of light')
+        elapsed = time.perf_counter() - start
+        engine.close()
+        return elapsed * 1000
+    
+    print(f"simulated connection setup {connect_latency * 1000:.0f} ms, dropped after {idle_timeout:.1f} s idle")
+    print(f"first request, cold start         {first_request():7.1f} ms")
+    print(f"first request, after warm-up      {first_request(warmup=True):7.1f} ms")
+    print(f"after 1.5 s idle, no keep-alive   {first_request(warmup=True, idle=1.5):7.1f} ms")
+    print(f"after 1.5 s idle, 0.3 s keep-alive {first_request(warmup=True, idle=1.5, keepalive=0.3):6.1f} ms")
+
+
+def make_utterance_wav(path, utterances, sample_rate=16000, seed=0):
+    """WAV file of separate spoken commands over background noise"""
+    import wave
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    parts = []
+    for index in range(utterances):
+        pause = int(rng.uniform(1.0, 2.0) * sample_rate)
+        parts.append(0.003 * rng.standard_normal(pause))
+        burst = int(rng.uniform(0.8, 2.5) * sample_rate)
+        t = np.arange(burst) / sample_rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+        parts.append(0.3 * envelope * np.sin(2 * np.pi * rng.uniform(120, 220) * t) + 0.05 * rng.standard_normal(burst))
+    parts.append(0.003 * rng.standard_normal(sample_rate))
+    samples = (np.clip(np.concatenate(parts), -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return len(samples) / sample_rate
+
+
+def bench_continuous_listener(args):
+    """Utterance segmentation, CPU per second of audio, dropped frames and transcript latency"""
+    import os
+    import tempfile
+    from continuous_listener import ContinuousListener, WavFileSource, END_SILENCE_MS
+    
+    path = os.path.join(tempfile.mkdtemp(), 'commands.wav')
+    recognition_time = args.latency * 20
+    
+    for label, utterances, realtime in [('as fast as possible', 200, False), ('real time', 10, True)]:
+        seconds = make_utterance_wav(path, utterances)
+        latencies = []
+        
+        # Stand-in for a cloud recognizer: a fixed round trip
+        def recognize(utterance):
+            time.sleep(recognition_time)
+            latencies.append(time.perf_counter() - utterance.speech_ended_at)
+            return f"<{utterance.duration:.1f}s>"
+        
+        listener = ContinuousListener(WavFileSource(path, realtime=realtime), recognize, max_pending=utterances)
+        start = time.perf_counter()
+        listener.start()
+        listener.wait()
+        elapsed = time.perf_counter() - start
+        stats = listener.stats()
+        print(f"{label}: {seconds:.0f} s of audio in {elapsed:.2f} s")
+        print(f"  utterances     {stats['utterances']} found of {utterances}")
+        print(f"  capture CPU    {stats['cpu_seconds'] / stats['audio_seconds'] * 1000:.2f} ms per second of audio")
+        print(f"  dropped        {stats['dropped_frames']} frames, {stats['dropped_utterances']} utterances")
+        if realtime:
+            latencies.sort()
+            print(f"  end of speech to transcript p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+                  f"max {latencies[-1] * 1000:.0f} ms ({END_SILENCE_MS} ms silence + "
+                  f"{recognition_time * 1000:.0f} ms recognition)")
+
+
+# Synthetic wake word: three gliding syllables, (start Hz, end Hz, seconds)
+SYNTHETIC_WAKE_WORD = [(300, 600, 0.18), (900, 500, 0.22), (400, 800, 0.2)]
+
+
+def synthesize_word(rng, syllables, sample_rate=16000):
+    """Speech-like word from gliding syllables, with speaker tempo and pitch variation"""
+    import numpy as np
+    
+    tempo, pitch = rng.uniform(0.85, 1.15), rng.uniform(0.92, 1.08)
+    parts = []
+    for start, end, seconds in syllables:
+        length = int(seconds * tempo * sample_rate)
+        t = np.arange(length) / sample_rate
+        phase = 2 * np.pi * np.cumsum(np.linspace(start, end, length) * pitch) / sample_rate
+        voiced = 0.5 * np.sin(phase) + 0.2 * np.sin(2 * phase) + 0.3 * np.sin(2 * np.pi * 140 * pitch * t)
+        parts.append(voiced * np.sin(np.pi * np.arange(length) / length))
+    return np.concatenate(parts)
+
+
+def random_syllables(rng, count):
+    return [(rng.uniform(200, 1000), rng.uniform(200, 1000), rng.uniform(0.12, 0.25)) for _ in range(count)]
+
+
+def make_wake_word_fixtures(directory, enroll=3, positives=100, negatives=100, seed=0):
+    """enroll/, positive/ and negative/ WAV fixtures; positives may run on into a command"""
+    import os
+    import wave
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    
+    def write(name, index, samples):
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+        samples = 0.3 * samples + 0.01 * rng.standard_normal(len(samples))
+        with wave.open(os.path.join(directory, name, f"{index:04d}.wav"), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(16000)
+            wav.writeframes((np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes())
+    
+    for index in range(enroll):
+        write('enroll', index, synthesize_word(rng, SYNTHETIC_WAKE_WORD))
+    for index in range(positives):
+        word = synthesize_word(rng, SYNTHETIC_WAKE_WORD)
+        command = synthesize_word(rng, random_syllables(rng, int(rng.integers(0, 8))) or [(0, 0, 0.01)])
+        write('positive', index, np.concatenate((word, np.zeros(800), command)))
+    for index in range(negatives):
+        write('negative', index, synthesize_word(rng, random_syllables(rng, int(rng.integers(2, 10)))))
+
+
+def bench_wake_word(args):
+    """False-accept and false-reject rates and CPU cost of the wake-word spotter"""
+    import tempfile
+    from wake_word import WakeWordSpotter, evaluate, fixture_paths, read_wav
+    
+    directory = args.fixtures
+    if not directory:
+        directory = tempfile.mkdtemp()
+        make_wake_word_fixtures(directory)
+        print("fixtures   synthetic (three-syllable wake word over noise)")
+    enroll, positives, negatives = fixture_paths(directory)
+    
+    spotter = WakeWordSpotter()
+    for path in enroll:
+        spotter.enroll(*read_wav(path))
+    print(f"templates  {len(spotter.templates)}")
+    
+    calibrated = spotter.threshold
+    for scale in [0.8, 1.0, 1.2]:
+        spotter.threshold = calibrated * scale
+        result = evaluate(spotter, positives, negatives)
+        print(f"threshold {spotter.threshold:6.3f}  false reject {result['false_reject_rate']:6.1%}  "
+              f"false accept {result['false_accept_rate']:6.1%}")
+    print(f"({result['positives']} wake words, {result['negatives']} other utterances)")
+    print(f"CPU        {result['cpu_ms_per_audio_second']:.1f} ms per second of audio scored")
+
+
+def bench_recognizers(args):
+    """Latency and word error rate per recognizer backend, alone and racing"""
+    from fake_gemini import latency_distribution
+    from intent_router import IntentRouter
+    from recognizer_backends import (RecognizerBackend, RacingRecognizer, available_backends,
+                                     evaluate_backends, load_corpus)
+    
+    router = IntentRouter()
+    is_command = lambda text: router.match(text) is not None
+    
+    if args.fixtures:
+        import speech_recognition as sr
+        corpus = load_corpus(args.fixtures)
+        backends = available_backends(sr.Recognizer(), ['google', 'sphinx', 'vosk'])
+        print(f"corpus     {len(corpus)} recordings from {args.fixtures}")
+    else:
+        class SimulatedBackend(RecognizerBackend):
+            """Backend whose 'audio' is the reference text, garbled at a word error rate"""
+            
+            def __init__(self, name, offline, median, word_error, seed):
+                self.name = name
+                self.offline = offline
+                self.sampler = latency_distribution(median, sigma=0.3, seed=seed)
+                self.word_error = word_error
+                self.rng = random.Random(seed)
+            
+            def transcribe(self, audio):
+                time.sleep(self.sampler())
+                words = [word if self.rng.random() > self.word_error else 'uh' for word in audio.split()]
+                errors = words.count('uh') / float(len(words))
+                return ' '.join(words), 0.95 - errors
+        
+        corpus = [(text.lower().rstrip('?'), text.lower().rstrip('?'))
+                  for text in make_utterance_corpus(min(args.size, 100), seed=1)]
+        backends = [
+            SimulatedBackend('google', False, args.latency * 20, 0.03, 1),
+            SimulatedBackend('sphinx', True, args.latency * 8, 0.12, 2),
+        ]
+        print(f"corpus     {len(corpus)} simulated utterances, "
+              f"{sum(map(is_command, (text for text, _ in corpus)))} of them commands")
+    
+    recognizers = {backend.name: backend for backend in backends}
+    if len(backends) > 1:
+        recognizers['race'] = RacingRecognizer(backends, is_command=is_command)
+    for label, row in evaluate_backends(recognizers, corpus).items():
+        wins = ', '.join(f"{name} {count}" for name, count in sorted(row['wins'].items()))
+        print(f"{label:8s} p50 {row['p50'] * 1000:6.0f} ms  p95 {row['p95'] * 1000:6.0f} ms  "
+              f"WER {row['wer']:6.1%}  failures {row['failures']}  wins: {wins}")
+
+
+# Simulated text-to-speech: seconds of synthesis and of audio per character
+FAKE_SYNTHESIS_PER_CHAR = 0.002
+FAKE_AUDIO_PER_CHAR = 0.006
+FAKE_TTS_SAMPLE_RATE = 16000
+
+
+class FakeSpeechEngine:
+    """pyttsx3 stand-in: synthesis takes time proportional to the text"""
+    
+    def __init__(self):
+        self.pending = []
+        self.properties = {'voice': 'fake', 'rate': 150, 'volume': 0.9}
+    
+    def getProperty(self, name):
+        return self.properties.get(name)
+    
+    def setProperty(self, name, value):
+        self.properties[name] = value
+    
+    def save_to_file(self, text, path):
+        self.pending.append((text, path))
+    
+    def say(self, text):
+        self.pending.append((text, None))
+    
+    def runAndWait(self):
+        import wave
+        for text, path in self.pending:
+            time.sleep(len(text) * FAKE_SYNTHESIS_PER_CHAR)
+            if path:
+                with wave.open(path, 'wb') as wav:
+                    wav.setnchannels(1)
+                    wav.setsampwidth(2)
+                    wav.setframerate(FAKE_TTS_SAMPLE_RATE)
+                    wav.writeframes(b'\0\0' * int(len(text) * FAKE_AUDIO_PER_CHAR * FAKE_TTS_SAMPLE_RATE))
+        self.pending = []
+    
+    def stop(self):
+        pass
+
+
+class FakeAudioPlayer:
+    """Plays in real time by sleeping chunk by chunk, or instantly"""
+    
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+    
+    def play(self, rendered, should_stop):
+        chunk = 1024 * rendered.sample_width
+        for offset in range(0, len(rendered.frames), chunk):
+            if should_stop():
+                return False
+            if self.realtime:
+                time.sleep(len(rendered.frames[offset:offset + chunk]) / float(rendered.sample_width * rendered.sample_rate))
+        return True
+    
+    def close(self):
+        pass
+
+
+def bench_tts(args):
+    """Time to first audio, barge-in latency and urgent-message latency of the speech worker"""
+    from tts_worker import TTSWorker, URGENT
+    
+    answer = ("Quantum computers use qubits instead of bits. A qubit can be in a mix of zero and one at once. "
+              "Qubits can also be entangled, so measuring one tells you about another. "
+              "Algorithms use these effects to explore many possibilities together. "
+              "That makes some problems, like factoring large numbers, much faster to solve. "
+              "Today's machines are still small and noisy, so most of this remains research.")
+    worker = TTSWorker(FakeSpeechEngine, player_factory=FakeAudioPlayer)
+    worker.start()
+    worker.ready.wait()
+    
+    def time_to_first_audio(text, priority):
+        started = time.perf_counter()
+        first = []
+        speech = worker.say(text, priority, on_start=lambda: first.append(time.perf_counter()))
+        return speech, first, started
+    
+    # The old speech thread synthesized the whole answer before any audio
+    engine = FakeSpeechEngine()
+    started = time.perf_counter()
+    engine.save_to_file(answer, None)
+    engine.runAndWait()
+    whole = (time.perf_counter() - started) * 1000
+    
+    speech, first, started = time_to_first_audio(answer, 1)
+    while not first:
+        time.sleep(0.001)
+    pipelined = (first[0] - started) * 1000
+    
+    # An urgent message queued behind the answer
+    time.sleep(0.2)
+    urgent, urgent_first, urgent_started = time_to_first_audio("Your timer is done.", URGENT)
+    urgent.done.wait()
+    urgent_latency = (urgent_first[0] - urgent_started) * 1000
+    
+    # Barge-in: cancel mid-answer and wait for the audio to stop
+    time.sleep(0.2)
+    started = time.perf_counter()
+    worker.cancel()
+    while worker.is_speaking:
+        time.sleep(0.001)
+    barge_in = (time.perf_counter() - started) * 1000
+    speech.done.wait()
+    worker.stop()
+    
+    print(f"answer     {len(answer)} characters, {len(speech.sentences)} sentences, "
+          f"{len(answer) * FAKE_AUDIO_PER_CHAR:.1f} s of audio")
+    print(f"time to first audio, whole answer  {whole:7.1f} ms")
+    print(f"time to first audio, pipelined     {pipelined:7.1f} ms")
+    print(f"urgent message behind the answer   {urgent_latency:7.1f} ms")
+    print(f"barge-in to silence                {barge_in:7.1f} ms")
+
+
+def bench_tts_cache(args):
+    """Hit rate and time to first audio of recurring phrases, with and without the audio cache"""
+    import os
+    import tempfile
+    from metrics import metrics
+    from tts_cache import TTSCache
+    from tts_worker import TTSWorker
+    from utils import get_greeting
+    
+    apps = ['notepad', 'calculator', 'chrome', 'explorer', 'spotify', 'vscode']
+    common = ([f"{get_greeting()}! I'm Jarvis, your personal assistant. How may I help you today?",
+               "I didn't catch that. Please try again.", "Chat cleared. How can I help you?"] +
+              [f"Opening {app}" for app in apps] + [f"Closed {app}" for app in apps])
+    rng = random.Random(0)
+    # Roughly two replies in three are stock phrases; the rest are one-off answers
+    session = [rng.choice(common) if rng.random() < 0.65 else f"Here is answer number {index} to your question."
+               for index in range(min(args.size, 200))]
+    
+    def run(cache):
+        worker = TTSWorker(FakeSpeechEngine, player_factory=lambda: FakeAudioPlayer(realtime=False), cache=cache)
+        worker.start()
+        worker.ready.wait()
+        started = time.perf_counter()
+        for speech in worker.prerender(common):
+            speech.done.wait()
+        prerender_time = time.perf_counter() - started
+        latencies = []
+        for text in session:
+            first = []
+            started = time.perf_counter()
+            worker.say(text, on_start=lambda: first.append(time.perf_counter())).done.wait()
+            latencies.append(first[0] - started)
+        worker.stop()
+        return latencies, prerender_time
+    
+    with tempfile.TemporaryDirectory() as directory:
+        uncached, _ = run(None)
+        metrics.reset()
+        cached, prerender_time = run(TTSCache(os.path.join(directory, 'tts_cache.db')))
+        stats = TTSCache(os.path.join(directory, 'tts_cache.db')).stats()
+    
+    def row(label, latencies, texts):
+        values = sorted(latency for latency, text in zip(latencies, session) if text in texts)
+        print(f"{label:34s} p50 {values[len(values) // 2] * 1000:6.1f} ms  p95 "
+              f"{values[min(len(values) - 1, int(len(values) * 0.95))] * 1000:6.1f} ms")
+    
+    one_off = set(session) - set(common)
+    print(f"session    {len(session)} replies, {sum(text in common for text in session)} stock phrases, "
+          f"{len(common)} phrases pre-rendered in {prerender_time * 1000:.0f} ms")
+    row("stock phrase, no cache", uncached, common)
+    row("stock phrase, cached", cached, common)
+    row("one-off answer, cached", cached, one_off)
+    print(f"hit rate {stats['hit_rate']:.1%} ({stats['memory_hits']} memory, {stats['disk_hits']} disk, "
+          f"{stats['misses']} misses), synthesis saved {stats['latency_saved']:.2f} s, "
+          f"{stats['disk_bytes'] / 1024:.0f} KiB on disk")
+
+
+def make_noisy_commands_wav(path, noise_levels, speech_level=0.1, sample_rate=16000, seed=0):
+    """WAV file of one spoken command per noise level; returns (start, end) seconds of each command"""
+    import wave
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    parts, spans, position = [], [], 0
+    for noise in noise_levels:
+        pause = int(rng.uniform(2.0, 3.0) * sample_rate)
+        burst = int(rng.uniform(0.8, 2.0) * sample_rate)
+        t = np.arange(burst) / sample_rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+        parts.append(noise * rng.standard_normal(pause))
+        parts.append(speech_level * envelope * np.sin(2 * np.pi * rng.uniform(120, 220) * t) +
+                     noise * rng.standard_normal(burst))
+        spans.append(((position + pause) / sample_rate, (position + pause + burst) / sample_rate))
+        position += pause + burst
+    parts.append(noise_levels[-1] * rng.standard_normal(3 * sample_rate))
+    samples = (np.clip(np.concatenate(parts), -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return spans
+
+
+def bench_noise_floor(args):
+    """Endpointing with a one-off ambient calibration vs the running noise-floor estimate, as the noise changes"""
+    import os
+    import tempfile
+    import speech_recognition as sr
+    from config import Config
+    from noise_floor import NoiseFloorTracker
+    from voice_handler import VoiceHandler
+    
+    phrase_limit = 10
+    conditions = [
+        ('quiet room', [0.003] * 8),
+        ('fan starts', [0.003] * 3 + [0.03] * 5),
+        ('fan stops', [0.03] * 3 + [0.003] * 5),
+    ]
+    
+    def endpoint(path, spans, tracked):
+        handler = VoiceHandler(Config())
+        handler.recognizer = sr.Recognizer()
+        handler.recognizer.dynamic_energy_threshold = not tracked
+        handler.noise_floor = NoiseFloorTracker(path=None)
+        detected, limited, cut, noise, latencies = set(), 0, 0, 0, []
+        with sr.AudioFile(path) as source:
+            # Read in the microphone's chunk size so pauses are timed the same way
+            source.CHUNK = 1024
+            reader = source.audio_reader
+            if not tracked:
+                handler.recognizer.adjust_for_ambient_noise(source, duration=1)
+            calibration = reader.tell() / float(source.SAMPLE_RATE)
+            while reader.tell() < reader.getnframes():
+                if tracked:
+                    audio = handler._listen_for_phrase(source, None, phrase_limit)
+                else:
+                    audio = handler.recognizer.listen(source, phrase_time_limit=phrase_limit)
+                end = reader.tell() / float(source.SAMPLE_RATE)
+                start = end - len(audio.frame_data) / float(audio.sample_width * audio.sample_rate)
+                inside = [index for index, (begin, finish) in enumerate(spans) if begin < end and finish > start]
+                if not inside:
+                    noise += end - start >= 0.5
+                    continue
+                detected.update(inside)
+                if end - start >= phrase_limit - 0.1:
+                    limited += 1
+                elif end - spans[inside[-1]][1] < handler.recognizer.pause_threshold:
+                    # Ended before a full pause after the speech: the command was cut off
+                    cut += 1
+                else:
+                    latencies.append(end - spans[inside[-1]][1])
+        return len(detected), limited, cut, noise, sorted(latencies), calibration
+    
+    directory = tempfile.mkdtemp()
+    print(f"speech level 0.1, {phrase_limit} s phrase limit; latency is end of speech to end of capture")
+    for label, noise_levels in conditions:
+        path = os.path.join(directory, label.replace(' ', '_') + '.wav')
+        spans = make_noisy_commands_wav(path, noise_levels)
+        for mode, tracked in [('calibrate once', False), ('noise tracker', True)]:
+            detected, limited, cut, noise, latencies, calibration = endpoint(path, spans, tracked)
+            p50 = f"{latencies[len(latencies) // 2] * 1000:5.0f} ms" if latencies else "    - ms"
+            print(f"{label:11s} {mode:15s} heard {detected}/{len(spans)}  ran to limit {limited}  cut off {cut}  noise only {noise}  "
+                  f"endpoint p50 {p50}  calibration pause {calibration * 1000:4.0f} ms")
+
+
+def bench_upload(args):
+    """Bytes sent and latency per utterance to a cloud recognizer over a slow link, raw vs trimmed and downsampled"""
+    import numpy as np
+    import speech_recognition as sr
+    from metrics import metrics
+    from recognizer_backends import GoogleBackend
+    
+    capture_rate, bandwidth, server_time = 44100, 512000, args.latency * 10
+    rng = np.random.default_rng(0)
+    utterances = []
+    for _ in range(10):
+        lead, speech, tail = rng.uniform(0.3, 1.5), rng.uniform(0.8, 3.0), rng.uniform(0.5, 1.2)
+        t = np.arange(int(speech * capture_rate)) / capture_rate
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+        voiced = 0.3 * envelope * np.sin(2 * np.pi * rng.uniform(120, 220) * t) + 0.01 * rng.standard_normal(len(t))
+        samples = np.concatenate([0.003 * rng.standard_normal(int(lead * capture_rate)), voiced,
+                                  0.003 * rng.standard_normal(int(tail * capture_rate))])
+        utterances.append(sr.AudioData((samples * 32767).astype('<i2').tobytes(), capture_rate, 2))
+    
+    class CloudStandIn:
+        """recognize_google stand-in: encodes like the real one, then waits out upload and recognition"""
+        
+        operation_timeout = None
+        
+        def recognize_google(self, audio, with_confidence=False):
+            data = audio.get_flac_data(convert_width=2)
+            time.sleep(len(data) * 8.0 / bandwidth + server_time)
+            return 'open notepad', 0.9
+    
+    def p50(name):
+        return metrics.percentile(name, 50)
+    
+    print(f"{len(utterances)} utterances captured at {capture_rate} Hz, {bandwidth // 1000} kbit/s uplink, "
+          f"{server_time * 1000:.0f} ms recognition")
+    for label, preprocess in [('raw capture', False), ('trimmed, 16 kHz', True)]:
+        metrics.reset()
+        backend = GoogleBackend(CloudStandIn(), preprocess=preprocess)
+        for audio in utterances:
+            backend.recognize(audio)
+        sent = p50('recognizer.google.bytes_sent')
+        print(f"{label:16s} sent p50 {sent / 1024:6.1f} KiB of {p50('recognizer.google.bytes_captured') / 1024:6.1f} KiB  "
+              f"upload {sent * 8.0 / bandwidth * 1000:5.0f} ms  "
+              f"prepare {p50('recognizer.google.preprocess_time') * 1000:4.1f} ms  "
+              f"encode {p50('recognizer.google.encode_time') * 1000:4.1f} ms  "
+              f"total p50 {p50('recognizer.google.latency') * 1000:5.0f} ms")
+
+
+# Spoken commands for the speculative-execution fixtures
+SPECULATIVE_PHRASES = [
+    'open notepad',
+    'open visual studio code',
+    'close spotify',
+    'jarvis please open calculator',
+    'what is the tallest mountain in europe',
+    'tell me a joke about computers',
+]
+
+
+def make_phrase_wav(path, words, sample_rate=16000, seed=0):
+    """WAV of one spoken phrase, a synthetic word per word; returns when each word ends, in seconds"""
+    import wave
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    parts = [0.003 * rng.standard_normal(int(0.5 * sample_rate))]
+    position, word_ends = len(parts[0]), []
+    for word in words:
+        voiced = 0.3 * synthesize_word(rng, random_syllables(rng, max(1, len(word) // 3)), sample_rate)
+        gap = 0.003 * rng.standard_normal(int(rng.uniform(0.05, 0.12) * sample_rate))
+        parts.extend([voiced, gap])
+        position += len(voiced)
+        word_ends.append(position / float(sample_rate))
+        position += len(gap)
+    parts.append(0.003 * rng.standard_normal(2 * sample_rate))
+    samples = (np.clip(np.concatenate(parts), -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return word_ends
+
+
+def bench_speculative(args):
+    """Command-to-action latency with and without speculating on partial transcripts, on WAV fixtures"""
+    import glob
+    import os
+    import tempfile
+    import speech_recognition as sr
+    from audio_processing import pcm_to_samples
+    from audio_upload import speech_bounds
+    from config import Config
+    from fake_gemini import FakeGenerativeModel
+    from metrics import metrics
+    from noise_floor import NoiseFloorTracker
+    from recognizer_backends import RecognizerBackend
+    from voice_handler import VoiceHandler
+    
+    recognition_time, resolve_time, connect_latency = args.latency * 20, args.latency * 15, 0.4
+    
+    # (path, transcript, seconds at which each word ends)
+    fixtures = []
+    if args.fixtures:
+        # Recorded phrases with .txt transcripts; words are spread evenly over the speech
+        for path in sorted(glob.glob(os.path.join(args.fixtures, '*.wav'))):
+            transcript = os.path.splitext(path)[0] + '.txt'
+            if not os.path.exists(transcript):
+                continue
+            with open(transcript, 'r', encoding='utf-8') as f:
+                words = f.read().strip().lower().split()
+            with sr.AudioFile(path) as source:
+                audio = sr.Recognizer().record(source)
+            start, end = speech_bounds(pcm_to_samples(audio.frame_data, audio.sample_width), audio.sample_rate)
+            start, end = start / float(audio.sample_rate), end / float(audio.sample_rate)
+            fixtures.append((path, ' '.join(words), [start + (end - start) * (i + 1) / len(words) for i in range(len(words))]))
+    else:
+        directory = tempfile.mkdtemp()
+        for index, phrase in enumerate(SPECULATIVE_PHRASES):
+            path = os.path.join(directory, f'phrase{index}.wav')
+            fixtures.append((path, phrase, make_phrase_wav(path, phrase.split(), seed=index)))
+    
+    class PacedAudioFile(sr.AudioFile):
+        """WAV file read no faster than real time, like a microphone"""
+        
+        def __enter__(self):
+            source = super().__enter__()
+            stream, rate = self.stream, float(self.SAMPLE_RATE)
+            started = time.perf_counter()
+            
+            class PacedStream:
+                position = 0
+                
+                def read(self, size):
+                    data = stream.read(size)
+                    self.position += len(data) // source.SAMPLE_WIDTH
+                    delay = started + self.position / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    return data
+            
+            self.started = started
+            self.stream = PacedStream()
+            return self
+    
+    class ScriptedBackend(RecognizerBackend):
+        """Cloud recognizer stand-in: the words of the transcript spoken by the time the audio was sent"""
+        
+        name = 'scripted'
+        
+        def __init__(self, transcript, word_ends, microphone):
+            self.words = transcript.split()
+            self.word_ends = word_ends
+            self.microphone = microphone
+        
+        def transcribe(self, audio):
+            heard = time.perf_counter() - self.microphone.started
+            time.sleep(recognition_time)
+            return ' '.join(word for word, end in zip(self.words, self.word_ends) if end <= heard), 0.9
+    
+    class ControllerStandIn:
+        """SystemController whose lookups take resolve_time and which records when actions run"""
+        
+        common_apps = {}
+        
+        def __init__(self):
+            self.acted_at = None
+        
+        def resolve_application(self, app_name):
+            time.sleep(resolve_time)
+            return [app_name]
+        
+        def launch_application(self, app_name, command):
+            self.acted_at = time.perf_counter()
+            return True, f"Opening {app_name}"
+        
+        def open_application(self, app_name):
+            return self.launch_application(app_name, self.resolve_application(app_name))
+        
+        def find_app_processes(self, app_name):
+            time.sleep(resolve_time)
+            return []
+        
+        def terminate_app_processes(self, app_name, processes):
+            self.acted_at = time.perf_counter()
+            return True, f"Closed {app_name}"
+        
+        def close_application(self, app_name):
+            return self.terminate_app_processes(app_name, self.find_app_processes(app_name))
+    
+    def run(path, transcript, word_ends, speculative):
+        controller = ControllerStandIn()
+        model = FakeGenerativeModel(latency=args.latency * 30, connect_latency=connect_latency, idle_timeout=60.0)
+        engine = make_engine(model, system_controller=controller, speculative=speculative)
+        handler = VoiceHandler(Config())
+        handler.recognizer = sr.Recognizer()
+        handler.noise_floor = NoiseFloorTracker(path=None)
+        handler.microphone = PacedAudioFile(path)
+        handler.speech_recognizer = ScriptedBackend(transcript, word_ends, handler.microphone)
+        handler.recognition_ready.set()
+        
+        on_partial = engine.speculate if speculative else None
+        success, text = handler.listen(timeout=5, phrase_time_limit=10, on_partial=on_partial)
+        response = engine.process_command(text) if success else None
+        done = time.perf_counter()
+        speech_end = handler.microphone.started + word_ends[-1]
+        acted = controller.acted_at or done
+        engine.close()
+        return text, response, acted - speech_end
+    
+    print(f"{len(fixtures)} fixtures; {recognition_time * 1000:.0f} ms recognition, {resolve_time * 1000:.0f} ms app lookup, "
+          f"{connect_latency * 1000:.0f} ms cold Gemini connection")
+    print("latency is end of speech to the app launching, or to Gemini's answer")
+    totals = {False: [], True: []}
+    for path, transcript, word_ends in fixtures:
+        latencies = []
+        for speculative in (False, True):
+            metrics.reset()
+            text, response, latency = run(path, transcript, word_ends, speculative)
+            totals[speculative].append(latency)
+            latencies.append(latency)
+        heard = '' if text == transcript else f"  heard {text!r}"
+        print(f"{transcript[:38]:38s}  final only {latencies[0] * 1000:5.0f} ms  speculative {latencies[1] * 1000:5.0f} ms  "
+              f"(partials {metrics.count('speculation.partials')}, prepared {metrics.count('speculation.prepared')}, "
+              f"committed {metrics.count('speculation.committed')}, prewarmed {metrics.count('speculation.prewarm')}){heard}")
+    for speculative, label in [(False, 'final only'), (True, 'speculative')]:
+        latencies = sorted(totals[speculative])
+        print(f"{label:12s} p50 {latencies[len(latencies) // 2] * 1000:5.0f} ms  mean {sum(latencies) / len(latencies) * 1000:5.0f} ms")
+
+def bench_process_index(args):
+    """Close and list commands with a full process scan per call vs the incremental process index, by process count"""
+    import psutil
+    from process_index import ProcessIndex, ProcessInfo, inspect_process
+    
+    # Per-process cost of asking the OS about a process, measured on this machine
+    pids = psutil.pids()
+    start = time.perf_counter()
+    for pid in pids:
+        inspect_process(pid)
+    inspect_cost = (time.perf_counter() - start) / len(pids)
+    start = time.perf_counter()
+    for proc in psutil.process_iter(['name']):
+        proc.info['name']
+    name_cost = (time.perf_counter() - start) / len(pids)
+    print(f"measured on {len(pids)} real processes: {name_cost * 1e6:.0f} us per name in a scan, "
+          f"{inspect_cost * 1e6:.0f} us to index one")
+    
+    def spin(seconds):
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+    
+    rng = random.Random(0)
+    for count in (500, 2000, 8000):
+        # Simulated process table with the measured costs and 1% churn between refreshes
+        table = {pid: f"proc{pid % (count // 4)}.exe" for pid in range(1000, 1000 + count)}
+        table[999] = 'notepad.exe'
+        next_pid = [1000 + count]
+        
+        def inspect(pid):
+            spin(inspect_cost)
+            name = table.get(pid)
+            return ProcessInfo(pid, name) if name else None
+        
+        def full_scan_close(name):
+            found = []
+            for pid in list(table):
+                spin(name_cost)
+                if table[pid].lower() == name:
+                    found.append(pid)
+            return found
+        
+        def churn():
+            for pid in rng.sample(sorted(table), count // 100):
+                if pid != 999:
+                    del table[pid]
+            for _ in range(count // 100):
+                table[next_pid[0]] = f"proc{next_pid[0] % (count // 4)}.exe"
+                next_pid[0] += 1
+        
+        start = time.perf_counter()
+        full_scan_close('notepad.exe')
+        scan_time = time.perf_counter() - start
+        
+        index = ProcessIndex(list_pids=lambda: list(table), inspect=inspect)
+        start = time.perf_counter()
+        index.refresh()
+        build_time = time.perf_counter() - start
+        churn()
+        start = time.perf_counter()
+        started, exited = index.refresh()
+        refresh_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for _ in range(1000):
+            index.find('notepad.exe')
+        lookup_time = (time.perf_counter() - start) / 1000
+        start = time.perf_counter()
+        names = index.running_names()
+        list_time = time.perf_counter() - start
+        
+        print(f"{count:5d} processes  full scan per command {scan_time * 1000:7.1f} ms  "
+              f"index build {build_time * 1000:7.1f} ms  refresh ({len(started)} started, {len(exited)} exited) "
+              f"{refresh_time * 1000:5.1f} ms  close lookup {lookup_time * 1e6:5.1f} us  "
+              f"list {len(names)} names {list_time * 1000:5.2f} ms")
+
+
+def bench_system_sampler(args):
+    """System status latency blocking on psutil vs read from the background sampler, sampling cost and trend queries"""
+    import numpy as np
+    import psutil
+    from system_sampler import SystemSampler, COLUMNS, SAMPLE_INTERVAL, CPU_BUDGET
+    
+    start = time.perf_counter()
+    psutil.cpu_percent(interval=1)
+    psutil.virtual_memory()
+    psutil.disk_usage('/')
+    blocking = time.perf_counter() - start
+    
+    sampler = SystemSampler()
+    psutil.cpu_percent(interval=None, percpu=True)
+    costs = []
+    for _ in range(200):
+        costs.append(sampler.sample())
+    costs.sort()
+    start = time.perf_counter()
+    for _ in range(1000):
+        sampler.current()
+    current_time = (time.perf_counter() - start) / 1000
+    mean_cost = sum(costs) / len(costs)
+    
+    print(f"status, blocking cpu_percent(interval=1)  {blocking * 1000:8.1f} ms")
+    print(f"status, from the sampler                  {current_time * 1e6:8.1f} us")
+    print(f"one sample: p50 {costs[len(costs) // 2] * 1e6:.0f} us  p95 {costs[int(len(costs) * 0.95)] * 1e6:.0f} us CPU; "
+          f"{mean_cost / SAMPLE_INTERVAL:.4%} of a core at the default {SAMPLE_INTERVAL:.0f} s interval "
+          f"(budget {CPU_BUDGET:.2%})")
+    
+    # Asked for more than the budget allows, the sampler backs off
+    sampler = SystemSampler(interval=0.01, history_seconds=60)
+    sampler.start()
+    time.sleep(3)
+    sampler.stop()
+    print(f"asked for 10 ms samples: settled at {sampler.interval * 1000:.0f} ms, {sampler.samples} samples, "
+          f"overhead {sampler.overhead():.3%} of a core")
+    
+    # Trend queries over full histories
+    for label, interval, history in [('1 hour at 2 s', 2.0, 3600), ('24 hours at 1 s', 1.0, 86400)]:
+        sampler = SystemSampler(interval=interval, history_seconds=history)
+        now = time.time()
+        rng = np.random.default_rng(0)
+        rows = rng.uniform(0, 100, (len(sampler.series.times), len(COLUMNS)))
+        for index, row in enumerate(rows):
+            sampler.series.append(now - (len(rows) - index) * interval, row)
+        start = time.perf_counter()
+        for _ in range(100):
+            summary = sampler.summary('cpu', 600)
+        ten_minutes = (time.perf_counter() - start) / 100
+        start = time.perf_counter()
+        for _ in range(100):
+            sampler.summary('network', history)
+        everything = (time.perf_counter() - start) / 100
+        memory = sampler.series.times.nbytes + sampler.series.values.nbytes + sampler.cores.times.nbytes + sampler.cores.values.nbytes
+        print(f"{label:16s} {len(rows):6d} samples, {memory / 1024:6.0f} KiB  "
+              f"last 10 minutes ({summary['samples']} samples) {ten_minutes * 1e6:6.0f} us  "
+              f"whole history {everything * 1e6:6.0f} us")
+
+
+def make_app_tree(root, path_dirs=25, per_path_dir=1600, desktop_dirs=100, per_desktop_dir=100):
+    """Synthetic PATH directories of executables and an applications tree of .desktop files"""
+    import os
+    
+    bins = []
+    for index in range(path_dirs):
+        directory = os.path.join(root, 'bin', f'bin{index}')
+        os.makedirs(directory)
+        bins.append(directory)
+        for item in range(per_path_dir):
+            path = os.path.join(directory, f'tool{index}_{item}')
+            with open(path, 'w') as f:
+                f.write('#!/bin/sh\n')
+            os.chmod(path, 0o755)
+    applications = os.path.join(root, 'applications')
+    for index in range(desktop_dirs):
+        directory = os.path.join(applications, f'vendor{index}')
+        os.makedirs(directory)
+        for item in range(per_desktop_dir):
+            with open(os.path.join(directory, f'app{index}_{item}.desktop'), 'w') as f:
+                f.write(f"[Desktop Entry]\nType=Application\nName=App {index} {item}\n"
+                        f"Exec=/opt/app{index}/run{item} %U\n")
+    return bins, [applications]
+
+
+def bench_app_index(args):
+    """Application index build, warm start, incremental rescan and lookup on a synthetic 50k-entry tree, vs trial-and-error spawns"""
+    import os
+    import subprocess
+    import tempfile
+    from app_index import AppIndex
+    
+    root = tempfile.mkdtemp()
+    start = time.perf_counter()
+    bins, applications = make_app_tree(root)
+    print(f"synthetic tree: 40000 executables in {len(bins)} PATH directories, 10000 .desktop files "
+          f"in 100 folders ({time.perf_counter() - start:.1f} s to create)")
+    cache = os.path.join(root, 'app_index.json')
+    
+    index = AppIndex(cache, path_dirs=bins, desktop_dirs=applications)
+    start = time.perf_counter()
+    rescanned, reused = index.refresh()
+    print(f"cold build            {(time.perf_counter() - start) * 1000:7.0f} ms  {rescanned} directories scanned, "
+          f"{len(index)} names, cache {os.path.getsize(cache) / 1024 / 1024:.1f} MiB")
+    
+    start = time.perf_counter()
+    index = AppIndex(cache, path_dirs=bins, desktop_dirs=applications)
+    rescanned, reused = index.refresh()
+    print(f"warm start, unchanged {(time.perf_counter() - start) * 1000:7.0f} ms  {rescanned} rescanned, {reused} reused")
+    
+    time.sleep(0.01)
+    new_tool = os.path.join(bins[3], 'freshly-installed')
+    with open(new_tool, 'w') as f:
+        f.write('#!/bin/sh\n')
+    os.chmod(new_tool, 0o755)
+    with open(os.path.join(applications[0], 'vendor7', 'new.desktop'), 'w') as f:
+        f.write("[Desktop Entry]\nType=Application\nName=New App\nExec=/opt/new/run\n")
+    start = time.perf_counter()
+    rescanned, reused = index.refresh()
+    print(f"after two installs    {(time.perf_counter() - start) * 1000:7.0f} ms  {rescanned} rescanned, {reused} reused; "
+          f"found: {index.resolve('freshly-installed') is not None and index.resolve('new app') is not None}")
+    
+    rng = random.Random(0)
+    names = [f"tool{rng.randrange(25)}_{rng.randrange(1600)}" for _ in range(5000)]
+    names += [f"app {rng.randrange(100)} {rng.randrange(100)}" for _ in range(5000)]
+    start = time.perf_counter()
+    hits = sum(index.resolve(name) is not None for name in names)
+    lookup = (time.perf_counter() - start) / len(names)
+    start = time.perf_counter()
+    for _ in range(1000):
+        index.resolve('no such app')
+    miss = (time.perf_counter() - start) / 1000
+    print(f"lookup                {lookup * 1e6:7.2f} us  ({hits}/{len(names)} found), miss {miss * 1e6:.2f} us")
+    
+    # What a miss cost before: three launch attempts in turn, the last through a shell
+    start = time.perf_counter()
+    for _ in range(10):
+        for command, shell in [('no-such-app', False), ('no-such-app.exe', False), ('start no-such-app', True)]:
+            try:
+                subprocess.Popen(command, shell=shell, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).wait()
+            except OSError:
+                pass
+    print(f"trial-and-error miss  {(time.perf_counter() - start) / 10 * 1000:7.2f} ms  (two failed spawns and a shell)")
+    
+    return check_windows_apps(os.path.join(root, 'windows'))
+
+
+def make_windows_tree(root):
+    """A stock-Windows-like layout: System32 on PATH, browsers and editors only in the Start menu"""
+    import os
+    
+    system32 = os.path.join(root, 'Windows', 'System32')
+    programs = os.path.join(root, 'Start Menu', 'Programs')
+    os.makedirs(system32)
+    os.makedirs(os.path.join(programs, 'Visual Studio Code'))
+    for name in ['notepad.exe', 'calc.exe', 'mspaint.exe', 'cmd.exe', 'explorer.exe']:
+        path = os.path.join(system32, name)
+        with open(path, 'wb') as f:
+            f.write(b'MZ')
+        os.chmod(path, 0o755)
+    for name in ['Google Chrome.lnk', 'Microsoft Edge.lnk', 'Spotify.lnk',
+                 os.path.join('Visual Studio Code', 'Visual Studio Code.lnk')]:
+        with open(os.path.join(programs, name), 'wb') as f:
+            f.write(b'L')
+    return [system32], [programs]
+
+
+def check_windows_apps(root):
+    """Common apps resolve on a Windows-like index, including browsers reachable only by shortcut"""
+    from app_index import AppIndex
+    from system_controller import SystemController
+    
+    path_dirs, desktop_dirs = make_windows_tree(root)
+    controller = SystemController()
+    controller.app_index = AppIndex(None, path_dirs=path_dirs, desktop_dirs=desktop_dirs)
+    controller.app_index.refresh()
+    expected = {'notepad': True, 'calculator': True, 'chrome': True, 'edge': True, 'vs code': True,
+                'spotify': True, 'word': False}
+    wrong = []
+    for app, installed in expected.items():
+        command = controller.resolve_application(app)
+        if (command is not None) != installed:
+            wrong.append(f"{app}: {command}")
+    print(f"windows-like index    {len(expected) - len(wrong)}/{len(expected)} common apps resolved as expected"
+          + (f"; wrong: {', '.join(wrong)}" if wrong else ""))
+    return 1 if wrong else 0
+
+
+BENCHMARKS = {
+    'intent-router': bench_intent_router,
+    'response-cache': bench_response_cache,
+    'semantic-cache': bench_semantic_cache,
+    'semantic-pairs': bench_semantic_pairs,
+    'context-window': bench_context_window,
+    'pipeline': bench_pipeline,
+    'conversation-store': bench_conversation_store,
+    'dictation': bench_dictation,
+    'resilience': bench_resilience,
+    'local-answerers': bench_local_answerers,
+    'warmup': bench_warmup,
+    'continuous-listener': bench_continuous_listener,
+    'wake-word': bench_wake_word,
+    'recognizers': bench_recognizers,
+    'tts': bench_tts,
+    'tts-cache': bench_tts_cache,
+    'noise-floor': bench_noise_floor,
+    'upload': bench_upload,
+    'speculative': bench_speculative,
+    'process-index': bench_process_index,
+    'system-sampler': bench_system_sampler,
+    'app-index': bench_app_index,
+}
+
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description="JARVIS benchmarks")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--size', type=int, default=100000, help="Corpus or index size")
+    parser.add_argument('--sizes', default='10000,100000,1000000', help="Comma-separated index sizes")
+    parser.add_argument('--dim', type=int, default=256, help="Embedding dimension")
+    parser.add_argument('--latency', type=float, default=0.01, help="Simulated backend latency in seconds")
+    parser.add_argument('--fixtures', help="Fixture directory: enroll/, positive/ and negative/ WAVs for wake-word, WAV + .txt pairs for recognizers and speculative")
+    args = parser.parse_args()
+    
+    print("=" * 50)
+    print(f"JARVIS Benchmark: {args.benchmark}")
+    print("=" * 50)
+    sys.exit(BENCHMARKS[args.benchmark](args))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,35 @@ class Config:
         self.voice_rate = 150
         self.voice_volume = 0.9
         self.wake_word = "jarvis"
+        self.response_cache_enabled = True
+        self.response_cache_ttl = 24 * 3600
+        self.semantic_cache_enabled = True
+        self.semantic_cache_threshold = 0.8
+        self.context_token_budget = 2000
+        self.context_max_turns = 10
+        self.prompt_bloat_threshold = 4000
+        self.max_concurrent_requests = 2
+        self.conversation_store_enabled = True
+        self.hedge_requests = False
+        self.request_retries = 2
+        self.local_answerers_enabled = True
+        self.connection_warmup_enabled = True
+        self.keepalive_interval = 45
+        self.wake_word_enabled = True
+        self.command_window_seconds = 5
+        self.recognizer_backends = ['google', 'sphinx']
+        self.recognizer_mode = 'race'
+        self.vosk_model_path = None
+        self.tts_cache_enabled = True
+        self.tts_cache_size_mb = 50
+        self.upload_preprocessing_enabled = True
+        self.speculative_execution_enabled = True
+        self.process_index_enabled = True
+        self.process_index_interval = 2.0
+        self.system_sampler_enabled = True
+        self.system_sampler_interval = 2.0
+        self.system_history_minutes = 60
+        self.app_index_enabled = True
         self.load_config()
     
     def load_config(self):
@@ -28,6 +57,35 @@ class Config:
                     self.voice_rate = config_data.get('voice_rate', 150)
                     self.voice_volume = config_data.get('voice_volume', 0.9)
                     self.wake_word = config_data.get('wake_word', 'jarvis')
+                    self.response_cache_enabled = config_data.get('response_cache_enabled', True)
+                    self.response_cache_ttl = config_data.get('response_cache_ttl', 24 * 3600)
+                    self.semantic_cache_enabled = config_data.get('semantic_cache_enabled', True)
+                    self.semantic_cache_threshold = config_data.get('semantic_cache_threshold', 0.8)
+                    self.context_token_budget = config_data.get('context_token_budget', 2000)
+                    self.context_max_turns = config_data.get('context_max_turns', 10)
+                    self.prompt_bloat_threshold = config_data.get('prompt_bloat_threshold', 4000)
+                    self.max_concurrent_requests = config_data.get('max_concurrent_requests', 2)
+                    self.conversation_store_enabled = config_data.get('conversation_store_enabled', True)
+                    self.hedge_requests = config_data.get('hedge_requests', False)
+                    self.request_retries = config_data.get('request_retries', 2)
+                    self.local_answerers_enabled = config_data.get('local_answerers_enabled', True)
+                    self.connection_warmup_enabled = config_data.get('connection_warmup_enabled', True)
+                    self.keepalive_interval = config_data.get('keepalive_interval', 45)
+                    self.wake_word_enabled = config_data.get('wake_word_enabled', True)
+                    self.command_window_seconds = config_data.get('command_window_seconds', 5)
+                    self.recognizer_backends = config_data.get('recognizer_backends', ['google', 'sphinx'])
+                    self.recognizer_mode = config_data.get('recognizer_mode', 'race')
+                    self.vosk_model_path = config_data.get('vosk_model_path')
+                    self.tts_cache_enabled = config_data.get('tts_cache_enabled', True)
+                    self.tts_cache_size_mb = config_data.get('tts_cache_size_mb', 50)
+                    self.upload_preprocessing_enabled = config_data.get('upload_preprocessing_enabled', True)
+                    self.speculative_execution_enabled = config_data.get('speculative_execution_enabled', True)
+                    self.process_index_enabled = config_data.get('process_index_enabled', True)
+                    self.process_index_interval = config_data.get('process_index_interval', 2.0)
+                    self.system_sampler_enabled = config_data.get('system_sampler_enabled', True)
+                    self.system_sampler_interval = config_data.get('system_sampler_interval', 2.0)
+                    self.system_history_minutes = config_data.get('system_history_minutes', 60)
+                    self.app_index_enabled = config_data.get('app_index_enabled', True)
             except Exception as e:
                 print(f"Error loading config: {e}")
     
@@ -39,7 +97,36 @@ class Config:
                 'voice_enabled': self.voice_enabled,
                 'voice_rate': self.voice_rate,
                 'voice_volume': self.voice_volume,
-                'wake_word': self.wake_word
+                'wake_word': self.wake_word,
+                'response_cache_enabled': self.response_cache_enabled,
+                'response_cache_ttl': self.response_cache_ttl,
+                'semantic_cache_enabled': self.semantic_cache_enabled,
+                'semantic_cache_threshold': self.semantic_cache_threshold,
+                'context_token_budget': self.context_token_budget,
+                'context_max_turns': self.context_max_turns,
+                'prompt_bloat_threshold': self.prompt_bloat_threshold,
+                'max_concurrent_requests': self.max_concurrent_requests,
+                'conversation_store_enabled': self.conversation_store_enabled,
+                'hedge_requests': self.hedge_requests,
+                'request_retries': self.request_retries,
+                'local_answerers_enabled': self.local_answerers_enabled,
+                'connection_warmup_enabled': self.connection_warmup_enabled,
+                'keepalive_interval': self.keepalive_interval,
+                'wake_word_enabled': self.wake_word_enabled,
+                'command_window_seconds': self.command_window_seconds,
+                'recognizer_backends': self.recognizer_backends,
+                'recognizer_mode': self.recognizer_mode,
+                'vosk_model_path': self.vosk_model_path,
+                'tts_cache_enabled': self.tts_cache_enabled,
+                'tts_cache_size_mb': self.tts_cache_size_mb,
+                'upload_preprocessing_enabled': self.upload_preprocessing_enabled,
+                'speculative_execution_enabled': self.speculative_execution_enabled,
+                'process_index_enabled': self.process_index_enabled,
+                'process_index_interval': self.process_index_interval,
+                'system_sampler_enabled': self.system_sampler_enabled,
+                'system_sampler_interval': self.system_sampler_interval,
+                'system_history_minutes': self.system_history_minutes,
+                'app_index_enabled': self.app_index_enabled
             }
             with open(self.CONFIG_FILE, 'w') as f:
                 json.dump(config_data, f, indent=4)
@@ -0,0 +1,97 @@
+"""
+Connection Warmer - Primes the Gemini connection and keeps it open while idle
+"""
+import threading
+import time
+
+from metrics import metrics
+
+# Cheapest request that still goes through DNS, TLS and the model endpoint
+WARMUP_PROMPT = "ping"
+
+# Ping the backend after this long without traffic
+KEEPALIVE_INTERVAL = 45.0
+
+# A connection unused for longer than this is assumed to have been closed
+CONNECTION_IDLE_TIMEOUT = 120.0
+
+# Stop pinging once nobody has used Jarvis for this long
+MAX_IDLE = 30 * 60.0
+
+
+class ConnectionWarmer:
+    """Warms the model's connection in the background and sends keep-alives while idle
+
+    The engine calls ``touch()`` after every real request; keep-alives are
+    only sent when nothing else has reached the backend recently.
+    """
+    
+    def __init__(self, model, keepalive_interval=KEEPALIVE_INTERVAL,
+                 idle_timeout=CONNECTION_IDLE_TIMEOUT, max_idle=MAX_IDLE):
+        self.model = model
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self.max_idle = max_idle
+        self.last_contact = None
+        self.last_activity = time.monotonic()
+        self.warmed = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def start(self):
+        """Warm up now and keep the connection alive, on a background thread"""
+        self._thread = threading.Thread(target=self._run, name="gemini-warmer")
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def warm(self):
+        """Send a cheap request to open the connection; True on success"""
+        started = time.perf_counter()
+        try:
+            self.model.count_tokens(WARMUP_PROMPT)
+        except Exception as e:
+            print(f"Gemini warm-up failed: {e}")
+            metrics.increment('gemini.warmup_failed')
+            return False
+        metrics.observe('gemini.warmup_time', time.perf_counter() - started)
+        with self._lock:
+            self.last_contact = time.monotonic()
+        return True
+    
+    def touch(self):
+        """Note a real request, which keeps the connection open by itself"""
+        now = time.monotonic()
+        with self._lock:
+            self.last_contact = now
+            self.last_activity = now
+    
+    def is_warm(self):
+        """Whether the connection is likely still open"""
+        with self._lock:
+            return self.last_contact is not None and time.monotonic() - self.last_contact < self.idle_timeout
+    
+    def _run(self):
+        self.warm()
+        self.warmed.set()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                due = self.keepalive_interval - (now - self.last_contact if self.last_contact else self.keepalive_interval)
+                idle = now - self.last_activity
+            if due > 0:
+                if self._stop.wait(due):
+                    return
+                continue
+            if idle > self.max_idle:
+                # Let the connection go; the next request pays for a cold start
+                if self._stop.wait(self.keepalive_interval):
+                    return
+                continue
+            if self.warm():
+                metrics.increment('gemini.keepalive')
+            elif self._stop.wait(self.keepalive_interval):
+                return
@@ -0,0 +1,406 @@
+"""
+Continuous Listener - Always-open audio capture with voice activity detection
+"""
+import queue
+import threading
+import time
+import wave
+
+import numpy as np
+
+from audio_processing import FRAME_MS, frame_energy, frame_zero_crossings
+from metrics import metrics
+from startup import profiler
+
+SAMPLE_RATE = 16000
+
+# Capture block: several VAD frames per read keeps Python overhead low
+BLOCK_MS = FRAME_MS * 4
+
+# Audio history kept in the ring buffer
+RING_SECONDS = 30
+
+# Segmentation: speech needed to start an utterance, audio kept from just
+# before it, silence that ends it, and the longest utterance
+ONSET_MS = 90
+PRE_ROLL_MS = 300
+END_SILENCE_MS = 600
+MAX_UTTERANCE_SECONDS = 15
+
+# Finished utterances waiting for recognition before new ones are dropped
+MAX_PENDING_UTTERANCES = 4
+
+
+class MicrophoneSource:
+    """Microphone opened once as a PyAudio input stream"""
+    
+    def __init__(self, sample_rate=SAMPLE_RATE, block_ms=BLOCK_MS, device_index=None):
+        self.sample_rate = sample_rate
+        self.block_size = int(sample_rate * block_ms / 1000)
+        self.device_index = device_index
+        self.dropped_frames = 0
+        self.audio = None
+        self.stream = None
+    
+    def open(self):
+        pyaudio = profiler.import_module('pyaudio')
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.block_size,
+            input_device_index=self.device_index
+        )
+    
+    def read(self):
+        """Next block of int16 samples"""
+        try:
+            data = self.stream.read(self.block_size, exception_on_overflow=True)
+        except IOError:
+            # The device buffer overflowed and its audio is lost; keep the timeline
+            self.dropped_frames += self.block_size
+            return np.zeros(self.block_size, dtype=np.int16)
+        return np.frombuffer(data, dtype=np.int16)
+    
+    def close(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.audio:
+            self.audio.terminate()
+            self.audio = None
+
+
+class WavFileSource:
+    """16-bit WAV file read like a microphone, for tests and benchmarks
+
+    With realtime=True blocks arrive at the file's sample rate, and a reader
+    that falls more than max_lag_ms behind loses audio like an overflowing
+    device would.
+    """
+    
+    def __init__(self, path, block_ms=BLOCK_MS, realtime=True, max_lag_ms=2000):
+        self.path = path
+        self.block_ms = block_ms
+        self.realtime = realtime
+        self.max_lag_ms = max_lag_ms
+        self.dropped_frames = 0
+        self.sample_rate = None
+        self.block_size = None
+        self.wav = None
+    
+    def open(self):
+        self.wav = wave.open(self.path, 'rb')
+        if self.wav.getsampwidth() != 2:
+            raise ValueError(f"{self.path}: only 16-bit WAV files are supported")
+        self.sample_rate = self.wav.getframerate()
+        self.channels = self.wav.getnchannels()
+        self.block_size = int(self.sample_rate * self.block_ms / 1000)
+        self.position = 0
+        self.started = time.perf_counter()
+    
+    def read(self):
+        """Next block of int16 samples, or None at the end of the file"""
+        if self.realtime:
+            lag = time.perf_counter() - (self.started + self.position / self.sample_rate)
+            if lag < 0:
+                time.sleep(-lag)
+            elif lag * 1000 > self.max_lag_ms:
+                skipped = len(self.wav.readframes(int(lag * self.sample_rate)))
+                skipped //= 2 * self.channels
+                self.dropped_frames += skipped
+                self.position += skipped
+        
+        data = self.wav.readframes(self.block_size)
+        if not data:
+            return None
+        samples = np.frombuffer(data, dtype=np.int16)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1).astype(np.int16)
+        self.position += len(samples)
+        return samples
+    
+    def close(self):
+        if self.wav:
+            self.wav.close()
+            self.wav = None
+
+
+class RingBuffer:
+    """Preallocated int16 sample history addressed by absolute sample position"""
+    
+    def __init__(self, capacity):
+        self.buffer = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.written = 0
+    
+    def write(self, samples):
+        if len(samples) > self.capacity:
+            self.written += len(samples) - self.capacity
+            samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        end = start + len(samples)
+        if end <= self.capacity:
+            self.buffer[start:end] = samples
+        else:
+            split = self.capacity - start
+            self.buffer[start:] = samples[:split]
+            self.buffer[:end - self.capacity] = samples[split:]
+        self.written += len(samples)
+    
+    def read(self, start, end):
+        """Samples [start, end); audio that was already overwritten is cut off"""
+        start = max(start, self.written - self.capacity, 0)
+        end = min(end, self.written)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return self.buffer[first:last].copy()
+        return np.concatenate((self.buffer[first:], self.buffer[:last - self.capacity]))
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing speech detector with an adaptive noise floor
+
+    Given a NoiseFloorTracker, the floor starts from its estimate instead of
+    the first block, and every non-speech frame is fed back into it.
+    """
+    
+    def __init__(self, sample_rate, frame_ms=FRAME_MS, ratio=3.0, min_energy=1e-3, max_zcr=0.35,
+                 rise_rate=0.05, fall_rate=0.5, stuck_frames=300, tracker=None):
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.ratio = ratio
+        self.min_energy = min_energy
+        self.max_zcr = max_zcr
+        self.rise_rate = rise_rate
+        self.fall_rate = fall_rate
+        self.stuck_frames = stuck_frames
+        self.tracker = tracker
+        self.noise_floor = tracker.noise_floor if tracker else None
+        self.frames_since_quiet = 0
+    
+    def process(self, samples):
+        """Speech flag for every whole frame of float samples"""
+        energy = frame_energy(samples, self.frame_length)
+        if len(energy) == 0:
+            return np.zeros(0, dtype=bool)
+        zcr = frame_zero_crossings(samples, self.frame_length)
+        if self.noise_floor is None:
+            self.noise_floor = max(float(np.min(energy)), self.min_energy / self.ratio)
+        
+        threshold = max(self.noise_floor * self.ratio, self.min_energy)
+        loud = energy > threshold
+        # Hiss and fans cross zero constantly; voiced speech does not unless it is loud
+        speech = loud & ((zcr < self.max_zcr) | (energy > threshold * 3))
+        
+        quiet = energy[~speech]
+        if len(quiet):
+            self.frames_since_quiet = 0
+            self._adapt(float(np.mean(quiet)))
+            if self.tracker:
+                self.tracker.update_energy(quiet)
+        else:
+            self.frames_since_quiet += len(energy)
+            if self.frames_since_quiet > self.stuck_frames:
+                # Everything looks like speech for too long: the room got louder
+                self._adapt(float(np.min(energy)))
+        return speech
+    
+    def _adapt(self, level):
+        # Follow the floor down quickly and up slowly so speech does not raise it
+        rate = self.fall_rate if level < self.noise_floor else self.rise_rate
+        self.noise_floor += rate * (level - self.noise_floor)
+
+
+class Utterance:
+    """A segment of speech cut from the audio stream"""
+    
+    def __init__(self, samples, sample_rate, speech_ended_at):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.speech_ended_at = speech_ended_at
+    
+    @property
+    def pcm(self):
+        return self.samples.tobytes()
+    
+    @property
+    def duration(self):
+        return len(self.samples) / float(self.sample_rate)
+
+
+class ContinuousListener:
+    """Captures audio continuously, segments it into utterances and recognizes them on a worker
+
+    ``recognize(utterance)`` returns text or None; ``on_text(text)`` is
+    called on the recognition worker for every transcript. An optional
+    ``gate(utterance)`` decides which utterances are worth recognizing, and
+    an optional NoiseFloorTracker seeds the VAD and learns from idle audio.
+    """
+    
+    def __init__(self, source, recognize, on_text=None, ring_seconds=RING_SECONDS,
+                 max_pending=MAX_PENDING_UTTERANCES, end_silence_ms=END_SILENCE_MS, gate=None, noise_floor=None):
+        self.source = source
+        self.recognize = recognize
+        self.on_text = on_text
+        self.gate = gate
+        self.noise_floor = noise_floor
+        self.ring_seconds = ring_seconds
+        self.end_silence_ms = end_silence_ms
+        self.utterances = queue.Queue(maxsize=max_pending)
+        self.running = False
+        self.paused = threading.Event()
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        
+        self.frames_read = 0
+        self.utterance_count = 0
+        self.gated_utterances = 0
+        self.dropped_utterances = 0
+        self.cpu_seconds = 0.0
+    
+    def start(self):
+        """Open the audio source and start capturing and recognizing"""
+        self.source.open()
+        sample_rate = self.source.sample_rate
+        self.ring = RingBuffer(int(self.ring_seconds * sample_rate))
+        self.vad = VoiceActivityDetector(sample_rate, tracker=self.noise_floor)
+        self.running = True
+        self._stop.clear()
+        self.finished.clear()
+        self._threads = [
+            threading.Thread(target=self._capture, name="listener-capture"),
+            threading.Thread(target=self._recognize_worker, name="listener-recognize"),
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+    
+    def stop(self, timeout=None):
+        """Stop capturing; the utterance in progress is recognized first"""
+        self._stop.set()
+        self.finished.wait(timeout)
+    
+    def pause(self):
+        """Keep the stream open but ignore what it hears"""
+        self.paused.set()
+    
+    def resume(self):
+        self.paused.clear()
+    
+    def wait(self, timeout=None):
+        """Wait until the source ends or the listener is stopped and every utterance is recognized"""
+        return self.finished.wait(timeout)
+    
+    def stats(self):
+        """Capture and recognition counters"""
+        sample_rate = self.source.sample_rate or SAMPLE_RATE
+        return {
+            'audio_seconds': self.frames_read / float(sample_rate),
+            'cpu_seconds': self.cpu_seconds,
+            'dropped_frames': self.source.dropped_frames,
+            'utterances': self.utterance_count,
+            'gated_utterances': self.gated_utterances,
+            'dropped_utterances': self.dropped_utterances,
+            'noise_floor': self.vad.noise_floor,
+        }
+    
+    def _capture(self):
+        frame_length = self.vad.frame_length
+        sample_rate = self.source.sample_rate
+        onset_frames = max(1, ONSET_MS // FRAME_MS)
+        end_frames = max(1, self.end_silence_ms // FRAME_MS)
+        pre_roll = int(PRE_ROLL_MS * sample_rate / 1000)
+        max_samples = int(MAX_UTTERANCE_SECONDS * sample_rate)
+        pending = np.zeros(0, dtype=np.int16)
+        speech_run = silence_run = 0
+        utterance_start = None
+        speech_ended_at = None
+        cpu_started = time.thread_time()
+        
+        try:
+            while not self._stop.is_set():
+                block = self.source.read()
+                if block is None:
+                    break
+                captured_at = time.perf_counter()
+                self.ring.write(block)
+                self.frames_read += len(block)
+                if self.paused.is_set():
+                    pending = pending[:0]
+                    speech_run = silence_run = 0
+                    utterance_start = None
+                    continue
+                
+                # Whole frames only; the remainder waits for the next block
+                pending = np.concatenate((pending, block))
+                usable = len(pending) - len(pending) % frame_length
+                flags = self.vad.process(pending[:usable].astype(np.float32) / 32768.0)
+                first_frame_at = self.ring.written - len(pending)
+                pending = pending[usable:]
+                
+                for index, is_speech in enumerate(flags):
+                    frame_end = first_frame_at + (index + 1) * frame_length
+                    if utterance_start is None:
+                        speech_run = speech_run + 1 if is_speech else 0
+                        if speech_run >= onset_frames:
+                            utterance_start = frame_end - speech_run * frame_length - pre_roll
+                            speech_ended_at = captured_at
+                            silence_run = 0
+                        continue
+                    if is_speech:
+                        silence_run = 0
+                        speech_ended_at = captured_at
+                    else:
+                        silence_run += 1
+                    if silence_run >= end_frames or frame_end - utterance_start >= max_samples:
+                        self._finish_utterance(utterance_start, frame_end, speech_ended_at)
+                        utterance_start = None
+                        speech_run = silence_run = 0
+            
+            if utterance_start is not None:
+                self._finish_utterance(utterance_start, self.ring.written, speech_ended_at)
+        except Exception as e:
+            print(f"Continuous listening error: {e}")
+        finally:
+            self.cpu_seconds = time.thread_time() - cpu_started
+            self.source.close()
+            self.running = False
+            # Tell the recognition worker to finish; blocks until it has room
+            self.utterances.put(None)
+    
+    def _finish_utterance(self, start, end, speech_ended_at):
+        """Cut an utterance from the ring buffer and queue it for recognition"""
+        utterance = Utterance(self.ring.read(start, end), self.source.sample_rate, speech_ended_at)
+        if self.gate and not self.gate(utterance):
+            self.gated_utterances += 1
+            return
+        try:
+            self.utterances.put_nowait(utterance)
+            self.utterance_count += 1
+        except queue.Full:
+            # Recognition is falling behind; drop rather than stall the capture
+            self.dropped_utterances += 1
+            metrics.increment('listener.dropped_utterances')
+    
+    def _recognize_worker(self):
+        while True:
+            utterance = self.utterances.get()
+            if utterance is None:
+                break
+            try:
+                text = self.recognize(utterance)
+            except Exception as e:
+                print(f"Recognition error: {e}")
+                continue
+            metrics.observe('listener.transcript_latency', time.perf_counter() - utterance.speech_ended_at)
+            if text and self.on_text:
+                self.on_text(text)
+        self.finished.set()
@@ -0,0 +1,121 @@
+"""
+Conversation Context - Token-budgeted rolling context window for the Gemini chat
+"""
+import threading
+from collections import deque
+
+from metrics import metrics
+from utils import estimate_tokens
+
+SUMMARY_PROMPT = (
+    "Summarize this conversation between a user and Jarvis in at most {words} words. "
+    "Keep names, facts, preferences and unanswered questions.\n\n"
+    "Summary so far:\n{summary}\n\n"
+    "New turns:\n{turns}"
+)
+
+
+class ConversationContext:
+    """Recent turns kept verbatim under a token budget plus a running summary
+
+    Turns pushed out of the window are folded into the summary on a
+    background thread. Until that finishes they stay in the history, so no
+    context is lost while the summarizer runs.
+    """
+    
+    def __init__(self, summarizer=None, token_budget=2000, max_turns=10, min_turns=2, summary_budget=300):
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.min_turns = min_turns
+        self.summary_budget = summary_budget
+        self.summary = ''
+        self.turns = deque()
+        self.pending = []
+        self.verbatim_tokens = 0
+        self.summary_thread = None
+        self._lock = threading.Lock()
+    
+    def add_turn(self, user, response):
+        """Record a completed exchange"""
+        tokens = estimate_tokens(user) + estimate_tokens(response)
+        with self._lock:
+            self.turns.append((user, response, tokens))
+            self.verbatim_tokens += tokens
+            while len(self.turns) > self.min_turns and (
+                len(self.turns) > self.max_turns or self.verbatim_tokens > self.token_budget
+            ):
+                old_turn = self.turns.popleft()
+                self.verbatim_tokens -= old_turn[2]
+                self.pending.append(old_turn)
+            start_summary = self.pending and not (self.summary_thread and self.summary_thread.is_alive())
+            if start_summary:
+                self.summary_thread = threading.Thread(target=self._fold_pending)
+                self.summary_thread.daemon = True
+                self.summary_thread.start()
+    
+    def _fold_pending(self):
+        """Fold pending turns into the running summary until none are left"""
+        while True:
+            with self._lock:
+                batch = list(self.pending)
+                summary = self.summary
+            if not batch:
+                return
+            
+            turns_text = '\n'.join(f"User: {user}\nJarvis: {response}" for user, response, _ in batch)
+            new_summary = None
+            if self.summarizer:
+                try:
+                    new_summary = self.summarizer(SUMMARY_PROMPT.format(
+                        words=int(self.summary_budget * 0.75), summary=summary or '(none)', turns=turns_text
+                    ))
+                except Exception as e:
+                    print(f"Summary error: {e}")
+            if not new_summary:
+                new_summary = f"{summary}\n{turns_text}".strip()
+            new_summary = self._truncate(new_summary)
+            
+            with self._lock:
+                if self.pending[:len(batch)] != batch:
+                    # Context was cleared while summarizing
+                    return
+                del self.pending[:len(batch)]
+                self.summary = new_summary
+            metrics.increment('context.summaries')
+    
+    def _truncate(self, text):
+        """Keep the most recent part of text within the summary budget"""
+        max_chars = self.summary_budget * 4
+        if len(text) <= max_chars:
+            return text
+        return text[-max_chars:].split(' ', 1)[-1]
+    
+    def build_history(self):
+        """Chat history in Gemini format: summary, unsummarized turns, recent turns"""
+        with self._lock:
+            summary = self.summary
+            turns = self.pending + list(self.turns)
+        
+        history = []
+        if summary:
+            history.append({'role': 'user', 'parts': [f"Summary of our conversation so far:\n{summary}"]})
+            history.append({'role': 'model', 'parts': ["Understood."]})
+        for user, response, _ in turns:
+            history.append({'role': 'user', 'parts': [user]})
+            history.append({'role': 'model', 'parts': [response]})
+        return history
+    
+    def history_tokens(self):
+        """Estimated tokens the history adds to every request"""
+        with self._lock:
+            pending_tokens = sum(turn[2] for turn in self.pending)
+            return estimate_tokens(self.summary) + pending_tokens + self.verbatim_tokens
+    
+    def clear(self):
+        """Forget everything"""
+        with self._lock:
+            self.summary = ''
+            self.turns.clear()
+            self.pending = []
+            self.verbatim_tokens = 0
@@ -0,0 +1,302 @@
+"""
+Conversation Store - Durable, searchable history of every exchange
+"""
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from metrics import metrics
+
+STORE_FILE = "jarvis_history.db"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Words too common to narrow a search
+STOPWORDS = {'a', 'an', 'the', 'my', 'your', 'some', 'of', 'and', 'or', 'to', 'for', 'in', 'on'}
+
+# The journal is rewritten without committed turns once it grows past this
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# Waits between attempts to commit a batch that failed
+RETRY_BACKOFF = 0.5
+MAX_RETRY_BACKOFF = 30.0
+
+PERIOD_PATTERN = re.compile(r"(?:in\s+the\s+)?(?:last|past)\s+(\d+)\s+days?")
+
+
+def time_range(period, now=None):
+    """(since, until) timestamps for phrases like 'yesterday' or 'last week'"""
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week = today - timedelta(days=today.weekday())
+    month = today.replace(day=1)
+    period = ' '.join((period or '').lower().split())
+    
+    if period == 'today':
+        since, until = today, now
+    elif period == 'yesterday':
+        since, until = today - timedelta(days=1), today
+    elif period == 'this week':
+        since, until = week, now
+    elif period == 'last week':
+        since, until = week - timedelta(days=7), week
+    elif period == 'this month':
+        since, until = month, now
+    elif period == 'last month':
+        since, until = (month - timedelta(days=1)).replace(day=1), month
+    elif PERIOD_PATTERN.fullmatch(period):
+        since, until = today - timedelta(days=int(PERIOD_PATTERN.fullmatch(period).group(1))), now
+    else:
+        return None, None
+    return since.timestamp(), until.timestamp()
+
+
+def fts_query(text):
+    """Quote each word so user text is never parsed as FTS syntax"""
+    words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+    return ' '.join(f'"{word}"' for word in words)
+
+
+class ConversationStore:
+    """Append-only SQLite (WAL) store with full-text search over turns
+
+    Appends go to a JSON-lines journal and a queue; a writer thread commits
+    them to SQLite in batches. Turn ids are assigned in order, so the
+    largest committed id is the high-water mark: after a crash only journal
+    entries above it are replayed. A batch that fails to commit is retried
+    with backoff, and the journal is cut back to the uncommitted turns
+    whenever it is caught up or has grown past JOURNAL_COMPACT_BYTES.
+    """
+    
+    def __init__(self, path=STORE_FILE, journal_path=None, batch_size=500, flush_interval=0.5):
+        self.path = path
+        self.journal_path = journal_path or f"{path}.journal"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "id INTEGER PRIMARY KEY, timestamp REAL NOT NULL, user TEXT NOT NULL, response TEXT NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS turns_timestamp ON turns (timestamp)")
+        self.connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5("
+            "user, response, content='turns', content_rowid='id')"
+        )
+        self.connection.commit()
+        self._read_lock = threading.Lock()
+        
+        self.flushed_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM turns").fetchone()[0]
+        self._recover()
+        self.last_id = self.flushed_id
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        self.unflushed = deque()
+        
+        self.pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._running = True
+        self.writer = threading.Thread(target=self._writer)
+        self.writer.daemon = True
+        self.writer.start()
+    
+    def _recover(self):
+        """Commit journal entries above the high-water mark"""
+        if not os.path.exists(self.journal_path):
+            return
+        
+        rows = []
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    turn = json.loads(line)
+                except ValueError:
+                    # Torn write at the moment of the crash
+                    continue
+                if turn['id'] > self.flushed_id:
+                    rows.append((turn['id'], turn['timestamp'], turn['user'], turn['response']))
+        if rows:
+            self._commit(rows)
+            self.flushed_id = max(row[0] for row in rows)
+            metrics.increment('conversation_store.recovered', len(rows))
+        open(self.journal_path, 'w').close()
+    
+    def append(self, user, response, timestamp=None):
+        """Record an exchange and return its id; the write happens in the background"""
+        with self._lock:
+            self.last_id += 1
+            turn = {
+                'id': self.last_id,
+                'timestamp': timestamp or time.time(),
+                'user': user,
+                'response': response or '',
+            }
+            line = json.dumps(turn) + '\n'
+            self.journal.write(line)
+            self.journal.flush()
+            self.unflushed.append((turn['id'], line))
+            self.pending.put(turn)
+        return turn['id']
+    
+    def _writer(self):
+        """Commit queued turns in batches, retrying a failed batch until it commits"""
+        batch = []
+        backoff = RETRY_BACKOFF
+        while self._running or batch or not self.pending.empty():
+            if not batch:
+                try:
+                    batch = [self.pending.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.pending.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            
+            try:
+                self._commit([(t['id'], t['timestamp'], t['user'], t['response']) for t in batch])
+            except Exception as e:
+                print(f"Conversation store error: {e}")
+                metrics.increment('conversation_store.commit_failed')
+                if not self._running:
+                    # Closing: the journal still holds them for the next start
+                    break
+                time.sleep(backoff)
+                backoff = min(MAX_RETRY_BACKOFF, backoff * 2)
+                continue
+            metrics.observe('conversation_store.batch_size', len(batch))
+            
+            with self._lock:
+                self.flushed_id = max(self.flushed_id, batch[-1]['id'])
+                self._compact_journal()
+                self._flushed.notify_all()
+            batch = []
+            backoff = RETRY_BACKOFF
+    
+    def _compact_journal(self):
+        """Drop committed turns from the journal; called with the lock held"""
+        while self.unflushed and self.unflushed[0][0] <= self.flushed_id:
+            self.unflushed.popleft()
+        if not self.unflushed:
+            # Everything is in SQLite; start the journal afresh
+            self.journal.seek(0)
+            self.journal.truncate()
+        elif self.journal.tell() > JOURNAL_COMPACT_BYTES:
+            # Rewrite beside the journal and swap, so a crash leaves one or the other whole
+            temporary = f"{self.journal_path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as f:
+                f.writelines(line for _, line in self.unflushed)
+            self.journal.close()
+            os.replace(temporary, self.journal_path)
+            self.journal = open(self.journal_path, 'a', encoding='utf-8')
+            metrics.increment('conversation_store.journal_compacted')
+    
+    def _commit(self, rows):
+        with self._read_lock:
+            with self.connection:
+                self.connection.executemany("INSERT OR IGNORE INTO turns VALUES (?, ?, ?, ?)", rows)
+                self.connection.executemany(
+                    "INSERT INTO turns_fts (rowid, user, response) VALUES (?, ?, ?)",
+                    [(row[0], row[2], row[3]) for row in rows]
+                )
+    
+    def flush(self, timeout=None):
+        """Wait until every appended turn is committed"""
+        with self._lock:
+            return self._flushed.wait_for(lambda: self.flushed_id >= self.last_id, timeout)
+    
+    def _id_range(self, since, until):
+        """Turn ids covering a time range, using the timestamp index"""
+        low, high = 0, self.flushed_id
+        with self._read_lock:
+            if since is not None:
+                row = self.connection.execute(
+                    "SELECT id FROM turns WHERE timestamp >= ? ORDER BY timestamp LIMIT 1", (since,)
+                ).fetchone()
+                low = row[0] if row else high + 1
+            if until is not None:
+                row = self.connection.execute(
+                    "SELECT id FROM turns WHERE timestamp < ? ORDER BY timestamp DESC LIMIT 1", (until,)
+                ).fetchone()
+                high = row[0] if row else -1
+        return low, high
+    
+    def search(self, text, since=None, until=None, limit=10):
+        """Most recent turns mentioning text, optionally within a time range"""
+        query = fts_query(text)
+        if not query:
+            return []
+        
+        started = time.perf_counter()
+        low, high = self._id_range(since, until)
+        with self._read_lock:
+            rows = self.connection.execute(
+                "SELECT t.id, t.timestamp, t.user, t.response FROM turns t JOIN ("
+                "SELECT rowid FROM turns_fts WHERE turns_fts MATCH ? AND rowid BETWEEN ? AND ? "
+                "ORDER BY rowid DESC LIMIT ?) f ON t.id = f.rowid ORDER BY t.id DESC",
+                (query, low, high, limit)
+            ).fetchall()
+        metrics.observe('conversation_store.search_time', time.perf_counter() - started)
+        return [self._turn(row) for row in rows]
+    
+    def count_matches(self, text, since=None, until=None):
+        """Number of turns mentioning text within a time range"""
+        query = fts_query(text)
+        if not query:
+            return 0
+        
+        low, high = self._id_range(since, until)
+        with self._read_lock:
+            return self.connection.execute(
+                "SELECT COUNT(*) FROM turns_fts WHERE turns_fts MATCH ? AND rowid BETWEEN ? AND ?",
+                (query, low, high)
+            ).fetchone()[0]
+    
+    def between(self, since, until, limit=100):
+        """Turns in a time range, oldest first"""
+        with self._read_lock:
+            rows = self.connection.execute(
+                "SELECT id, timestamp, user, response FROM turns "
+                "WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp LIMIT ?",
+                (since, until, limit)
+            ).fetchall()
+        return [self._turn(row) for row in rows]
+    
+    def recent(self, limit=10):
+        """The latest turns, newest first"""
+        with self._read_lock:
+            rows = self.connection.execute(
+                "SELECT id, timestamp, user, response FROM turns ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._turn(row) for row in rows]
+    
+    def count(self):
+        """Number of committed turns"""
+        with self._read_lock:
+            return self.connection.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+    
+    def _turn(self, row):
+        return {
+            'id': row[0],
+            'timestamp': datetime.fromtimestamp(row[1]),
+            'user': row[2],
+            'response': row[3],
+        }
+    
+    def close(self):
+        """Commit outstanding turns and close the store"""
+        self._running = False
+        self.writer.join()
+        with self._lock:
+            self.journal.close()
+        self.connection.close()
@@ -0,0 +1,126 @@
+"""
+Fake Gemini - Offline stand-in for google.generativeai models
+Used by benchmarks and tests to exercise JarvisEngine without network access
+"""
+import random
+import threading
+import time
+
+from utils import estimate_tokens
+
+
+class ServiceUnavailable(Exception):
+    """Transient backend error, named like google.api_core's 503 exception"""
+
+
+def latency_distribution(median, sigma=0.5, tail_probability=0.0, tail_factor=20.0, seed=0):
+    """Sampler of log-normal latencies with an optional heavy tail of stalls"""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    
+    def sample():
+        with lock:
+            latency = rng.lognormvariate(0.0, sigma) * median
+            if rng.random() < tail_probability:
+                latency *= tail_factor
+        return latency
+    return sample
+
+
+class FakeResponse:
+    """Response object with the parts of the Gemini API that Jarvis uses"""
+    
+    def __init__(self, text, chunk_size=4, chunk_delay=0.0):
+        self.text = text
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+    
+    def __iter__(self):
+        words = self.text.split(' ')
+        for start in range(0, len(words), self.chunk_size):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            chunk = ' '.join(words[start:start + self.chunk_size])
+            if start + self.chunk_size < len(words):
+                chunk += ' '
+            yield FakeResponse(chunk)
+
+
+class FakeTokenCount:
+    """Result of count_tokens"""
+    
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+
+class FakeChatSession:
+    """Chat session that keeps history like genai.ChatSession"""
+    
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+    
+    def send_message(self, content, stream=False):
+        response = self.model.generate_content(self.history + [{'role': 'user', 'parts': [content]}], stream=stream)
+        self.history.append({'role': 'user', 'parts': [content]})
+        self.history.append({'role': 'model', 'parts': [response.text]})
+        return response
+
+
+class FakeGenerativeModel:
+    """Model that answers locally after a configurable delay"""
+    
+    def __init__(self, responder=None, latency=0.0, chunk_delay=0.0, token_latency=0.0, model_name='fake-gemini',
+                 latency_sampler=None, error_rate=0.0, seed=0, connect_latency=0.0, idle_timeout=60.0):
+        self.responder = responder or (lambda prompt: f"Answer to: {prompt}")
+        self.latency = latency
+        self.latency_sampler = latency_sampler
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.token_latency = token_latency
+        self.chunk_delay = chunk_delay
+        self.model_name = model_name
+        self.connect_latency = connect_latency
+        self.idle_timeout = idle_timeout
+        self.last_contact = None
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def _connection_delay(self):
+        """Setup cost paid when no connection is open, or it was dropped for idleness"""
+        with self._lock:
+            now = time.monotonic()
+            cold = self.last_contact is None or now - self.last_contact > self.idle_timeout
+            self.last_contact = now
+        return self.connect_latency if cold else 0.0
+    
+    def count_tokens(self, contents):
+        delay = self._connection_delay()
+        if delay:
+            time.sleep(delay)
+        return FakeTokenCount(estimate_tokens(str(contents)))
+    
+    def start_chat(self, history=None):
+        return FakeChatSession(self, history)
+    
+    def generate_content(self, contents, stream=False):
+        with self._lock:
+            self.calls += 1
+        prompt = contents
+        if isinstance(contents, list):
+            prompt = contents[-1]['parts'][0]
+            text = ' '.join(part for content in contents for part in content['parts'])
+        else:
+            text = contents
+        delay = self._connection_delay() + self.latency + self.token_latency * estimate_tokens(text)
+        if self.latency_sampler:
+            delay += self.latency_sampler()
+        with self._lock:
+            failed = self.rng.random() < self.error_rate
+        if failed:
+            # Errors come back after a fraction of the usual latency
+            time.sleep(delay * 0.2)
+            raise ServiceUnavailable("503 The service is currently unavailable")
+        if delay:
+            time.sleep(delay)
+        return FakeResponse(self.responder(prompt), chunk_delay=self.chunk_delay if stream else 0.0)
@@ -3,11 +3,23 @@ GUI Interface for Jarvis - Modern animated interface
 """
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QTextEdit, QLineEdit, QLabel, QFrame)
-from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal, QThread, QRect, QPoint
-from PyQt5.QtGui import QFont, QPalette, QColor, QPainter, QLinearGradient, QBrush, QPen
+from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal, QThread, QObject, QRect, QPoint
+from PyQt5.QtGui import QFont, QPalette, QColor, QPainter, QLinearGradient, QBrush, QPen, QTextCursor, QTextCharFormat
+from request_pipeline import RequestPipeline, Request
+from startup import Component
 import math
 import random
 
+# Streamed text is painted into the chat view at most this often
+STREAM_RENDER_INTERVAL_MS = 33
+
+# How often background startup progress is shown while components load
+STARTUP_POLL_INTERVAL_MS = 100
+
+# Spoken often enough to be worth keeping rendered
+NOT_HEARD_MESSAGE = "I didn't catch that. Please try again."
+CHAT_CLEARED_MESSAGE = "Chat cleared. How can I help you?"
+
 class VoiceVisualizerWidget(QWidget):
     """Animated voice visualizer widget"""
     
@@ -110,33 +122,82 @@ class ListeningThread(QThread):
     """Thread for voice listening"""
     result = pyqtSignal(str)
     
-    def __init__(self, voice_handler):
+    def __init__(self, voice_handler, dictation=False, on_partial=None):
         super().__init__()
         self.voice_handler = voice_handler
+        self.dictation = dictation
+        self.on_partial = on_partial
     
     def run(self):
-        success, text = self.voice_handler.listen(timeout=5, phrase_time_limit=10)
+        if self.dictation:
+            success, text = self.voice_handler.listen_dictation(timeout=5)
+        else:
+            # Partial transcripts go to the engine from this thread, so
+            # commands are prepared while the user is still speaking
+            success, text = self.voice_handler.listen(timeout=5, phrase_time_limit=10, on_partial=self.on_partial)
         if success:
             self.result.emit(text)
         else:
             self.result.emit("")
 
 
+class EngineBridge(QObject):
+    """Carries request pipeline callbacks from worker threads to the GUI thread"""
+    status_changed = pyqtSignal(int, str)
+    chunk_received = pyqtSignal(int, str)
+    notification_received = pyqtSignal(str)
+    
+    def emit_status(self, request):
+        self.status_changed.emit(request.id, request.status)
+    
+    def emit_chunk(self, request, text):
+        self.chunk_received.emit(request.id, text)
+
+
 class JarvisGUI(QMainWindow):
     """Main GUI window for Jarvis"""
     
-    def __init__(self, jarvis_engine, voice_handler):
+    def __init__(self, jarvis_engine, voice_handler, startup=None):
         super().__init__()
         self.jarvis_engine = jarvis_engine
         self.voice_handler = voice_handler
+        self.startup = startup
         self.listening_thread = None
+        self.current_request = None
+        self.stream_buffer = []
+        
+        # Requests run on pipeline workers; results come back as signals
+        self.bridge = EngineBridge()
+        self.bridge.status_changed.connect(self.request_status_changed)
+        self.bridge.chunk_received.connect(self.buffer_chunk)
+        self.bridge.notification_received.connect(self.show_notification)
+        jarvis_engine.notification_callback = self.bridge.notification_received.emit
+        self.pipeline = RequestPipeline(
+            jarvis_engine,
+            on_status=self.bridge.emit_status,
+            on_chunk=self.bridge.emit_chunk,
+            on_sentence=self.speak_sentence
+        )
         
         self.init_ui()
         
+        # Batch streamed chunks into frame-rate-limited repaints
+        self.render_timer = QTimer(self)
+        self.render_timer.timeout.connect(self.flush_stream_buffer)
+        self.render_timer.start(STREAM_RENDER_INTERVAL_MS)
+        
+        # Show progress of components still initializing in the background
+        if self.startup:
+            self.startup_timer = QTimer(self)
+            self.startup_timer.timeout.connect(self.update_startup_status)
+            self.startup_timer.start(STARTUP_POLL_INTERVAL_MS)
+            self.update_startup_status()
+        
         # Show greeting
         greeting = self.jarvis_engine.get_greeting()
         self.add_message("Jarvis", greeting)
         self.voice_handler.speak_async(greeting)
+        self.voice_handler.prerender(self.jarvis_engine.common_phrases() + [NOT_HEARD_MESSAGE, CHAT_CLEARED_MESSAGE])
     
     def init_ui(self):
         """Initialize the user interface"""
@@ -247,6 +308,10 @@ class JarvisGUI(QMainWindow):
         self.voice_button.clicked.connect(self.start_voice_input)
         button_layout.addWidget(self.voice_button)
         
+        self.dictate_button = QPushButton("📝 Dictate")
+        self.dictate_button.clicked.connect(self.start_dictation)
+        button_layout.addWidget(self.dictate_button)
+        
         self.clear_button = QPushButton("Clear Chat")
         self.clear_button.clicked.connect(self.clear_chat)
         button_layout.addWidget(self.clear_button)
@@ -257,6 +322,29 @@ class JarvisGUI(QMainWindow):
         
         main_layout.addLayout(button_layout)
     
+    def update_startup_status(self):
+        """Reflect component readiness until startup finishes"""
+        states = self.startup.states()
+        voice = self.startup.components.get('voice input')
+        if not (self.listening_thread and self.listening_thread.isRunning()):
+            self.voice_button.setEnabled(voice is None or voice.state == Component.READY)
+            self.dictate_button.setEnabled(voice is None or voice.state == Component.READY)
+        
+        loading = [name for name, state in states.items() if state in (Component.PENDING, Component.LOADING)]
+        failed = [name for name, state in states.items() if state == Component.FAILED]
+        busy = self.current_request or (self.listening_thread and self.listening_thread.isRunning())
+        if loading:
+            if not busy:
+                self.status_label.setText(f"Starting {', '.join(loading)}...")
+            return
+        
+        self.startup_timer.stop()
+        if not busy:
+            if failed:
+                self.status_label.setText(f"Ready ({', '.join(failed)} unavailable)")
+            else:
+                self.status_label.setText("Ready")
+    
     def add_message(self, sender, message):
         """Add message to chat display"""
         color = "#00d4ff" if sender == "Jarvis" else "#ffffff"
@@ -269,58 +357,136 @@ class JarvisGUI(QMainWindow):
             return
         
         self.input_field.clear()
+        self.start_response(text)
+    
+    def start_response(self, text, source='text'):
+        """Submit text to the pipeline, superseding any response in flight"""
+        request = self.pipeline.submit(text, source)
+        if request is self.current_request:
+            # Duplicate submit of the request already in flight
+            return
+        
+        if self.current_request:
+            # The user moved on: drop the stale answer
+            self.finish_stream(interrupted=True)
+        # Barge-in: stop speaking the previous answer, even if it has finished streaming
+        self.voice_handler.clear_speech()
+        
         self.add_message("You", text)
+        self.status_label.setText("Queued...")
+        self.chat_display.append('<span style="color: #00d4ff; font-weight: bold;">Jarvis:</span>&nbsp;')
+        self.current_request = request
+    
+    def show_notification(self, message):
+        """Show and speak a message outside a request, e.g. an expired timer"""
+        self.add_message("Jarvis", message)
+        self.voice_handler.speak_async(message)
+    
+    def speak_sentence(self, request, sentence):
+        """Queue a finished sentence for speech (called on a pipeline worker)"""
+        self.voice_handler.speak_async(sentence, on_start=lambda: self.pipeline.audio_started(request))
+    
+    def request_status_changed(self, request_id, status):
+        """Reflect pipeline progress for the current request"""
+        if not self.current_request or request_id != self.current_request.id:
+            return
         
-        # Process command
-        self.status_label.setText("Processing...")
-        response = self.jarvis_engine.process_command(text)
+        if status == Request.PROCESSING:
+            self.status_label.setText("Processing...")
+        elif status == Request.STREAMING:
+            self.status_label.setText("Responding...")
+        elif status in (Request.DONE, Request.FAILED, Request.CANCELLED):
+            self.finish_stream()
+            self.status_label.setText("Ready")
+    
+    def buffer_chunk(self, request_id, text):
+        """Hold a streamed chunk of the current request until the next repaint"""
+        if self.current_request and request_id == self.current_request.id:
+            self.stream_buffer.append(text)
+    
+    def flush_stream_buffer(self):
+        """Paint buffered chunks in one batch"""
+        self.visualizer.set_speaking(self.voice_handler.is_speaking)
+        if not self.stream_buffer:
+            return
         
-        self.add_message("Jarvis", response)
-        self.voice_handler.speak_async(response)
-        self.status_label.setText("Ready")
+        text = ''.join(self.stream_buffer)
+        self.stream_buffer.clear()
+        cursor = self.chat_display.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text, QTextCharFormat())
+        self.chat_display.ensureCursorVisible()
+    
+    def finish_stream(self, interrupted=False):
+        """Close off the current response in the chat display"""
+        self.flush_stream_buffer()
+        if interrupted:
+            cursor = self.chat_display.textCursor()
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(" …", QTextCharFormat())
+        self.chat_display.append('')
+        self.current_request = None
     
-    def start_voice_input(self):
+    def start_voice_input(self, dictation=False):
         """Start voice input"""
         if self.listening_thread and self.listening_thread.isRunning():
             return
         
-        self.status_label.setText("Listening...")
+        # Stop talking while the user does
+        self.voice_handler.clear_speech()
+        self.status_label.setText("Listening for dictation..." if dictation else "Listening...")
         self.voice_button.setEnabled(False)
+        self.dictate_button.setEnabled(False)
         self.visualizer.set_listening(True)
         
         # Start listening in thread
-        self.listening_thread = ListeningThread(self.voice_handler)
-        self.listening_thread.result.connect(self.handle_voice_result)
+        on_partial = None if dictation else self.jarvis_engine.speculate
+        self.listening_thread = ListeningThread(self.voice_handler, dictation, on_partial)
+        if dictation:
+            self.listening_thread.result.connect(self.handle_dictation_result)
+        else:
+            self.listening_thread.result.connect(self.handle_voice_result)
         self.listening_thread.finished.connect(self.voice_input_finished)
         self.listening_thread.start()
     
+    def start_dictation(self):
+        """Dictate long text into the input field"""
+        self.start_voice_input(dictation=True)
+    
     def handle_voice_result(self, text):
         """Handle voice recognition result"""
         if text:
-            self.add_message("You", text)
-            
-            # Process command
-            self.status_label.setText("Processing...")
-            response = self.jarvis_engine.process_command(text)
-            
-            self.add_message("Jarvis", response)
-            self.visualizer.set_speaking(True)
-            self.voice_handler.speak(response)
-            self.visualizer.set_speaking(False)
+            self.start_response(text, source='voice')
+        else:
+            self.jarvis_engine.discard_speculation()
+            self.show_notification(NOT_HEARD_MESSAGE)
+    
+    def handle_dictation_result(self, text):
+        """Put dictated text in the input field for review before sending"""
+        if text:
+            existing = self.input_field.text().strip()
+            self.input_field.setText(f"{existing} {text}".strip())
+            self.input_field.setFocus()
         else:
-            self.add_message("Jarvis", "I didn't catch that. Please try again.")
+            self.show_notification(NOT_HEARD_MESSAGE)
     
     def voice_input_finished(self):
         """Called when voice input finishes"""
         self.voice_button.setEnabled(True)
+        self.dictate_button.setEnabled(True)
         self.visualizer.set_listening(False)
-        self.status_label.setText("Ready")
+        if not self.current_request:
+            self.status_label.setText("Ready")
     
     def clear_chat(self):
         """Clear chat display"""
+        self.pipeline.cancel_all()
+        self.current_request = None
+        self.stream_buffer.clear()
         self.chat_display.clear()
         self.jarvis_engine.clear_history()
-        self.add_message("Jarvis", "Chat cleared. How can I help you?")
+        self.voice_handler.clear_speech()
+        self.show_notification(CHAT_CLEARED_MESSAGE)
     
     def show_settings(self):
         """Show settings dialog"""
@@ -358,5 +524,7 @@ class JarvisGUI(QMainWindow):
     
     def closeEvent(self, event):
         """Handle window close"""
-        self.voice_handler.stop_speaking()
+        self.pipeline.shutdown()
+        self.voice_handler.close()
+        self.jarvis_engine.close()
         event.accept()
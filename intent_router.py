@@ -0,0 +1,224 @@
+"""
+Intent Router - Compiled single-pass command matching for Jarvis
+"""
+import re
+
+# Polite lead-ins allowed in front of an imperative command; a question
+# lead-in ("can you ...") is captured so destructive intents can refuse it
+COMMAND_PREFIX = (
+    r"(?:(?:hey\s+)?jarvis[\s,]+)?"
+    r"(?:please\s+)?"
+    r"(?P<question>(?:can|could|would|will)\s+you\s+)?"
+    r"(?:please\s+)?"
+)
+
+# Politeness after a command, kept out of its slots
+COMMAND_SUFFIX = r"(?:[\s,]+(?:please|now|for\s+me|thanks|thank\s+you))*"
+
+SLOT_NAME_PATTERN = re.compile(r"\(\?P<(\w+)>")
+
+
+class Intent:
+    """Declarative description of a system command
+
+    An intent is recognised either by trigger phrases found anywhere in the
+    utterance, or by anchored command patterns whose named groups become
+    slots. A destructive intent is only taken from an imperative, never
+    from a question such as "can you stop talking about politics".
+    """
+    
+    def __init__(self, name, handler, triggers=None, patterns=None, exclude=None, destructive=False):
+        self.name = name
+        self.handler = handler
+        self.triggers = triggers or []
+        self.patterns = patterns or []
+        self.exclude = exclude or {}
+        self.destructive = destructive
+    
+    def __repr__(self):
+        return f"Intent({self.name!r})"
+
+
+class IntentMatch:
+    """Result of routing an utterance"""
+    
+    def __init__(self, intent, slots=None):
+        self.intent = intent
+        self.slots = slots or {}
+    
+    @property
+    def name(self):
+        return self.intent.name
+    
+    def __eq__(self, other):
+        if not isinstance(other, IntentMatch):
+            return NotImplemented
+        return self.intent.name == other.intent.name and self.slots == other.slots
+    
+    def __repr__(self):
+        return f"IntentMatch({self.intent.name!r}, {self.slots!r})"
+
+
+class IntentRouter:
+    """Routes an utterance to at most one intent in a single pass
+
+    Trigger phrases of every intent are compiled into one alternation that
+    is scanned once, and all command patterns into one anchored regex. When
+    several intents match, the one listed first in the grammar wins.
+    
+    slot_checks maps a slot name to a function that says whether a value
+    is acceptable, e.g. whether an 'app' slot names a known application;
+    a command whose slot fails its check is not matched.
+    """
+    
+    def __init__(self, grammar=None, slot_checks=None):
+        self.grammar = list(grammar if grammar is not None else DEFAULT_GRAMMAR)
+        self.slot_checks = slot_checks or {}
+        self.trigger_groups = {}
+        self.pattern_groups = {}
+        
+        triggers = []
+        alternatives = []
+        for priority, intent in enumerate(self.grammar):
+            if intent.triggers:
+                group = f"t{priority}"
+                phrases = [r"\s+".join(map(re.escape, trigger.lower().split())) for trigger in intent.triggers]
+                triggers.append(f"(?P<{group}>{'|'.join(phrases)})")
+                self.trigger_groups[group] = priority
+            for alt_index, pattern in enumerate(intent.patterns):
+                group = f"i{priority}a{alt_index}"
+                slots = SLOT_NAME_PATTERN.findall(pattern)
+                renamed = SLOT_NAME_PATTERN.sub(lambda m: f"(?P<{group}_{m.group(1)}>", pattern)
+                alternatives.append(f"(?P<{group}>{renamed})")
+                self.pattern_groups[group] = (priority, [(f"{group}_{slot}", slot) for slot in slots])
+        
+        self.trigger_regex = None
+        if triggers:
+            self.trigger_regex = re.compile(rf"\b(?:{'|'.join(triggers)})\b")
+        self.command_regex = None
+        if alternatives:
+            self.command_regex = re.compile(
+                rf"^{COMMAND_PREFIX}(?:{'|'.join(alternatives)}){COMMAND_SUFFIX}[\s.!?]*$"
+            )
+    
+    def match(self, text):
+        """Return the IntentMatch for text, or None"""
+        text_lower = text.lower().strip()
+        best = None
+        
+        if self.trigger_regex is not None:
+            for found in self.trigger_regex.finditer(text_lower):
+                priority = self.trigger_groups[found.lastgroup]
+                if best is None or priority < best[0]:
+                    best = (priority, {})
+        
+        if self.command_regex is not None:
+            command = self.command_regex.match(text_lower)
+            if command:
+                priority, slot_groups = self.pattern_groups[command.lastgroup]
+                intent = self.grammar[priority]
+                if (best is None or priority < best[0]) and not (intent.destructive and command.group('question')):
+                    # Optional slots that did not participate are left out
+                    slots = {
+                        slot: command.group(group).strip()
+                        for group, slot in slot_groups if command.group(group) is not None
+                    }
+                    if not self._excluded(intent, slots) and self._checked(slots):
+                        best = (priority, slots)
+        
+        if best is None:
+            return None
+        return IntentMatch(self.grammar[best[0]], best[1])
+    
+    def _checked(self, slots):
+        """Check slot values with the router's slot checks"""
+        for slot, check in self.slot_checks.items():
+            if slot in slots and not check(slots[slot]):
+                return False
+        return True
+    
+    def _excluded(self, intent, slots):
+        """Check slot values against the intent's exclusion list"""
+        for slot, values in intent.exclude.items():
+            if slots.get(slot) in values:
+                return True
+        return False
+
+
+# One application name of up to four words, e.g. 'notepad' or 'visual studio code'
+APP_NAME = r"(?P<app>[\w.+&'-]+(?:\s+[\w.+&'-]+){0,3}?)"
+
+# Grammar order is match priority: history and explicit web commands first
+# so their topics and queries are never mistaken for keywords, app launch/close last so that
+# keyword commands like "open apps" are not taken as an app name.
+DEFAULT_GRAMMAR = [
+    Intent(
+        'history_search', '_command_history_search',
+        patterns=[
+            r"(?:what|when)\s+did\s+i\s+(?:ask|say|tell\s+you)(?:\s+you)?\s+about\s+(?P<topic>.+?)"
+            r"(?:\s+(?P<period>today|yesterday|(?:this|last)\s+(?:week|month)|(?:in\s+the\s+)?(?:last|past)\s+\d+\s+days?))?",
+        ],
+    ),
+    Intent(
+        'search_google', '_command_search_google',
+        patterns=[r"(?:search\s+google|google\s+search)\s+(?:for\s+)?(?P<query>.+?)"],
+    ),
+    Intent(
+        'open_website', '_command_open_website',
+        patterns=[
+            r"open\s+(?:the\s+)?website\s+(?P<url>\S+?)",
+            r"go\s+to\s+(?P<url>[\w-]+(?:\.[\w-]+)+(?:/\S*)?)",
+        ],
+    ),
+    Intent(
+        'time', '_command_time',
+        triggers=['time is it', 'current time', "what's the time", 'what is the time', 'tell me the time'],
+    ),
+    Intent(
+        'date', '_command_date',
+        triggers=['what date', 'today date', "today's date", 'what day'],
+    ),
+    Intent(
+        'running_apps', '_command_running_apps',
+        triggers=['running apps', 'open apps'],
+    ),
+    Intent(
+        'system_trend', '_command_system_trend',
+        patterns=[
+            r"(?:what|how)\s+(?:was|were|has\s+been)\s+(?:my\s+|the\s+)?(?:(?P<stat>average|peak|max(?:imum)?|highest|lowest|min(?:imum)?)\s+)?"
+            r"(?P<metric>cpu|processor|memory|ram|disk|network|load)(?:\s+(?:usage|use|load|activity|traffic))?"
+            r"\s+(?:over|in|for|during)\s+the\s+(?P<period>(?:last|past)\s+(?:\d+\s+|an?\s+)?(?:seconds?|minutes?|hours?))",
+            r"(?:what\s+(?:was|is)\s+)?(?:my\s+|the\s+)?(?P<stat>average|peak|max(?:imum)?|highest|lowest|min(?:imum)?)\s+"
+            r"(?P<metric>cpu|processor|memory|ram|disk|network|load)(?:\s+(?:usage|use|load|activity|traffic))?"
+            r"(?:\s+(?:over|in|for|during)\s+the\s+(?P<period>(?:last|past)\s+(?:\d+\s+|an?\s+)?(?:seconds?|minutes?|hours?)))?",
+        ],
+    ),
+    Intent(
+        'system_info', '_command_system_info',
+        triggers=['system info', 'system status'],
+    ),
+    Intent(
+        'minimize_windows', '_command_minimize_windows',
+        triggers=['minimize all', 'minimize windows'],
+    ),
+    Intent(
+        'shutdown', '_command_shutdown',
+        patterns=[r"(?:shutdown|shut\s+down)\s+(?:the\s+|my\s+)?(?:computer|pc|system)"],
+        destructive=True,
+    ),
+    Intent(
+        'restart', '_command_restart',
+        patterns=[r"(?:restart|reboot)\s+(?:the\s+|my\s+)?(?:computer|pc|system)"],
+        destructive=True,
+    ),
+    Intent(
+        'close_app', '_command_close_app',
+        patterns=[r"(?:close|quit|exit|stop)\s+(?:the\s+)?" + APP_NAME],
+        exclude={'app': ['jarvis', 'yourself']},
+        destructive=True,
+    ),
+    Intent(
+        'open_app', '_command_open_app',
+        patterns=[r"(?:open|launch|start|run)\s+(?:the\s+)?" + APP_NAME],
+    ),
+]
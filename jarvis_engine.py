@@ -1,57 +1,278 @@
 """
 Jarvis Engine - Core AI processing using Google Gemini
 """
-import google.generativeai as genai
 from utils import *
+from intent_router import IntentRouter
+from metrics import metrics
+from response_cache import ResponseCache
+from semantic_cache import SemanticCache
+from conversation_context import ConversationContext
+from prompt_accounting import PromptAccountant
+from conversation_store import ConversationStore, time_range
+from startup import profiler
+from resilient_client import ResilientClient, CircuitBreaker, CircuitOpenError
+from local_answerers import LocalAnswerers
+from connection_warmer import ConnectionWarmer
+from speculative import SpeculativeExecutor
+from collections import deque
 from datetime import datetime
-import re
+import itertools
+import threading
+import time
+
+MODEL_NAME = "gemini-pro"
+
+GENERATION_CONFIG = {
+    "temperature": 0.9,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 2048,
+}
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+]
+
+# Personality and context, given to the model once as its system instruction
+JARVIS_PERSONA = """You are Jarvis, an advanced AI personal assistant inspired by Iron Man's AI.
+You are helpful, intelligent, and have a sophisticated personality.
+Respond in a concise, friendly, and professional manner.
+Keep responses brief unless asked for detailed information."""
+PERSONA_TOKENS = estimate_tokens(JARVIS_PERSONA)
+
+# Number of exchanges kept in conversation_history
+HISTORY_LIMIT = 500
+
+# How long a query waits for Gemini still initializing in the background
+GEMINI_READY_TIMEOUT = 15
+
+# Answer given while Gemini is failing and the circuit breaker is open
+FALLBACK_RESPONSE = (
+    "I'm having trouble reaching my AI service right now. "
+    "I can still open apps, search the web and tell you the time."
+)
 
 class JarvisEngine:
     """Core engine for Jarvis AI assistant"""
     
-    def __init__(self, config, system_controller):
+    def __init__(self, config, system_controller, model=None, connect=True):
         self.config = config
         self.system_controller = system_controller
         self.model = None
-        self.chat = None
-        self.conversation_history = []
+        self.warmer = None
+        self.conversation_history = deque(maxlen=HISTORY_LIMIT)
+        # App names in commands must name an application the controller knows
+        is_application = getattr(system_controller, 'is_application', None)
+        self.intent_router = IntentRouter(slot_checks={'app': is_application} if is_application else None)
+        self.last_prompt_tokens = 0
+        self.persona_in_history = True
+        self.gemini_ready = threading.Event()
+        self.notification_callback = None
+        self.prompt_accountant = PromptAccountant(bloat_threshold=config.prompt_bloat_threshold)
         
-        # Initialize if API key is available
-        if config.api_key:
+        # Bound the number of concurrent Gemini requests
+        self.llm_slots = threading.BoundedSemaphore(config.max_concurrent_requests)
+        
+        # Adaptive deadlines, retries and hedging; both call styles share
+        # one circuit breaker since they hit the same backend
+        breaker = CircuitBreaker()
+        self.gemini_client = ResilientClient(
+            'gemini', breaker=breaker, hedge=config.hedge_requests, max_retries=config.request_retries
+        )
+        self.gemini_stream_client = ResilientClient(
+            'gemini.stream', breaker=breaker, hedge=config.hedge_requests, max_retries=config.request_retries
+        )
+        
+        # Recent turns verbatim plus a summary of older ones
+        self.context = ConversationContext(
+            summarizer=self._summarize,
+            token_budget=config.context_token_budget,
+            max_turns=config.context_max_turns
+        )
+        
+        # Arithmetic, conversions, dates and timers are answered without Gemini
+        self.local_answerers = None
+        if config.local_answerers_enabled:
+            self.local_answerers = LocalAnswerers(on_timer=self._notify)
+        
+        # Every exchange is kept on disk and searchable
+        self.conversation_store = None
+        if config.conversation_store_enabled:
+            self.conversation_store = ConversationStore()
+        
+        # Cache answers to repeated queries
+        self.response_cache = None
+        if config.response_cache_enabled:
+            self.response_cache = ResponseCache(
+                model_name=MODEL_NAME,
+                generation_config=GENERATION_CONFIG,
+                ttl=config.response_cache_ttl
+            )
+        self.semantic_cache = None
+        if config.semantic_cache_enabled:
+            self.semantic_cache = SemanticCache(
+                threshold=config.semantic_cache_threshold,
+                ttl=config.response_cache_ttl
+            )
+        
+        # Partial transcripts prepare commands before the user stops speaking
+        self.speculator = None
+        self.prewarming = False
+        if config.speculative_execution_enabled:
+            self.speculator = SpeculativeExecutor(self.intent_router, system_controller, prewarm=self._prewarm_gemini)
+        
+        # Use a supplied model (e.g. a fake for offline testing) or
+        # initialize Gemini if API key is available. With connect=False the
+        # caller runs initialize_gemini itself, typically in the background.
+        if model is not None:
+            self.model = model
+            self.gemini_ready.set()
+        elif not config.api_key:
+            self.gemini_ready.set()
+        elif connect:
             self.initialize_gemini()
     
     def initialize_gemini(self):
         """Initialize Gemini AI"""
         try:
+            genai = profiler.import_module('google.generativeai')
             genai.configure(api_key=self.config.api_key)
             
-            # Configure the model
-            generation_config = {
-                "temperature": 0.9,
-                "top_p": 1,
-                "top_k": 1,
-                "max_output_tokens": 2048,
-            }
-            
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-            ]
-            
-            self.model = genai.GenerativeModel(
-                model_name="gemini-pro",
-                generation_config=generation_config,
-                safety_settings=safety_settings
-            )
+            # Configure the model with the persona as system instruction;
+            # older SDKs without support get it once at the start of the history
+            try:
+                self.model = genai.GenerativeModel(
+                    model_name=MODEL_NAME,
+                    generation_config=GENERATION_CONFIG,
+                    safety_settings=SAFETY_SETTINGS,
+                    system_instruction=JARVIS_PERSONA
+                )
+                self.persona_in_history = False
+            except TypeError:
+                self._use_persona_in_history()
             
-            # Start chat with context
-            self.chat = self.model.start_chat(history=[])
+            self.start_warmup()
             
             return True, "Gemini AI initialized successfully"
         except Exception as e:
             return False, f"Error initializing Gemini: {str(e)}"
+        finally:
+            self.gemini_ready.set()
+    
+    def start_warmup(self):
+        """Open the Gemini connection in the background and keep it alive while idle"""
+        if self.config.connection_warmup_enabled and self.warmer is None:
+            self.warmer = ConnectionWarmer(self.model, keepalive_interval=self.config.keepalive_interval)
+            self.warmer.start()
+    
+    def _connection_state(self):
+        """'warm' if the Gemini connection is likely open, 'cold' if a request pays for setup"""
+        if self.warmer and self.warmer.is_warm():
+            return 'warm'
+        return 'cold'
+    
+    def _record_contact(self, state, name, elapsed):
+        """Record request latency split by connection state"""
+        metrics.observe(f'{name}.{state}', elapsed)
+        metrics.increment(f'gemini.requests.{state}')
+        if self.warmer:
+            self.warmer.touch()
+    
+    def _prewarm_gemini(self):
+        """Open a cold Gemini connection in the background ahead of a query still being spoken"""
+        if not self.model or self.prewarming or self._connection_state() == 'warm':
+            return
+        self.prewarming = True
+        metrics.increment('speculation.prewarm')
+        if self.warmer is None:
+            # Not started, so it only tracks the connection and sends no keep-alives
+            self.warmer = ConnectionWarmer(self.model, keepalive_interval=self.config.keepalive_interval)
+        warmer = self.warmer
+        
+        def warm():
+            try:
+                warmer.warm()
+            finally:
+                self.prewarming = False
+        thread = threading.Thread(target=warm, name="gemini-prewarm")
+        thread.daemon = True
+        thread.start()
+    
+    def speculate(self, partial_text):
+        """Prepare whatever a partial transcript asks for; it only runs if the final transcript agrees"""
+        if self.speculator:
+            self.speculator.partial(clean_text(partial_text))
+    
+    def discard_speculation(self):
+        """Drop an action prepared for speech that never produced a transcript"""
+        if self.speculator:
+            self.speculator.discard()
+    
+    def _use_persona_in_history(self):
+        """Fall back to sending the persona as a history prefix"""
+        genai = profiler.import_module('google.generativeai')
+        self.model = genai.GenerativeModel(
+            model_name=MODEL_NAME,
+            generation_config=GENERATION_CONFIG,
+            safety_settings=SAFETY_SETTINGS
+        )
+        self.persona_in_history = True
+    
+    def _gemini_available(self):
+        """Wait for background initialization, then report whether Gemini can be used"""
+        if not self.gemini_ready.is_set():
+            self.gemini_ready.wait(GEMINI_READY_TIMEOUT)
+        return self.model is not None
+    
+    def _send_message(self, query, stream=False):
+        """Send query in a chat session built from the rolling context; returns (response, prompt tokens)
+        
+        Each call builds its own session, so hedged and retried attempts
+        never see each other's chat or token estimate.
+        """
+        try:
+            chat, prompt_tokens = self._new_chat(query)
+            return chat.send_message(query, stream=stream), prompt_tokens
+        except Exception as e:
+            # Some models reject system instructions; retry once without
+            if self.persona_in_history or 'instruction' not in str(e).lower():
+                raise
+            self._use_persona_in_history()
+            chat, prompt_tokens = self._new_chat(query)
+            return chat.send_message(query, stream=stream), prompt_tokens
+    
+    def _start_stream(self, query):
+        """Send a streaming request and wait for its first text chunk"""
+        response_obj, prompt_tokens = self._send_message(query, stream=True)
+        rest = iter(response_obj)
+        for chunk in rest:
+            if chunk.text:
+                return response_obj, prompt_tokens, chunk.text, rest
+        return response_obj, prompt_tokens, '', rest
+    
+    def _acquire_llm_slot(self):
+        """Wait for a free Gemini request slot; returns its release
+
+        The slot is freed on the second call of the release: once by the
+        caller when it is done and once by the client when every attempt,
+        including abandoned ones, has finished.
+        """
+        started = time.perf_counter()
+        self.llm_slots.acquire()
+        metrics.observe('gemini.slot_wait', time.perf_counter() - started)
+        holders = [2]
+        lock = threading.Lock()
+        
+        def release():
+            with lock:
+                holders[0] -= 1
+                done = holders[0] == 0
+            if done:
+                self.llm_slots.release()
+        return release
     
     def process_command(self, user_input):
         """Process user command and return response"""
@@ -61,120 +282,329 @@ class JarvisEngine:
             return "I didn't catch that. Could you please repeat?"
         
         # Store in history
-        self.conversation_history.append({
+        entry = {
             'timestamp': datetime.now(),
             'user': user_input,
             'response': None
-        })
+        }
+        self.conversation_history.append(entry)
+        
+        # Computable queries are answered locally, then system commands
+        response = self._local_answer(user_input)
+        if response:
+            return self._finish_entry(entry, response)
         
-        # Check for system commands first
         response = self._handle_system_commands(user_input)
         if response:
-            self.conversation_history[-1]['response'] = response
-            return response
+            metrics.increment('engine.route.command')
+            return self._finish_entry(entry, response)
+        
+        # Repeated queries are answered from the cache
+        response = self._cached_response(user_input)
+        if response:
+            metrics.increment('engine.route.cache')
+            return self._finish_entry(entry, response)
         
         # Use Gemini AI for general queries
-        if self.model and self.chat:
+        if self._gemini_available():
+            metrics.increment('engine.route.gemini')
+            state = self._connection_state()
+            release_slot = self._acquire_llm_slot()
+            started = time.perf_counter()
             try:
-                # Add context to the query
-                enhanced_query = self._enhance_query(user_input)
-                response_obj = self.chat.send_message(enhanced_query)
+                response_obj, prompt_tokens = self.gemini_client.call(
+                    lambda: self._send_message(user_input), on_settled=release_slot
+                )
+                self._record_contact(state, 'gemini.response_time', time.perf_counter() - started)
                 response = response_obj.text
-                self.conversation_history[-1]['response'] = response
-                return response
+                self._account_prompt(user_input, response_obj, response, prompt_tokens)
+                self.context.add_turn(user_input, response)
+                self._cache_response(user_input, response, time.perf_counter() - started)
+                return self._finish_entry(entry, response)
+            except CircuitOpenError:
+                return self._finish_entry(entry, FALLBACK_RESPONSE)
             except Exception as e:
                 error_msg = f"I encountered an error: {str(e)}"
-                self.conversation_history[-1]['response'] = error_msg
-                return error_msg
+                return self._finish_entry(entry, error_msg)
+            finally:
+                release_slot()
         else:
             response = "I'm not fully initialized yet. Please make sure the API key is set."
-            self.conversation_history[-1]['response'] = response
-            return response
+            return self._finish_entry(entry, response)
+    
+    def process_command_stream(self, user_input):
+        """Process user command and yield the response in chunks as it arrives"""
+        user_input = clean_text(user_input)
+        
+        if not user_input:
+            yield "I didn't catch that. Could you please repeat?"
+            return
+        
+        # Store in history
+        entry = {
+            'timestamp': datetime.now(),
+            'user': user_input,
+            'response': None
+        }
+        self.conversation_history.append(entry)
+        
+        # Local answers and system commands answer in one piece
+        response = self._local_answer(user_input)
+        if response:
+            self._finish_entry(entry, response)
+            yield response
+            return
+        
+        response = self._handle_system_commands(user_input)
+        if response:
+            metrics.increment('engine.route.command')
+            self._finish_entry(entry, response)
+            yield response
+            return
+        
+        response = self._cached_response(user_input)
+        if response:
+            metrics.increment('engine.route.cache')
+            self._finish_entry(entry, response)
+            yield response
+            return
+        
+        if not self._gemini_available():
+            response = "I'm not fully initialized yet. Please make sure the API key is set."
+            self._finish_entry(entry, response)
+            yield response
+            return
+        
+        metrics.increment('engine.route.gemini')
+        chunks = []
+        state = self._connection_state()
+        release_slot = self._acquire_llm_slot()
+        started = time.perf_counter()
+        try:
+            response_obj, prompt_tokens, first_text, rest = self.gemini_stream_client.call(
+                lambda: self._start_stream(user_input), on_settled=release_slot
+            )
+            self._record_contact(state, 'gemini.time_to_first_token', time.perf_counter() - started)
+            for text in itertools.chain([first_text], (chunk.text for chunk in rest)):
+                if not text:
+                    continue
+                chunks.append(text)
+                yield text
+            elapsed = time.perf_counter() - started
+            metrics.observe('gemini.response_time', elapsed)
+            self._account_prompt(user_input, response_obj, ''.join(chunks), prompt_tokens)
+            self.context.add_turn(user_input, ''.join(chunks))
+            self._cache_response(user_input, ''.join(chunks), elapsed)
+        except CircuitOpenError:
+            chunks.append(FALLBACK_RESPONSE)
+            yield FALLBACK_RESPONSE
+        except Exception as e:
+            error_msg = f"I encountered an error: {str(e)}"
+            chunks.append(error_msg)
+            yield error_msg
+        finally:
+            release_slot()
+            self._finish_entry(entry, ''.join(chunks))
+    
+    def _finish_entry(self, entry, response):
+        """Complete a history entry and persist the exchange"""
+        entry['response'] = response
+        if self.conversation_store:
+            self.conversation_store.append(entry['user'], response, entry['timestamp'].timestamp())
+        return response
+    
+    def _cached_response(self, user_input):
+        """Look up a cached answer and add it to the conversation context"""
+        response = None
+        if self.response_cache:
+            response = self.response_cache.get(user_input)
+        if not response and self.semantic_cache:
+            # Fall back to answers for paraphrases of the query
+            response = self.semantic_cache.get(user_input)
+        if response:
+            # Keep the exchange in context for follow-up questions
+            self.context.add_turn(user_input, response)
+        return response
+    
+    def _new_chat(self, query):
+        """Start a chat session holding the rolling context; returns (chat, estimated prompt tokens)"""
+        history = self.context.build_history()
+        if self.persona_in_history:
+            history = [
+                {'role': 'user', 'parts': [JARVIS_PERSONA]},
+                {'role': 'model', 'parts': ["Understood."]},
+            ] + history
+        prompt_tokens = PERSONA_TOKENS + self.context.history_tokens() + estimate_tokens(query)
+        return self.model.start_chat(history=history), prompt_tokens
+    
+    def _account_prompt(self, user_input, response_obj, response, prompt_tokens):
+        """Record token usage of the attempt that answered, preferring the counts Gemini reports"""
+        self.last_prompt_tokens = prompt_tokens
+        metrics.observe('gemini.prompt_tokens', prompt_tokens)
+        usage = getattr(response_obj, 'usage_metadata', None)
+        sent = getattr(usage, 'prompt_token_count', 0) or prompt_tokens
+        received = getattr(usage, 'candidates_token_count', 0) or estimate_tokens(response)
+        self.prompt_accountant.record(
+            user_input,
+            tokens_sent=sent,
+            tokens_received=received,
+            boilerplate_tokens=PERSONA_TOKENS,
+            measured=usage is not None
+        )
+    
+    def _summarize(self, prompt):
+        """Summarize older turns (runs on the context's background thread)
+
+        Goes through the Gemini client and a request slot like any other call.
+        """
+        release_slot = self._acquire_llm_slot()
+        try:
+            return self.gemini_client.call(lambda: self.model.generate_content(prompt).text, on_settled=release_slot)
+        finally:
+            release_slot()
+    
+    def _cache_response(self, user_input, response, latency):
+        """Store a fresh Gemini answer in the caches"""
+        if self.response_cache:
+            self.response_cache.put(user_input, response, latency)
+        if self.semantic_cache:
+            self.semantic_cache.put(user_input, response, latency)
+    
+    def _local_answer(self, user_input):
+        """Answer arithmetic, conversions, dates and timers without Gemini"""
+        if not self.local_answerers:
+            return None
+        response = self.local_answerers.answer(user_input)
+        if response:
+            metrics.increment('engine.route.local')
+            # Keep the exchange in context for follow-up questions
+            self.context.add_turn(user_input, response)
+        return response
+    
+    def _notify(self, message):
+        """Deliver a message that arrives outside a request, e.g. an expired timer"""
+        if self.notification_callback:
+            self.notification_callback(message)
+        else:
+            print(message)
     
     def _handle_system_commands(self, user_input):
         """Handle system-level commands"""
-        input_lower = user_input.lower()
-        
-        # Time and date
-        if any(word in input_lower for word in ['what time', 'current time', 'time is it']):
-            return f"The current time is {format_time()}"
-        
-        if any(word in input_lower for word in ['what date', 'today date', 'what day']):
-            return f"Today is {format_date()}"
-        
-        # Open application
-        if any(word in input_lower for word in ['open', 'launch', 'start', 'run']):
-            app_name = extract_app_name(user_input)
-            if app_name:
-                success, message = self.system_controller.open_application(app_name)
-                return message
-        
-        # Close application
-        if any(word in input_lower for word in ['close', 'quit', 'exit', 'stop']):
-            app_name = extract_close_app_name(user_input)
-            if app_name and app_name not in ['jarvis', 'yourself']:
-                success, message = self.system_controller.close_application(app_name)
-                return message
-        
-        # Search Google
-        if 'search google' in input_lower or 'google search' in input_lower:
-            query = re.sub(r'(search google|google search)\s*(for)?', '', input_lower, flags=re.IGNORECASE).strip()
-            if query:
-                success, message = self.system_controller.search_google(query)
-                return message
-        
-        # Open website
-        if 'open website' in input_lower or 'go to' in input_lower:
-            url = re.sub(r'(open website|go to)\s*', '', input_lower, flags=re.IGNORECASE).strip()
-            if url:
-                success, message = self.system_controller.open_website(url)
-                return message
-        
-        # System info
-        if 'system info' in input_lower or 'system status' in input_lower:
-            success, message = self.system_controller.get_system_info()
-            return message
-        
-        # Minimize windows
-        if 'minimize all' in input_lower or 'minimize windows' in input_lower:
-            success, message = self.system_controller.minimize_all_windows()
-            return message
-        
-        # Running apps
-        if 'running apps' in input_lower or 'open apps' in input_lower:
-            apps = self.system_controller.get_running_apps()
-            return f"Currently running {len(apps)} applications"
-        
-        # Shutdown
-        if 'shutdown' in input_lower and 'computer' in input_lower:
-            success, message = self.system_controller.shutdown_system()
-            return message
-        
-        # Restart
-        if 'restart' in input_lower and 'computer' in input_lower:
-            success, message = self.system_controller.restart_system()
-            return message
-        
-        return None
-    
-    def _enhance_query(self, query):
-        """Enhance query with context"""
-        # Add personality and context
-        system_context = """You are Jarvis, an advanced AI personal assistant inspired by Iron Man's AI. 
-        You are helpful, intelligent, and have a sophisticated personality. 
-        Respond in a concise, friendly, and professional manner. 
-        Keep responses brief unless asked for detailed information."""
-        
-        enhanced = f"{system_context}\n\nUser query: {query}"
-        return enhanced
+        match = self.intent_router.match(user_input)
+        if not match:
+            return None
+        
+        handler = getattr(self, match.intent.handler)
+        prepared = self.speculator.take(match) if self.speculator else None
+        if prepared is not None:
+            return handler(prepared=prepared, **match.slots)
+        return handler(**match.slots)
+    
+    def _command_history_search(self, topic, period=None):
+        """Recall past questions about a topic"""
+        if not self.conversation_store:
+            return "Conversation history is turned off."
+        
+        since, until = time_range(period)
+        when = f" {period}" if since is not None else ""
+        turns = self.conversation_store.search(topic, since=since, until=until, limit=3)
+        if not turns:
+            return f"I couldn't find anything about {topic}{when}."
+        
+        count = self.conversation_store.count_matches(topic, since=since, until=until)
+        asked = ', '.join(f"\"{turn['user']}\" ({turn['timestamp'].strftime('%b %d')})" for turn in turns)
+        times = "once" if count == 1 else f"{count} times"
+        return f"You talked about {topic} {times}{when}. Most recently: {asked}"
+    
+    def _command_time(self):
+        """Tell the current time"""
+        return f"The current time is {format_time()}"
+    
+    def _command_date(self):
+        """Tell the current date"""
+        return f"Today is {format_date()}"
+    
+    def _command_open_app(self, app, prepared=None):
+        """Open an application, using a launch path resolved from a partial transcript if there is one"""
+        if prepared is not None:
+            success, message = self.system_controller.launch_application(app, prepared)
+        else:
+            success, message = self.system_controller.open_application(app)
+        return message
+    
+    def _command_close_app(self, app, prepared=None):
+        """Close an application, using processes found from a partial transcript if there are any"""
+        if prepared is not None:
+            success, message = self.system_controller.terminate_app_processes(app, prepared)
+        else:
+            success, message = self.system_controller.close_application(app)
+        return message
+    
+    def _command_search_google(self, query):
+        """Search Google"""
+        success, message = self.system_controller.search_google(query)
+        return message
+    
+    def _command_open_website(self, url):
+        """Open a website"""
+        success, message = self.system_controller.open_website(url)
+        return message
+    
+    def _command_system_info(self):
+        """Report system information"""
+        success, message = self.system_controller.get_system_info()
+        return message
+    
+    def _command_system_trend(self, metric, stat=None, period=None):
+        """Report how a system metric has moved recently"""
+        success, message = self.system_controller.get_system_trend(metric, stat, period)
+        return message
+    
+    def _command_minimize_windows(self):
+        """Minimize all windows"""
+        success, message = self.system_controller.minimize_all_windows()
+        return message
+    
+    def _command_running_apps(self):
+        """Count running applications"""
+        apps = self.system_controller.get_running_apps()
+        return f"Currently running {len(apps)} applications"
+    
+    def _command_shutdown(self):
+        """Shutdown the computer"""
+        success, message = self.system_controller.shutdown_system()
+        return message
+    
+    def _command_restart(self):
+        """Restart the computer"""
+        success, message = self.system_controller.restart_system()
+        return message
     
     def get_greeting(self):
         """Get personalized greeting"""
         greeting = get_greeting()
         return f"{greeting}! I'm Jarvis, your personal assistant. How may I help you today?"
     
+    def common_phrases(self):
+        """Replies Jarvis gives over and over, worth rendering to audio ahead of time"""
+        phrases = [self.get_greeting(), "I didn't catch that. Could you please repeat?"]
+        for app in getattr(self.system_controller, 'common_apps', {}):
+            phrases.extend([f"Opening {app}", f"Closed {app}"])
+        return phrases
+    
+    def close(self):
+        """Flush and close persistent stores"""
+        if self.warmer:
+            self.warmer.stop()
+        close_controller = getattr(self.system_controller, 'close', None)
+        if close_controller:
+            close_controller()
+        if self.conversation_store:
+            self.conversation_store.close()
+        if self.response_cache:
+            self.response_cache.close()
+    
     def clear_history(self):
         """Clear conversation history"""
-        self.conversation_history = []
-        if self.model:
-            self.chat = self.model.start_chat(history=[])
+        self.conversation_history = deque(maxlen=HISTORY_LIMIT)
+        self.context.clear()
@@ -0,0 +1,591 @@
+"""
+Local Answerers - Answer computable queries without calling Gemini
+"""
+import ast
+import calendar
+import math
+import operator
+import re
+import threading
+import time
+from datetime import date, timedelta
+
+from metrics import metrics
+
+# Answers below this confidence are left to the router and Gemini
+MIN_CONFIDENCE = 0.8
+
+# Polite lead-ins allowed in front of any locally answered query
+LEAD_IN = r"^(?:(?:hey\s+)?jarvis[\s,]+)?(?:please\s+)?(?:(?:can|could)\s+you\s+)?(?:tell\s+me\s+)?"
+TRAILER = r"[\s?.!]*$"
+
+NUMBER = r"-?\d+(?:,\d{3})*(?:\.\d+)?"
+
+# Results with more digits than this are left to Gemini
+MAX_RESULT_DIGITS = 100
+
+
+def parse_number(text):
+    return float(text.replace(',', ''))
+
+
+def format_number(value):
+    """Readable number: integers without decimals, others to 4 places, huge ones to 4 significant digits"""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        value = int(value)
+    if isinstance(value, int):
+        if abs(value) < 10 ** 15:
+            return f"{value:,}"
+        value = float(value)
+    if value != 0 and (abs(value) < 1e-3 or abs(value) >= 1e15):
+        return f"{value:.4g}"
+    return f"{value:,.4f}".rstrip('0').rstrip('.')
+
+
+class LocalAnswerer:
+    """Base class for answerers
+
+    ``claim(query)`` returns ``(confidence, answer)`` for queries the
+    answerer can handle, or None. Queries arrive lowercased and cleaned.
+    Claiming has no side effects: an answerer that acts, such as starting
+    a timer, returns a callable that acts and returns the reply, and it is
+    only called if that claim is chosen.
+    """
+    
+    name = 'local'
+    
+    def claim(self, query):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Arithmetic
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+UNARY_OPERATORS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+FUNCTIONS = {'sqrt': math.sqrt}
+
+
+def safe_eval(expression):
+    """Evaluate arithmetic without eval(): numbers, + - * / // % **, sqrt()"""
+    if len(expression) > 200:
+        raise ValueError("Expression too long")
+    value = _evaluate(ast.parse(expression, mode='eval').body)
+    if not isinstance(value, (int, float)):
+        raise ValueError("Result is not a real number")
+    if not abs(value) < 10.0 ** MAX_RESULT_DIGITS:
+        raise ValueError("Result too large")
+    return value
+
+
+def _evaluate(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp):
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow):
+            # Refuse before computing a result too long to say
+            if abs(left) > 1 and right > 0 and right * math.log10(abs(left)) > MAX_RESULT_DIGITS:
+                raise ValueError("Result too large")
+            return left ** right
+        if type(node.op) in BINARY_OPERATORS:
+            return BINARY_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](_evaluate(node.operand))
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+            and len(node.args) == 1 and not node.keywords):
+        return FUNCTIONS[node.func.id](_evaluate(node.args[0]))
+    raise ValueError("Unsupported expression")
+
+
+# Spoken operators, applied in order
+ARITHMETIC_WORDS = [
+    (re.compile(r"^the\s+"), ""),
+    (re.compile(r"square\s+root\s+of\s+(" + NUMBER + ")"), r"sqrt(\1)"),
+    (re.compile(r"(" + NUMBER + r")\s*(?:percent|%)\s+of\s+"), r"(\1/100)*"),
+    (re.compile(r"\bsquared\b"), "**2"),
+    (re.compile(r"\bcubed\b"), "**3"),
+    (re.compile(r"\b(?:to\s+the\s+power\s+of|raised\s+to(?:\s+the\s+power\s+of)?)\b"), "**"),
+    (re.compile(r"\b(?:times|multiplied\s+by|x)\b"), "*"),
+    (re.compile(r"\b(?:divided\s+by|over)\b"), "/"),
+    (re.compile(r"\b(?:plus|added\s+to)\b"), "+"),
+    (re.compile(r"\b(?:minus|less)\b"), "-"),
+    (re.compile(r"\b(?:mod|modulo)\b"), "%"),
+    (re.compile(r"(?<=\d),(?=\d{3})"), ""),
+    (re.compile(r"\^"), "**"),
+]
+ARITHMETIC_QUERY = re.compile(
+    LEAD_IN + r"(?:what(?:'s|\s+is)|how\s+much\s+is|calculate|compute|evaluate|work\s+out)\s+(?P<expr>.+?)" + TRAILER
+)
+EXPRESSION_CHARS = re.compile(r"[\d\s.+\-*/%()]*(?:sqrt[\d\s.+\-*/%()]*)*")
+HAS_DIGIT = re.compile(r"\d")
+HAS_OPERATOR = re.compile(r"\d\s*(?:\*\*|[+\-*/%])\s*[\d(s-]|sqrt")
+# '9/11' or '24/7' is more often a name or a date than a division
+BARE_FRACTION = re.compile(r"\d+\s*/\s*\d+")
+
+
+class ArithmeticAnswerer(LocalAnswerer):
+    """Arithmetic such as 'what's 17 times 23' or '15% of 80'"""
+    
+    name = 'arithmetic'
+    
+    def claim(self, query):
+        if not HAS_DIGIT.search(query):
+            return None
+        found = ARITHMETIC_QUERY.match(query)
+        spoken = found.group('expr') if found else query.rstrip('?.! ')
+        expression = spoken
+        for pattern, replacement in ARITHMETIC_WORDS:
+            expression = pattern.sub(replacement, expression)
+        expression = expression.strip()
+        if not EXPRESSION_CHARS.fullmatch(expression) or not HAS_OPERATOR.search(expression):
+            return None
+        try:
+            value = safe_eval(expression)
+        except (ValueError, SyntaxError, ZeroDivisionError, OverflowError, TypeError):
+            return None
+        # A bare expression is a little less certain than an explicit question
+        confidence = 0.95 if found else 0.85
+        if BARE_FRACTION.fullmatch(spoken.strip()):
+            confidence = 0.5
+        return confidence, f"{spoken} is {format_number(value)}."
+
+
+# ---------------------------------------------------------------------------
+# Unit conversion
+
+# Name -> (dimension, size in the dimension's base unit)
+UNIT_TABLE = {
+    'length': {
+        ('mm', 'millimeter', 'millimetre'): 0.001,
+        ('cm', 'centimeter', 'centimetre'): 0.01,
+        ('m', 'meter', 'metre'): 1.0,
+        ('km', 'kilometer', 'kilometre'): 1000.0,
+        ('in', 'inch', 'inches'): 0.0254,
+        ('ft', 'foot', 'feet'): 0.3048,
+        ('yd', 'yard'): 0.9144,
+        ('mi', 'mile'): 1609.344,
+        ('nmi', 'nautical mile'): 1852.0,
+    },
+    'mass': {
+        ('mg', 'milligram'): 1e-6,
+        ('g', 'gram'): 0.001,
+        ('kg', 'kilogram', 'kilo'): 1.0,
+        ('t', 'tonne', 'metric ton'): 1000.0,
+        ('oz', 'ounce'): 0.028349523125,
+        ('lb', 'lbs', 'pound'): 0.45359237,
+        ('st', 'stone'): 6.35029318,
+    },
+    'volume': {
+        ('ml', 'milliliter', 'millilitre'): 0.001,
+        ('l', 'liter', 'litre'): 1.0,
+        ('tsp', 'teaspoon'): 0.00492892159375,
+        ('tbsp', 'tablespoon'): 0.01478676478125,
+        ('fl oz', 'fluid ounce'): 0.0295735295625,
+        ('cup',): 0.2365882365,
+        ('pt', 'pint'): 0.473176473,
+        ('qt', 'quart'): 0.946352946,
+        ('gal', 'gallon'): 3.785411784,
+    },
+    'time': {
+        ('ms', 'millisecond'): 0.001,
+        ('s', 'sec', 'second'): 1.0,
+        ('min', 'minute'): 60.0,
+        ('h', 'hr', 'hour'): 3600.0,
+        ('day',): 86400.0,
+        ('week',): 604800.0,
+        ('year',): 31557600.0,
+    },
+    'data': {
+        ('b', 'byte'): 1.0,
+        ('kb', 'kilobyte'): 1e3,
+        ('mb', 'megabyte'): 1e6,
+        ('gb', 'gigabyte'): 1e9,
+        ('tb', 'terabyte'): 1e12,
+        ('kib', 'kibibyte'): 2.0 ** 10,
+        ('mib', 'mebibyte'): 2.0 ** 20,
+        ('gib', 'gibibyte'): 2.0 ** 30,
+    },
+    'speed': {
+        ('m/s', 'meters per second', 'metres per second'): 1.0,
+        ('km/h', 'kph', 'kmh', 'kilometers per hour', 'kilometres per hour'): 1000.0 / 3600.0,
+        ('mph', 'miles per hour'): 1609.344 / 3600.0,
+        ('knot', 'kn'): 1852.0 / 3600.0,
+    },
+}
+TEMPERATURE_UNITS = {
+    'c': 'c', 'celsius': 'c', 'centigrade': 'c', 'degrees celsius': 'c', '°c': 'c',
+    'f': 'f', 'fahrenheit': 'f', 'degrees fahrenheit': 'f', '°f': 'f',
+    'k': 'k', 'kelvin': 'k', 'kelvins': 'k',
+}
+
+
+def _build_units():
+    units = {}
+    for dimension, entries in UNIT_TABLE.items():
+        for names, factor in entries.items():
+            for name in names:
+                units[name] = (dimension, factor)
+                # Plurals of spelled-out names ("miles", "kilometers per hour")
+                if len(name) > 3 and not name.endswith('s'):
+                    words = name.split(' ')
+                    words[0 if 'per' in words else -1] += 's'
+                    units.setdefault(' '.join(words), (dimension, factor))
+    return units
+
+
+UNITS = _build_units()
+
+CONVERSION_QUERIES = [
+    re.compile(
+        LEAD_IN + r"(?:convert\s+|what(?:'s|\s+is)\s+|how\s+much\s+is\s+|how\s+many\s+\w+(?:\s+\w+)?\s+(?:is|are)\s+)?"
+        r"(?P<value>" + NUMBER + r")\s*(?P<source>[a-z°/ ]+?)\s+(?:to|in|into|as)\s+(?P<target>[a-z°/ ]+?)" + TRAILER
+    ),
+    re.compile(
+        LEAD_IN + r"how\s+many\s+(?P<target>[a-z°/ ]+?)\s+(?:are\s+)?(?:there\s+)?in\s+(?:a\s+|an\s+|one\s+)?"
+        r"(?:(?P<value>" + NUMBER + r")\s*)?(?P<source>[a-z°/ ]+?)" + TRAILER
+    ),
+]
+
+
+def convert_temperature(value, source, target):
+    celsius = {'c': value, 'f': (value - 32) * 5 / 9, 'k': value - 273.15}[source]
+    return {'c': celsius, 'f': celsius * 9 / 5 + 32, 'k': celsius + 273.15}[target]
+
+
+class UnitConversionAnswerer(LocalAnswerer):
+    """Conversions such as '5 km to miles' or 'how many ounces in a pound'"""
+    
+    name = 'unit_conversion'
+    
+    def claim(self, query):
+        for pattern in CONVERSION_QUERIES:
+            found = pattern.match(query)
+            if not found:
+                continue
+            value = parse_number(found.group('value')) if found.group('value') else 1.0
+            source = found.group('source').strip()
+            target = found.group('target').strip()
+            source_key = re.sub(r"^degrees?\s+", '', source)
+            target_key = re.sub(r"^degrees?\s+", '', target)
+            
+            if source_key in TEMPERATURE_UNITS and target_key in TEMPERATURE_UNITS:
+                result = convert_temperature(value, TEMPERATURE_UNITS[source_key], TEMPERATURE_UNITS[target_key])
+            elif source in UNITS and target in UNITS and UNITS[source][0] == UNITS[target][0]:
+                result = value * UNITS[source][1] / UNITS[target][1]
+            else:
+                continue
+            return 0.95, f"{format_number(value)} {source} is {format_number(result)} {target}."
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Date arithmetic
+
+MONTHS = {name.lower(): index for index, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): index for index, name in enumerate(calendar.month_abbr) if name})
+MONTHS['sept'] = 9
+WEEKDAYS = {name.lower(): index for index, name in enumerate(calendar.day_name)}
+HOLIDAYS = {
+    "christmas": (12, 25), "christmas day": (12, 25), "christmas eve": (12, 24),
+    "new year's day": (1, 1), "new years day": (1, 1), "new year's eve": (12, 31),
+    "new years eve": (12, 31), "halloween": (10, 31), "valentine's day": (2, 14),
+    "valentines day": (2, 14),
+}
+
+MONTH_NAMES = '|'.join(sorted(MONTHS, key=len, reverse=True))
+ORDINAL = r"(?P<day>\d{1,2})(?:st|nd|rd|th)?"
+YEAR_SUFFIX = r"(?:,?\s+(?P<year>\d{4})|\s+(?P<relative_year>next|this|last)\s+year)?"
+MONTH_DAY = re.compile(rf"(?:the\s+)?(?:(?P<month>{MONTH_NAMES})\s+{ORDINAL}|{ORDINAL.replace('day', 'day2')}\s+(?:of\s+)?(?P<month2>{MONTH_NAMES})){YEAR_SUFFIX}")
+ISO_DATE = re.compile(r"(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})")
+OFFSET = re.compile(r"(?:in\s+)?(?P<amount>\d+|a|an|one)\s+(?P<unit>day|week|month|year)s?\s*(?P<direction>from\s+(?:now|today)|later|ago|before\s+today)?")
+WEEKDAY_REFERENCE = re.compile(rf"(?P<which>next|this|last|coming)\s+(?P<weekday>{'|'.join(WEEKDAYS)})")
+HOLIDAY = re.compile(rf"(?P<relative_year>next|this|last)?\s*(?P<holiday>{'|'.join(map(re.escape, HOLIDAYS))})")
+
+
+def add_months(day, months):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_date(text, today=None, future=False):
+    """Date for phrases like 'march 3rd next year', 'in 10 days' or 'next friday', or None
+
+    With future=True, a month and day without a year means the next occurrence.
+    """
+    today = today or date.today()
+    text = ' '.join(text.lower().replace("'s", "'s").split())
+    
+    if text in ('today', 'now'):
+        return today
+    if text == 'tomorrow':
+        return today + timedelta(days=1)
+    if text == 'yesterday':
+        return today - timedelta(days=1)
+    
+    found = OFFSET.fullmatch(text)
+    if found and (found.group('direction') or text.startswith('in ')):
+        amount = 1 if found.group('amount') in ('a', 'an', 'one') else int(found.group('amount'))
+        if found.group('direction') in ('ago', 'before today'):
+            amount = -amount
+        unit = found.group('unit')
+        if unit == 'day':
+            return today + timedelta(days=amount)
+        if unit == 'week':
+            return today + timedelta(weeks=amount)
+        return add_months(today, amount * (12 if unit == 'year' else 1))
+    
+    found = WEEKDAY_REFERENCE.fullmatch(text)
+    if found:
+        weekday = WEEKDAYS[found.group('weekday')]
+        ahead = (weekday - today.weekday()) % 7
+        if found.group('which') == 'last':
+            return today - timedelta(days=(today.weekday() - weekday) % 7 or 7)
+        if found.group('which') == 'next' and ahead == 0:
+            ahead = 7
+        return today + timedelta(days=ahead)
+    
+    found = ISO_DATE.fullmatch(text)
+    if found:
+        try:
+            return date(int(found.group('year')), int(found.group('month')), int(found.group('day')))
+        except ValueError:
+            return None
+    
+    found = MONTH_DAY.fullmatch(text) or HOLIDAY.fullmatch(text)
+    if not found:
+        return None
+    groups = found.groupdict()
+    if groups.get('holiday'):
+        month, day = HOLIDAYS[groups['holiday']]
+    else:
+        month = MONTHS[groups['month'] or groups['month2']]
+        day = int(groups['day'] or groups['day2'])
+    year = int(groups['year']) if groups.get('year') else today.year
+    relative = groups.get('relative_year')
+    year += {'next': 1, 'last': -1}.get(relative, 0)
+    try:
+        result = date(year, month, day)
+    except ValueError:
+        return None
+    if future and result < today and not groups.get('year') and not relative:
+        result = result.replace(year=year + 1)
+    return result
+
+
+def describe_date(day):
+    return f"{calendar.day_name[day.weekday()]}, {calendar.month_name[day.month]} {day.day}, {day.year}"
+
+
+DATE_QUERIES = [
+    ('weekday', re.compile(
+        LEAD_IN + r"(?:what|which)\s+day(?:\s+of\s+the\s+week)?\s+(?:is|was|will\s+be|does|did)\s+(?P<date>.+?)"
+        r"(?:\s+(?:be|fall\s+on|land\s+on|fall|land))?" + TRAILER
+    )),
+    ('date', re.compile(
+        LEAD_IN + r"what(?:'s|\s+is|\s+was|\s+will\s+be)?\s+(?:the\s+)?date\s+(?:will\s+it\s+be\s+|was\s+it\s+|is\s+it\s+|is\s+|was\s+)?(?P<date>.+?)"
+        + TRAILER
+    )),
+    ('until', re.compile(
+        LEAD_IN + r"how\s+(?:many\s+(?P<unit>days|weeks)|long)\s+(?:are\s+there\s+|is\s+it\s+|left\s+|have\s+passed\s+)?"
+        r"(?P<direction>until|till|to|before|since)\s+(?P<date>.+?)" + TRAILER
+    )),
+]
+
+
+class DateAnswerer(LocalAnswerer):
+    """Date arithmetic such as 'what day is march 3rd next year' or 'how many days until christmas'"""
+    
+    name = 'date_calculator'
+    
+    def __init__(self, today=None):
+        self.today = today
+    
+    def claim(self, query):
+        today = self.today() if self.today else date.today()
+        for kind, pattern in DATE_QUERIES:
+            found = pattern.match(query)
+            if not found:
+                continue
+            target = parse_date(found.group('date'), today, future=kind == 'until')
+            if target is None:
+                continue
+            
+            if kind == 'weekday':
+                verb = 'is' if target >= today else 'was'
+                return 0.95, f"{calendar.month_name[target.month]} {target.day}, {target.year} {verb} a {calendar.day_name[target.weekday()]}."
+            if kind == 'date':
+                return 0.9, f"That {'is' if target >= today else 'was'} {describe_date(target)}."
+            
+            days = (target - today).days
+            if found.group('direction') == 'since':
+                days = -days
+            if days < 0:
+                return 0.9, f"{describe_date(target)} was {-days:,} days ago."
+            if found.group('unit') == 'weeks':
+                return 0.95, f"There are {days / 7:.1f} weeks until {describe_date(target)}."
+            return 0.95, f"There are {days:,} days until {describe_date(target)}."
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Timers
+
+TIMER_UNITS = {'second': 1, 'sec': 1, 'minute': 60, 'min': 60, 'hour': 3600, 'hr': 3600}
+TIMER_UNIT = r"(?P<unit>seconds?|secs?|minutes?|mins?|hours?|hrs?)"
+TIMER_QUERIES = [
+    re.compile(
+        LEAD_IN + r"(?:set|start)\s+(?:a\s+|an\s+)?(?:timer|countdown|alarm)\s+(?:for\s+)?(?P<amount>" + NUMBER + r")\s*"
+        + TIMER_UNIT + r"(?:\s+(?:for|called|named|to)\s+(?P<label>.+?))?" + TRAILER
+    ),
+    re.compile(
+        LEAD_IN + r"(?:set\s+|start\s+)?(?:a\s+|an\s+)?(?P<amount>" + NUMBER + r")[\s-]*" + TIMER_UNIT
+        + r"\s+(?:timer|countdown)(?:\s+(?:for|called|named)\s+(?P<label>.+?))?" + TRAILER
+    ),
+    re.compile(
+        LEAD_IN + r"remind\s+me\s+in\s+(?P<amount>" + NUMBER + r")\s*" + TIMER_UNIT
+        + r"(?:\s+(?:to|about)\s+(?P<label>.+?))?" + TRAILER
+    ),
+]
+CANCEL_TIMERS = re.compile(LEAD_IN + r"(?:cancel|stop|clear)\s+(?:the\s+|all\s+|my\s+)*timers?" + TRAILER)
+
+
+class TimerAnswerer(LocalAnswerer):
+    """Countdown timers; on_expire(message) is called when one goes off"""
+    
+    name = 'timer'
+    
+    def __init__(self, on_expire=None):
+        self.on_expire = on_expire
+        self.timers = []
+        self._lock = threading.Lock()
+    
+    def claim(self, query):
+        if CANCEL_TIMERS.match(query):
+            return 0.95, self.cancel_all
+        
+        for pattern in TIMER_QUERIES:
+            found = pattern.match(query)
+            if not found:
+                continue
+            amount = parse_number(found.group('amount'))
+            unit = found.group('unit').rstrip('s')
+            seconds = amount * TIMER_UNITS[unit]
+            if not 0 < seconds <= 24 * 3600:
+                return None
+            label = found.group('label')
+            spoken = f"{format_number(amount)} {unit}{'' if amount == 1 else 's'}"
+            reply = f"Timer set for {spoken}{f' ({label})' if label else ''}."
+            
+            def start():
+                self.start(seconds, label)
+                return reply
+            return 0.95, start
+        return None
+    
+    def start(self, seconds, label=None):
+        """Start a countdown in the background"""
+        message = f"Time's up{f': {label}' if label else ''}!"
+        timer = threading.Timer(seconds, self._expire, args=(message,))
+        timer.daemon = True
+        with self._lock:
+            self.timers = [t for t in self.timers if t.is_alive()] + [timer]
+        timer.start()
+        return timer
+    
+    def _expire(self, message):
+        metrics.increment('local.timer.expired')
+        if self.on_expire:
+            self.on_expire(message)
+        else:
+            print(message)
+    
+    def cancel_all(self):
+        """Cancel every running timer"""
+        with self._lock:
+            running = [t for t in self.timers if t.is_alive()]
+            self.timers = []
+        for timer in running:
+            timer.cancel()
+        if not running:
+            return "There are no timers running."
+        return f"Cancelled {len(running)} timer{'' if len(running) == 1 else 's'}."
+
+
+# ---------------------------------------------------------------------------
+# Registry
+
+class LocalAnswerers:
+    """Registry that asks every answerer to claim a query and keeps the most confident"""
+    
+    def __init__(self, answerers=None, min_confidence=MIN_CONFIDENCE, on_timer=None):
+        if answerers is None:
+            answerers = [ArithmeticAnswerer(), UnitConversionAnswerer(), DateAnswerer(), TimerAnswerer(on_timer)]
+        self.answerers = list(answerers)
+        self.min_confidence = min_confidence
+    
+    def register(self, answerer):
+        """Add an answerer"""
+        self.answerers.append(answerer)
+    
+    def claim(self, query):
+        """(answerer, confidence, answer) for the best claim, or None; nothing is acted on yet"""
+        query = ' '.join(query.lower().split())
+        best = None
+        for answerer in self.answerers:
+            try:
+                claimed = answerer.claim(query)
+            except Exception as e:
+                print(f"Local answerer {answerer.name} error: {e}")
+                continue
+            if claimed and claimed[0] >= self.min_confidence and (best is None or claimed[0] > best[1]):
+                best = (answerer, claimed[0], claimed[1])
+        return best
+    
+    def answer(self, query):
+        """Local answer to query, or None if Gemini is needed"""
+        started = time.perf_counter()
+        best = self.claim(query)
+        metrics.observe('local.answer_time', time.perf_counter() - started)
+        if best is None:
+            return None
+        answerer, _, reply = best
+        if callable(reply):
+            try:
+                reply = reply()
+            except Exception as e:
+                print(f"Local answerer {answerer.name} error: {e}")
+                return None
+        metrics.increment(f'local.answered.{answerer.name}')
+        return reply
+
+
+def diversion_report(queries, answerers, router=None):
+    """How many queries would be answered locally, by a system command or by Gemini
+
+    Only claims are made, so no timer is started or cancelled.
+    """
+    counts = {'total': 0, 'system_command': 0, 'gemini': 0}
+    started = time.perf_counter()
+    for query in queries:
+        counts['total'] += 1
+        best = answerers.claim(query)
+        name = best[0].name if best else None
+        if name:
+            counts[name] = counts.get(name, 0) + 1
+        elif router is not None and router.match(query):
+            counts['system_command'] += 1
+        else:
+            counts['gemini'] += 1
+    counts['seconds'] = time.perf_counter() - started
+    local = counts['total'] - counts['system_command'] - counts['gemini']
+    counts['diverted'] = local / counts['total'] if counts['total'] else 0.0
+    return counts
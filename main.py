@@ -3,14 +3,18 @@ JARVIS - Just A Rather Very Intelligent System
 Main application entry point
 """
 import sys
-from PyQt5.QtWidgets import QApplication, QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
-from PyQt5.QtCore import Qt
+import threading
+from startup import profiler, StartupManager
 
-from config import Config
-from system_controller import SystemController
-from voice_handler import VoiceHandler
-from jarvis_engine import JarvisEngine
-from gui_interface import JarvisGUI
+with profiler.phase('imports'):
+    from PyQt5.QtWidgets import QApplication, QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox
+    from PyQt5.QtCore import Qt, QTimer
+    
+    from config import Config
+    from system_controller import SystemController
+    from voice_handler import VoiceHandler
+    from jarvis_engine import JarvisEngine
+    from gui_interface import JarvisGUI
 
 
 class APIKeyDialog(QDialog):
@@ -133,12 +137,16 @@ def main():
     print("JARVIS - Just A Rather Very Intelligent System")
     print("=" * 50)
     
+    profile_startup = '--profile-startup' in sys.argv
+    
     # Create application
-    app = QApplication(sys.argv)
-    app.setApplicationName("JARVIS")
+    with profiler.phase('qt application'):
+        app = QApplication(sys.argv)
+        app.setApplicationName("JARVIS")
     
     # Load configuration
-    config = Config()
+    with profiler.phase('config'):
+        config = Config()
     
     # Check for API key
     if not config.get_api_key():
@@ -160,22 +168,51 @@ def main():
         print("  ✓ Loading configuration")
         
         print("  ✓ Initializing system controller")
-        system_controller = SystemController()
+        with profiler.phase('system controller'):
+            system_controller = SystemController()
+            if config.process_index_enabled:
+                system_controller.start_process_index(config.process_index_interval)
+            if config.system_sampler_enabled:
+                system_controller.start_system_sampler(config.system_sampler_interval, config.system_history_minutes * 60)
+            if config.app_index_enabled:
+                system_controller.start_app_index()
         
         print("  ✓ Initializing voice handler")
-        voice_handler = VoiceHandler(config)
+        with profiler.phase('voice handler'):
+            voice_handler = VoiceHandler(config)
         
         print("  ✓ Initializing Jarvis engine")
-        jarvis_engine = JarvisEngine(config, system_controller)
+        with profiler.phase('jarvis engine'):
+            jarvis_engine = JarvisEngine(config, system_controller, connect=False)
+        
+        # Microphone, speech and Gemini come up in parallel behind the window
+        print("  ✓ Starting voice input, speech and Gemini in the background")
+        startup = StartupManager()
+        startup.start('voice input', voice_handler.init_recognition)
+        startup.start('speech', voice_handler.init_tts)
+        if config.api_key:
+            startup.start('gemini', jarvis_engine.initialize_gemini)
         
         print("  ✓ Creating GUI interface")
-        window = JarvisGUI(jarvis_engine, voice_handler)
+        with profiler.phase('gui'):
+            window = JarvisGUI(jarvis_engine, voice_handler, startup)
         
         print("\n✓ JARVIS initialized successfully!")
         print("=" * 50)
         
         # Show window
         window.show()
+        profiler.mark('window shown')
+        QTimer.singleShot(0, lambda: profiler.mark('event loop running'))
+        
+        if profile_startup:
+            def report_startup():
+                startup.wait_all(60)
+                print(profiler.report())
+            
+            reporter = threading.Thread(target=report_startup)
+            reporter.daemon = True
+            reporter.start()
         
         # Run application
         sys.exit(app.exec_())
@@ -0,0 +1,90 @@
+"""
+Metrics - Lightweight in-process counters and latency samples for Jarvis
+"""
+import threading
+from collections import deque
+
+
+def _pick(sorted_values, pct):
+    """Nearest-rank percentile of already sorted values"""
+    index = int(round(pct / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[min(len(sorted_values) - 1, index)]
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and timing samples"""
+    
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.samples = {}
+    
+    def increment(self, name, amount=1):
+        """Increase a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def set_gauge(self, name, value):
+        """Record the current value of a gauge"""
+        with self._lock:
+            self.gauges[name] = value
+    
+    def observe(self, name, value):
+        """Record a sample, keeping only the most recent ones"""
+        with self._lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.max_samples)
+            samples.append(value)
+    
+    def count(self, name):
+        """Get the value of a counter"""
+        with self._lock:
+            return self.counters.get(name, 0)
+    
+    def percentile(self, name, pct):
+        """Get a percentile of the recorded samples, or None"""
+        with self._lock:
+            values = sorted(self.samples.get(name, ()))
+        if not values:
+            return None
+        return _pick(values, pct)
+    
+    def summary(self, name):
+        """Summarize the samples recorded under name"""
+        with self._lock:
+            values = sorted(self.samples.get(name, ()))
+        if not values:
+            return {'count': 0}
+        return {
+            'count': len(values),
+            'mean': sum(values) / len(values),
+            'p50': _pick(values, 50),
+            'p95': _pick(values, 95),
+            'p99': _pick(values, 99),
+            'max': values[-1],
+        }
+    
+    def snapshot(self):
+        """Get all counters, gauges and sample summaries"""
+        with self._lock:
+            names = list(self.samples)
+            result = {
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+            }
+        result['samples'] = {name: self.summary(name) for name in names}
+        return result
+    
+    def reset(self):
+        """Clear all recorded metrics"""
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.samples.clear()
+
+
+# Shared registry used by all Jarvis components
+metrics = Metrics()
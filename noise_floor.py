@@ -0,0 +1,146 @@
+"""
+Noise Floor - Running estimate of background noise for speech detection thresholds
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from audio_processing import FRAME_MS, frame_energy, pcm_to_samples
+from metrics import metrics
+
+NOISE_FLOOR_FILE = "jarvis_noise_floor.json"
+
+# Frame energies the estimate is taken over (about 5 s of 30 ms frames)
+WINDOW_FRAMES = 167
+
+# The floor is a low percentile of recent energies, so the gaps between
+# words hold it down while someone talks
+FLOOR_PERCENTILE = 10
+
+# Weight of each new percentile in the smoothed floor
+SMOOTHING = 0.3
+
+# Speech must be this many times louder than the floor
+SPEECH_RATIO = 2.0
+
+# Floor used before anything has been heard, and the lowest threshold allowed (float RMS)
+DEFAULT_NOISE_FLOOR = 0.003
+MIN_THRESHOLD = 0.002
+
+# How often the estimate is written to disk while it is being updated
+SAVE_INTERVAL = 30.0
+
+
+class NoiseFloorTracker:
+    """Tracks the background noise level from the energy of audio frames
+
+    Frame energies go into a rolling window; the floor is an exponential
+    moving average of the window's low percentile. It falls within half a
+    second of the room getting quieter and rises once a new noise has
+    lasted most of the window. The last estimate is persisted so the next
+    start needs no calibration pause.
+    """
+    
+    def __init__(self, noise_floor=DEFAULT_NOISE_FLOOR, path=NOISE_FLOOR_FILE, window_frames=WINDOW_FRAMES,
+                 percentile=FLOOR_PERCENTILE, smoothing=SMOOTHING, ratio=SPEECH_RATIO):
+        self.noise_floor = noise_floor
+        self.path = path
+        self.percentile = percentile
+        self.smoothing = smoothing
+        self.ratio = ratio
+        self.window = np.zeros(window_frames, dtype=np.float32)
+        self.filled = 0
+        self.position = 0
+        self.saved_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def load(cls, path=NOISE_FLOOR_FILE, **kwargs):
+        """Tracker starting from the estimate saved at path, or the default"""
+        noise_floor = DEFAULT_NOISE_FLOOR
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    noise_floor = float(json.load(f)['noise_floor'])
+        except Exception as e:
+            print(f"Error loading noise floor: {e}")
+        return cls(noise_floor, path, **kwargs)
+    
+    def save(self):
+        """Persist the current estimate"""
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w') as f:
+                json.dump({'noise_floor': self.noise_floor, 'updated': time.time()}, f)
+            self.saved_at = time.monotonic()
+        except Exception as e:
+            print(f"Error saving noise floor: {e}")
+    
+    @property
+    def threshold(self):
+        """Frame RMS above which audio counts as speech, for float samples"""
+        return max(self.noise_floor * self.ratio, MIN_THRESHOLD)
+    
+    def energy_threshold(self, sample_width=2):
+        """The threshold in the integer RMS units of speech_recognition's energy_threshold"""
+        return self.threshold * 2 ** (8 * sample_width - 1)
+    
+    def update_energy(self, energy):
+        """Add frame energies (float RMS) and refresh the estimate"""
+        energy = np.asarray(energy, dtype=np.float32)[-len(self.window):]
+        if len(energy) == 0:
+            return self.noise_floor
+        with self._lock:
+            end = self.position + len(energy)
+            if end <= len(self.window):
+                self.window[self.position:end] = energy
+            else:
+                split = len(self.window) - self.position
+                self.window[self.position:] = energy[:split]
+                self.window[:end - len(self.window)] = energy[split:]
+            self.position = end % len(self.window)
+            self.filled = min(len(self.window), self.filled + len(energy))
+            
+            level = float(np.percentile(self.window[:self.filled], self.percentile))
+            self.noise_floor += self.smoothing * (level - self.noise_floor)
+        metrics.set_gauge('noise_floor.level', self.noise_floor)
+        if time.monotonic() - self.saved_at > SAVE_INTERVAL:
+            self.save()
+        return self.noise_floor
+    
+    def update(self, samples, sample_rate):
+        """Add float samples"""
+        return self.update_energy(frame_energy(samples, max(1, int(sample_rate * FRAME_MS / 1000))))
+    
+    def update_pcm(self, frame_data, sample_width, sample_rate):
+        """Add PCM bytes, e.g. the frame_data of a speech_recognition AudioData"""
+        return self.update(pcm_to_samples(frame_data, sample_width), sample_rate)
+
+
+class ListeningTap:
+    """Stands in for a speech_recognition source stream while listening
+
+    Every chunk read, whether waiting for speech or inside a phrase, updates
+    the tracker, and the recognizer's energy_threshold follows it.
+    """
+    
+    def __init__(self, stream, tracker, recognizer, sample_width, sample_rate):
+        self.stream = stream
+        self.tracker = tracker
+        self.recognizer = recognizer
+        self.sample_width = sample_width
+        self.sample_rate = sample_rate
+    
+    def read(self, size):
+        data = self.stream.read(size)
+        if data:
+            self.tracker.update_pcm(data, self.sample_width, self.sample_rate)
+            self.recognizer.energy_threshold = self.tracker.energy_threshold(self.sample_width)
+        return data
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
@@ -0,0 +1,199 @@
+"""
+Process Index - Running processes by name and executable, kept current by a background refresher
+"""
+import threading
+import time
+
+import psutil
+
+from metrics import metrics
+
+# Seconds between refreshes of the index
+REFRESH_INTERVAL = 2.0
+
+
+class ProcessInfo:
+    """What the index knows about one process"""
+    
+    def __init__(self, pid, name, exe=None, cmdline=None, create_time=None, process=None):
+        self.pid = pid
+        self.name = name
+        self.exe = exe
+        self.cmdline = cmdline or []
+        self.create_time = create_time
+        self.process = process
+    
+    def __repr__(self):
+        return f"ProcessInfo({self.pid}, {self.name!r})"
+
+
+def inspect_process(pid):
+    """ProcessInfo for a pid, or None if it has gone"""
+    try:
+        process = psutil.Process(pid)
+        with process.oneshot():
+            name = process.name()
+            create_time = process.create_time()
+            try:
+                exe = process.exe()
+            except (psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                exe = None
+            try:
+                cmdline = process.cmdline()
+            except (psutil.AccessDenied, psutil.ZombieProcess, OSError):
+                cmdline = []
+        return ProcessInfo(pid, name, exe, cmdline, create_time, process)
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+
+def _add(multimap, key, pid):
+    if key:
+        multimap.setdefault(key.lower(), set()).add(pid)
+
+
+def _remove(multimap, key, pid):
+    if not key:
+        return
+    pids = multimap.get(key.lower())
+    if pids is not None:
+        pids.discard(pid)
+        if not pids:
+            del multimap[key.lower()]
+
+
+class ProcessIndex:
+    """Multimaps from process name and executable path to PIDs, refreshed incrementally
+
+    Each refresh lists the PIDs, which is cheap, and inspects only the
+    processes that started since the last one; processes that exited are
+    dropped. Subscribers hear about both. A PID reused between refreshes
+    keeps its old entry, but psutil refuses to signal the wrong process
+    through the stored handle.
+    """
+    
+    def __init__(self, interval=REFRESH_INTERVAL, list_pids=psutil.pids, inspect=inspect_process):
+        self.interval = interval
+        self.list_pids = list_pids
+        self.inspect = inspect
+        self.processes = {}
+        self.by_name = {}
+        self.by_exe = {}
+        self.names = {}
+        self.ready = threading.Event()
+        self.start_callbacks = []
+        self.exit_callbacks = []
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Build the index and keep it current on a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="process-index")
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+    
+    def request_refresh(self):
+        """Refresh on the background thread now rather than at the next interval"""
+        self._wake.set()
+    
+    def subscribe(self, on_start=None, on_exit=None):
+        """Call on_start(info) for every new process and on_exit(info) for every one that ends"""
+        if on_start:
+            self.start_callbacks.append(on_start)
+        if on_exit:
+            self.exit_callbacks.append(on_exit)
+    
+    def refresh(self):
+        """Bring the index up to date; returns (started, exited) ProcessInfo lists"""
+        with self._refresh_lock:
+            started_at = time.perf_counter()
+            pids = set(self.list_pids())
+            with self._lock:
+                known = set(self.processes)
+            
+            started = []
+            for pid in pids - known:
+                info = self.inspect(pid)
+                if info is not None:
+                    started.append(info)
+            
+            exited = []
+            with self._lock:
+                for pid in known - pids:
+                    info = self.processes.pop(pid)
+                    self._unindex(info)
+                    exited.append(info)
+                for info in started:
+                    self.processes[info.pid] = info
+                    self._index(info)
+            
+            metrics.observe('process_index.refresh_time', time.perf_counter() - started_at)
+            metrics.set_gauge('process_index.processes', len(self.processes))
+            self.ready.set()
+        
+        for info in exited:
+            for callback in self.exit_callbacks:
+                callback(info)
+        for info in started:
+            for callback in self.start_callbacks:
+                callback(info)
+        return started, exited
+    
+    def find(self, name):
+        """Processes with this name, ignoring case"""
+        with self._lock:
+            return [self.processes[pid] for pid in self.by_name.get(name.lower(), ())]
+    
+    def find_exe(self, path):
+        """Processes running this executable, ignoring case"""
+        with self._lock:
+            return [self.processes[pid] for pid in self.by_exe.get(path.lower(), ())]
+    
+    def pids(self, name):
+        """PIDs of processes with this name"""
+        with self._lock:
+            return set(self.by_name.get(name.lower(), ()))
+    
+    def get(self, pid):
+        """ProcessInfo for a pid, or None"""
+        with self._lock:
+            return self.processes.get(pid)
+    
+    def cmdline(self, pid):
+        """Command line of a process, or None if it is not indexed"""
+        info = self.get(pid)
+        return info.cmdline if info else None
+    
+    def running_names(self):
+        """Distinct names of running processes"""
+        with self._lock:
+            return list(self.names.values())
+    
+    def _index(self, info):
+        _add(self.by_name, info.name, info.pid)
+        _add(self.by_exe, info.exe, info.pid)
+        if info.name:
+            self.names.setdefault(info.name.lower(), info.name)
+    
+    def _unindex(self, info):
+        _remove(self.by_name, info.name, info.pid)
+        _remove(self.by_exe, info.exe, info.pid)
+        if info.name and info.name.lower() not in self.by_name:
+            self.names.pop(info.name.lower(), None)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Process index error: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,84 @@
+"""
+Prompt Accounting - Per-request token usage and prompt bloat alerts
+"""
+import threading
+import time
+from collections import deque
+
+from metrics import metrics
+
+
+class PromptRecord:
+    """Token usage of one Gemini request"""
+    
+    def __init__(self, query, tokens_sent, tokens_received, boilerplate_tokens, measured):
+        self.timestamp = time.time()
+        self.query = query
+        self.tokens_sent = tokens_sent
+        self.tokens_received = tokens_received
+        self.boilerplate_tokens = boilerplate_tokens
+        self.measured = measured
+    
+    def as_dict(self):
+        return {
+            'timestamp': self.timestamp,
+            'query': self.query,
+            'tokens_sent': self.tokens_sent,
+            'tokens_received': self.tokens_received,
+            'boilerplate_tokens': self.boilerplate_tokens,
+            'measured': self.measured,
+        }
+
+
+class PromptAccountant:
+    """Keeps recent prompt records, running totals and bloat alerts
+
+    ``measured`` records carry the token counts Gemini reported; the others
+    are estimates.
+    """
+    
+    def __init__(self, max_records=1000, bloat_threshold=4000, on_alert=None):
+        self.records = deque(maxlen=max_records)
+        self.bloat_threshold = bloat_threshold
+        self.on_alert = on_alert
+        self.totals = {'requests': 0, 'tokens_sent': 0, 'tokens_received': 0, 'boilerplate_tokens': 0}
+        self._lock = threading.Lock()
+    
+    def record(self, query, tokens_sent, tokens_received, boilerplate_tokens=0, measured=False):
+        """Record one request and raise an alert if its prompt is bloated"""
+        record = PromptRecord(query, tokens_sent, tokens_received, boilerplate_tokens, measured)
+        with self._lock:
+            self.records.append(record)
+            self.totals['requests'] += 1
+            self.totals['tokens_sent'] += tokens_sent
+            self.totals['tokens_received'] += tokens_received
+            self.totals['boilerplate_tokens'] += boilerplate_tokens
+        
+        metrics.observe('prompt.tokens_sent', tokens_sent)
+        metrics.observe('prompt.tokens_received', tokens_received)
+        metrics.observe('prompt.boilerplate_tokens', boilerplate_tokens)
+        
+        if self.bloat_threshold and tokens_sent > self.bloat_threshold:
+            metrics.increment('prompt.bloat_alerts')
+            if self.on_alert:
+                self.on_alert(record)
+            else:
+                print(f"Prompt bloat: {tokens_sent} tokens sent for '{query[:40]}'")
+        return record
+    
+    def summary(self):
+        """Totals plus averages per request"""
+        with self._lock:
+            totals = dict(self.totals)
+        requests = totals['requests'] or 1
+        totals['avg_tokens_sent'] = totals['tokens_sent'] / requests
+        totals['avg_tokens_received'] = totals['tokens_received'] / requests
+        totals['boilerplate_ratio'] = (
+            totals['boilerplate_tokens'] / totals['tokens_sent'] if totals['tokens_sent'] else 0.0
+        )
+        return totals
+    
+    def recent(self, count=10):
+        """The most recent records, newest last"""
+        with self._lock:
+            return [record.as_dict() for record in list(self.records)[-count:]]
@@ -0,0 +1,277 @@
+"""
+Recognizer Backends - Pluggable speech recognition with offline-first racing
+"""
+import glob
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from metrics import metrics
+from startup import profiler
+
+# A result at least this confident wins the race without waiting for the rest
+MIN_CONFIDENCE = 0.75
+
+# Longest wait for the slowest backend in a race
+RACE_TIMEOUT = 10.0
+
+# Confidence assumed when a backend does not report one
+UNKNOWN_CONFIDENCE = 0.5
+
+
+class RecognitionResult:
+    """Transcript from one backend"""
+    
+    def __init__(self, backend, text, confidence, latency):
+        self.backend = backend
+        self.text = text
+        self.confidence = confidence
+        self.latency = latency
+    
+    def __repr__(self):
+        return f"RecognitionResult({self.backend!r}, {self.text!r}, {self.confidence:.2f})"
+
+
+class RecognizerBackend:
+    """Speech-to-text engine
+
+    ``transcribe(audio)`` takes a speech_recognition AudioData and returns
+    ``(text, confidence)``, or None when nothing intelligible was heard.
+    Network and engine failures raise.
+    """
+    
+    name = 'backend'
+    offline = False
+    
+    def transcribe(self, audio):
+        raise NotImplementedError
+    
+    def recognize(self, audio):
+        """Timed transcription recorded in per-backend metrics; a RecognitionResult or None"""
+        started = time.perf_counter()
+        try:
+            result = self.transcribe(audio)
+        except Exception:
+            metrics.increment(f'recognizer.{self.name}.errors')
+            raise
+        latency = time.perf_counter() - started
+        metrics.observe(f'recognizer.{self.name}.latency', latency)
+        if not result or not result[0]:
+            metrics.increment(f'recognizer.{self.name}.no_speech')
+            return None
+        return RecognitionResult(self.name, result[0], result[1], latency)
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API through speech_recognition
+
+    With preprocess, silence is trimmed and audio is brought down to 16 kHz
+    before it is FLAC-encoded for upload.
+    """
+    
+    name = 'google'
+    
+    def __init__(self, recognizer, preprocess=True):
+        self.recognizer = recognizer
+        self.preprocess = preprocess
+    
+    def transcribe(self, audio):
+        sr = profiler.import_module('speech_recognition')
+        audio_upload = profiler.import_module('audio_upload')
+        started = time.perf_counter()
+        if self.preprocess:
+            upload = audio_upload.prepare_for_upload(audio)
+        else:
+            upload = audio_upload.metered(audio.frame_data, audio.sample_rate, audio.sample_width)
+        prepared = time.perf_counter()
+        try:
+            return self.recognizer.recognize_google(upload, with_confidence=True)
+        except sr.UnknownValueError:
+            return None
+        finally:
+            metrics.observe('recognizer.google.preprocess_time', prepared - started)
+            metrics.observe('recognizer.google.encode_time', upload.encode_time)
+            metrics.observe('recognizer.google.round_trip', time.perf_counter() - prepared - upload.encode_time)
+            metrics.observe('recognizer.google.bytes_captured', len(audio.frame_data))
+            metrics.observe('recognizer.google.bytes_sent', upload.bytes_sent)
+
+
+class SphinxBackend(RecognizerBackend):
+    """Offline CMU PocketSphinx through speech_recognition"""
+    
+    name = 'sphinx'
+    offline = True
+    
+    def __init__(self, recognizer, keyword_entries=None):
+        self.recognizer = recognizer
+        self.keyword_entries = keyword_entries
+    
+    def transcribe(self, audio):
+        decoder = self.recognizer.recognize_sphinx(audio, keyword_entries=self.keyword_entries, show_all=True)
+        hypothesis = decoder.hyp()
+        if hypothesis is None or not hypothesis.hypstr:
+            return None
+        try:
+            confidence = decoder.get_logmath().exp(hypothesis.prob)
+        except Exception:
+            confidence = UNKNOWN_CONFIDENCE
+        return hypothesis.hypstr, confidence
+
+
+class VoskBackend(RecognizerBackend):
+    """Offline Kaldi recognition with a downloaded Vosk model"""
+    
+    name = 'vosk'
+    offline = True
+    
+    def __init__(self, model_path):
+        vosk = profiler.import_module('vosk')
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+    
+    def transcribe(self, audio):
+        sample_rate = 16000
+        recognizer = self.vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.SetWords(True)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=sample_rate, convert_width=2))
+        result = json.loads(recognizer.FinalResult())
+        words = result.get('result', [])
+        if not result.get('text'):
+            return None
+        confidence = sum(word.get('conf', 0.0) for word in words) / len(words) if words else UNKNOWN_CONFIDENCE
+        return result['text'], confidence
+
+
+def available_backends(recognizer, names, vosk_model_path=None, preprocess_uploads=True):
+    """Backends from names whose engines are installed, in the given order"""
+    backends = []
+    for name in names:
+        try:
+            if name == 'google':
+                backends.append(GoogleBackend(recognizer, preprocess_uploads))
+            elif name == 'sphinx' and importlib.util.find_spec('pocketsphinx'):
+                backends.append(SphinxBackend(recognizer))
+            elif name == 'vosk' and importlib.util.find_spec('vosk') and vosk_model_path:
+                backends.append(VoskBackend(vosk_model_path))
+        except Exception as e:
+            print(f"Recognizer backend {name} unavailable: {e}")
+    return backends
+
+
+class RacingRecognizer:
+    """Runs several backends at once and returns the first good transcript
+
+    An offline transcript that is a known command wins immediately;
+    otherwise the first result above min_confidence wins, and failing that
+    the most confident result once every backend has answered.
+    """
+    
+    def __init__(self, backends, is_command=None, min_confidence=MIN_CONFIDENCE, timeout=RACE_TIMEOUT):
+        self.backends = list(backends)
+        self.is_command = is_command
+        self.min_confidence = min_confidence
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(self.backends) * 2),
+                                           thread_name_prefix="recognizer")
+    
+    def recognize(self, audio):
+        """Winning RecognitionResult, or None if no backend heard speech"""
+        started = time.perf_counter()
+        pending = {self.executor.submit(backend.recognize, audio): backend for backend in self.backends}
+        results = []
+        error = None
+        winner = None
+        
+        while pending and winner is None:
+            remaining = self.timeout - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if result is None:
+                    continue
+                results.append(result)
+                if backend.offline and self.is_command and self.is_command(result.text):
+                    winner = result
+                    metrics.increment('recognizer.offline_command_wins')
+                    break
+                if result.confidence >= self.min_confidence:
+                    winner = result
+                    break
+        
+        # Slower backends finish in the background and are only recorded
+        if winner is None and results:
+            winner = max(results, key=lambda result: result.confidence)
+        if winner is None:
+            if error is not None and not results:
+                raise error
+            return None
+        metrics.increment(f'recognizer.{winner.backend}.wins')
+        metrics.observe('recognizer.race_time', time.perf_counter() - started)
+        return winner
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length"""
+    ref, hyp = reference.lower().split(), (hypothesis or '').lower().split()
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / float(len(ref)) if ref else float(bool(hyp))
+
+
+def load_corpus(directory):
+    """(AudioData, reference transcript) pairs from WAV files with matching .txt files"""
+    sr = profiler.import_module('speech_recognition')
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.wav'))):
+        transcript = os.path.splitext(path)[0] + '.txt'
+        if not os.path.exists(transcript):
+            continue
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+        with open(transcript, 'r', encoding='utf-8') as f:
+            corpus.append((audio, f.read().strip()))
+    return corpus
+
+
+def evaluate_backends(recognizers, corpus):
+    """Latency and word error rate of each recognizer on a corpus
+
+    recognizers maps a label to anything with recognize(audio) returning a
+    RecognitionResult or None: a single backend or a RacingRecognizer.
+    """
+    report = {}
+    for label, recognizer in recognizers.items():
+        latencies, errors, failures, wins = [], 0.0, 0, {}
+        for audio, reference in corpus:
+            started = time.perf_counter()
+            try:
+                result = recognizer.recognize(audio)
+            except Exception:
+                result = None
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+            errors += word_error_rate(reference, result.text if result else '')
+            if result:
+                wins[result.backend] = wins.get(result.backend, 0) + 1
+        latencies.sort()
+        report[label] = {
+            'p50': latencies[len(latencies) // 2] if latencies else None,
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+            'wer': errors / len(corpus) if corpus else None,
+            'failures': failures,
+            'wins': wins,
+        }
+    return report
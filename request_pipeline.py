@@ -0,0 +1,229 @@
+"""
+Request Pipeline - Runs Jarvis requests off the UI thread
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+from metrics import metrics
+from response_cache import normalize_query
+from utils import SentenceBuffer
+
+
+class FairQueue:
+    """Blocking queue that takes turns between sources (e.g. voice and text)
+
+    When max_pending is reached the oldest item of the busiest source is
+    dropped, so one chatty source cannot crowd out the other.
+    """
+    
+    def __init__(self, max_pending=None):
+        self.max_pending = max_pending
+        self.sources = OrderedDict()
+        self.size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+    
+    def put(self, source, item):
+        """Add item for source and return an item dropped to stay bounded, if any"""
+        dropped = None
+        with self._condition:
+            if self.max_pending and self.size >= self.max_pending:
+                busiest = max(self.sources.values(), key=len)
+                dropped = busiest.popleft()
+                self.size -= 1
+            self.sources.setdefault(source, deque()).append(item)
+            self.size += 1
+            self._condition.notify()
+        return dropped
+    
+    def get(self):
+        """Next item, round-robin across sources; None once closed"""
+        with self._condition:
+            while not self.size and not self._closed:
+                self._condition.wait()
+            if not self.size:
+                return None
+            for source, items in self.sources.items():
+                if items:
+                    break
+            item = items.popleft()
+            self.size -= 1
+            # The source just served goes to the back of the line
+            self.sources.move_to_end(source)
+            return item
+    
+    def close(self):
+        """Wake every waiting consumer"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+    
+    def __len__(self):
+        return self.size
+
+
+class Request:
+    """A command submitted to the pipeline"""
+    
+    QUEUED = 'queued'
+    PROCESSING = 'processing'
+    STREAMING = 'streaming'
+    DONE = 'done'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+    
+    def __init__(self, request_id, text, source):
+        self.id = request_id
+        self.text = text
+        self.key = normalize_query(text)
+        self.source = source
+        self.status = Request.QUEUED
+        self.submitted_at = time.perf_counter()
+        self.response = ''
+        self.first_audio_at = None
+        self._cancelled = threading.Event()
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    def cancel(self):
+        self._cancelled.set()
+
+
+class RequestPipeline:
+    """Bounded pool of worker threads that stream engine responses
+
+    Callbacks run on the worker threads:
+      on_status(request)          whenever request.status changes
+      on_chunk(request, text)     for every streamed chunk
+      on_sentence(request, text)  for every completed sentence
+    A new request normally supersedes everything still queued or running;
+    resubmitting the text of an active request returns that request instead.
+    Waiting requests are served round-robin across sources.
+    """
+    
+    def __init__(self, jarvis_engine, workers=2, max_pending=8,
+                 on_status=None, on_chunk=None, on_sentence=None):
+        self.jarvis_engine = jarvis_engine
+        self.on_status = on_status
+        self.on_chunk = on_chunk
+        self.on_sentence = on_sentence
+        self.pending = FairQueue(max_pending)
+        self.active = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._running = True
+        self.workers = []
+        for _ in range(workers):
+            worker = threading.Thread(target=self._worker)
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+    
+    def submit(self, text, source='text', supersede=True):
+        """Queue text for processing and return its Request"""
+        request = Request(next(self._ids), text, source)
+        metrics.increment('pipeline.submitted')
+        # One lock section, so a concurrent submit cannot slip in between
+        # the duplicate check, the supersede and registering the request
+        with self._lock:
+            for active in self.active:
+                if active.key == request.key and not active.cancelled:
+                    # Double submit: share the request already in flight
+                    metrics.increment('pipeline.coalesced')
+                    return active
+            if supersede:
+                self._cancel_active()
+            self.active.add(request)
+        dropped = self.pending.put(source, request)
+        if dropped:
+            dropped.cancel()
+            self._set_status(dropped, Request.CANCELLED)
+        metrics.set_gauge('pipeline.queue_depth', len(self.pending))
+        self._set_status(request, Request.QUEUED)
+        return request
+    
+    def cancel_all(self):
+        """Cancel every queued or running request"""
+        with self._lock:
+            self._cancel_active()
+    
+    def _cancel_active(self):
+        """Cancel every active request; the caller holds the lock"""
+        stale = list(self.active)
+        for request in stale:
+            request.cancel()
+        if stale:
+            metrics.increment('pipeline.cancelled', len(stale))
+    
+    def shutdown(self):
+        """Stop the workers once they finish their current request"""
+        self._running = False
+        self.cancel_all()
+        self.pending.close()
+    
+    def _set_status(self, request, status):
+        request.status = status
+        if status in (Request.DONE, Request.CANCELLED, Request.FAILED):
+            with self._lock:
+                self.active.discard(request)
+        if self.on_status:
+            self.on_status(request)
+    
+    def _worker(self):
+        while self._running:
+            request = self.pending.get()
+            if request is None:
+                return
+            metrics.set_gauge('pipeline.queue_depth', len(self.pending))
+            if request.cancelled:
+                self._set_status(request, Request.CANCELLED)
+                continue
+            try:
+                self._run(request)
+            except Exception as e:
+                print(f"Pipeline error: {e}")
+                self._set_status(request, Request.FAILED)
+    
+    def _run(self, request):
+        """Stream one request, stopping early if it is cancelled"""
+        metrics.observe('pipeline.queue_wait', time.perf_counter() - request.submitted_at)
+        self._set_status(request, Request.PROCESSING)
+        sentences = SentenceBuffer()
+        chunks = []
+        stream = self.jarvis_engine.process_command_stream(request.text)
+        try:
+            for text in stream:
+                if request.cancelled:
+                    break
+                if not chunks:
+                    metrics.observe('response.time_to_first_token', time.perf_counter() - request.submitted_at)
+                    self._set_status(request, Request.STREAMING)
+                chunks.append(text)
+                if self.on_chunk:
+                    self.on_chunk(request, text)
+                for sentence in sentences.feed(text):
+                    self._emit_sentence(request, sentence)
+        finally:
+            stream.close()
+        
+        request.response = ''.join(chunks)
+        if request.cancelled:
+            self._set_status(request, Request.CANCELLED)
+            return
+        for sentence in sentences.flush():
+            self._emit_sentence(request, sentence)
+        self._set_status(request, Request.DONE)
+    
+    def _emit_sentence(self, request, sentence):
+        if self.on_sentence and not request.cancelled:
+            self.on_sentence(request, sentence)
+    
+    def audio_started(self, request):
+        """Record time-to-first-audio when the request's first sentence plays"""
+        if request.first_audio_at is None:
+            request.first_audio_at = time.perf_counter()
+            metrics.observe('response.time_to_first_audio', request.first_audio_at - request.submitted_at)
@@ -0,0 +1,254 @@
+"""
+Resilient Client - Deadlines, retries, hedging and a circuit breaker for backend calls
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from metrics import metrics
+
+# Error types worth retrying, by class name so no SDK import is needed
+RETRYABLE_ERRORS = {
+    'TimeoutError', 'ConnectionError', 'ConnectionResetError', 'DeadlineExceeded',
+    'ServiceUnavailable', 'InternalServerError', 'ResourceExhausted', 'TooManyRequests',
+    'BackendTimeoutError',
+}
+
+
+def is_retryable(error):
+    """Transient errors that a retry may succeed on"""
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+class BackendTimeoutError(TimeoutError):
+    """No attempt finished before the request deadline"""
+
+
+class CircuitOpenError(Exception):
+    """The backend is considered unhealthy; the call was not attempted"""
+
+
+class LatencyTracker:
+    """Rolling latency percentiles used to derive deadlines and hedge delays"""
+    
+    def __init__(self, window=200, min_samples=20, default_deadline=30.0,
+                 min_deadline=2.0, max_deadline=60.0, deadline_factor=3.0):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.default_deadline = default_deadline
+        self.min_deadline = min_deadline
+        self.max_deadline = max_deadline
+        self.deadline_factor = deadline_factor
+        self._lock = threading.Lock()
+    
+    def observe(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+    
+    def percentile(self, pct):
+        """Latency percentile, or None until enough samples are seen"""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            values = sorted(self.samples)
+        return values[min(len(values) - 1, int(len(values) * pct / 100))]
+    
+    def deadline(self):
+        """Time budget for one request: a multiple of p99, within bounds"""
+        p99 = self.percentile(99)
+        if p99 is None:
+            return self.default_deadline
+        return min(self.max_deadline, max(self.min_deadline, p99 * self.deadline_factor))
+    
+    def hedge_delay(self):
+        """Send a duplicate request once the first has run past p95"""
+        return self.percentile(95)
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one probe through after a cool-down"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Whether a request may be sent now"""
+        with self._lock:
+            if self.state == CircuitBreaker.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = CircuitBreaker.HALF_OPEN
+                return True
+            if self.state == CircuitBreaker.HALF_OPEN:
+                # One probe at a time
+                return False
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self.state = CircuitBreaker.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != CircuitBreaker.OPEN:
+                    metrics.increment('resilience.circuit_opened')
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.monotonic()
+
+
+class AttemptGroup:
+    """The attempts of one call; on_settled runs once the call is over and the last attempt has finished"""
+    
+    def __init__(self, on_settled=None):
+        self.on_settled = on_settled
+        self.running = 0
+        self.closed = False
+        self._lock = threading.Lock()
+    
+    def submit(self, executor, fn, *args):
+        with self._lock:
+            self.running += 1
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        return future
+    
+    def _finished(self, future):
+        with self._lock:
+            self.running -= 1
+            settled = self.closed and self.running == 0
+        if settled:
+            self._settle()
+    
+    def close(self):
+        """No more attempts will be started"""
+        with self._lock:
+            self.closed = True
+            settled = self.running == 0
+        if settled:
+            self._settle()
+    
+    def _settle(self):
+        if self.on_settled:
+            try:
+                self.on_settled()
+            except Exception as e:
+                print(f"Attempt settle error: {e}")
+
+
+class ResilientClient:
+    """Runs backend calls with an adaptive deadline, jittered retries and hedging
+
+    ``call(attempt)`` takes a zero-argument callable that performs one
+    request. Attempts run on a small pool so a hung request can be
+    abandoned; its thread finishes in the background, and ``on_settled``
+    tells the caller when the last one has, e.g. to free a request slot.
+    Hedging sends a paid duplicate of each slow request, so it is opt-in.
+    """
+    
+    def __init__(self, name, tracker=None, breaker=None, max_retries=2, hedge=False,
+                 base_backoff=0.1, max_backoff=2.0, max_workers=8):
+        self.name = name
+        self.tracker = tracker or LatencyTracker()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-attempt")
+    
+    def call(self, attempt, on_settled=None):
+        """Return the result of the first successful attempt
+
+        on_settled is called exactly once, when every attempt this call
+        started has finished, including ones it abandoned.
+        """
+        group = AttemptGroup(on_settled)
+        try:
+            return self._call(attempt, group)
+        finally:
+            group.close()
+    
+    def _call(self, attempt, group):
+        if not self.breaker.allow():
+            metrics.increment(f'{self.name}.short_circuited')
+            raise CircuitOpenError(f"{self.name} is unavailable")
+        
+        started = time.perf_counter()
+        last_error = None
+        for retry in range(self.max_retries + 1):
+            if retry:
+                # Full jitter keeps retries from many clients apart
+                time.sleep(random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** retry)))
+                metrics.increment(f'{self.name}.retries')
+            try:
+                result = self._hedged(attempt, group)
+            except Exception as e:
+                last_error = e
+                if not is_retryable(e):
+                    # The backend answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                continue
+            self.breaker.record_success()
+            metrics.observe(f'{self.name}.latency', time.perf_counter() - started)
+            return result
+        
+        self.breaker.record_failure()
+        metrics.increment(f'{self.name}.failures')
+        raise last_error
+    
+    def _hedged(self, attempt, group):
+        """One logical request: a first attempt plus an optional hedge after p95"""
+        deadline = self.tracker.deadline()
+        started = time.perf_counter()
+        pending = {group.submit(self.executor, self._timed, attempt)}
+        hedge_delay = self.tracker.hedge_delay() if self.hedge else None
+        hedged = False
+        error = None
+        
+        while pending:
+            remaining = deadline - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            timeout = remaining
+            if hedge_delay is not None and not hedged:
+                timeout = min(remaining, max(0.0, hedge_delay - (time.perf_counter() - started)))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+            if hedge_delay is not None and not hedged and time.perf_counter() - started >= hedge_delay:
+                hedged = True
+                metrics.increment(f'{self.name}.hedged')
+                pending.add(group.submit(self.executor, self._timed, attempt))
+        
+        if error is not None and not pending:
+            raise error
+        metrics.increment(f'{self.name}.deadline_exceeded')
+        raise BackendTimeoutError(f"{self.name} did not respond within {deadline:.1f} s")
+    
+    def _timed(self, attempt):
+        started = time.perf_counter()
+        result = attempt()
+        self.tracker.observe(time.perf_counter() - started)
+        return result
@@ -0,0 +1,83 @@
+"""
+Response Cache - Two-tier cache of Gemini answers for repeated queries
+"""
+import hashlib
+import json
+import re
+import time
+
+from metrics import metrics
+from tiered_cache import TieredCache
+from utils import clean_text
+
+CACHE_FILE = "jarvis_cache.db"
+
+# Queries that refer back to the conversation or to the current moment
+# cannot be answered from a cache
+CONTEXT_DEPENDENT_PATTERN = re.compile(
+    r"\b(it|its|that|this|these|those|them|he|she|him|her|his|they|their|"
+    r"again|more|previous|earlier|above|before|continue|else|also|"
+    r"now|today|tonight|tomorrow|yesterday|currently|latest|recent|news)\b"
+)
+
+
+def normalize_query(query):
+    """Normalize a query so trivial variations share a cache entry"""
+    return clean_text(query).lower().rstrip('?.! ')
+
+
+def is_context_dependent(query):
+    """Check whether the answer to query depends on conversation or time"""
+    return CONTEXT_DEPENDENT_PATTERN.search(normalize_query(query)) is not None
+
+
+class ResponseCache:
+    """Gemini answers in a TieredCache, kept for a time to live
+
+    Entries are keyed on the normalized query together with the model name
+    and generation config, so changing either never serves stale answers.
+    """
+    
+    def __init__(self, path=CACHE_FILE, model_name='', generation_config=None,
+                 ttl=24 * 3600, memory_entries=256, disk_entries=5000):
+        self.ttl = ttl
+        self.model_signature = json.dumps([model_name, generation_config or {}], sort_keys=True)
+        self.store = TieredCache('response_cache', path, memory_entries, max_entries=disk_entries)
+    
+    def make_key(self, query):
+        """Cache key for query under the current model settings"""
+        material = f"{self.model_signature}\n{normalize_query(query)}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def is_cacheable(self, query):
+        """Context-dependent queries opt out of caching"""
+        return bool(normalize_query(query)) and not is_context_dependent(query)
+    
+    def get(self, query):
+        """Return the cached response for query, or None"""
+        if not self.is_cacheable(query):
+            metrics.increment('response_cache.bypass')
+            return None
+        return self.store.get(self.make_key(query))
+    
+    def put(self, query, response, latency=0.0, ttl=None):
+        """Store a response along with how long it took to produce"""
+        if not self.is_cacheable(query) or not response:
+            return
+        
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self.store.put(self.make_key(query), response, latency, expires_at)
+    
+    def stats(self):
+        """Hit, miss and latency-saved counters"""
+        stats = self.store.stats()
+        stats['bypassed'] = metrics.count('response_cache.bypass')
+        return stats
+    
+    def clear(self):
+        """Remove all cached responses"""
+        self.store.clear()
+    
+    def close(self):
+        """Close the on-disk store"""
+        self.store.close()
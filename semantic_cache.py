@@ -0,0 +1,289 @@
+"""
+Semantic Cache - Near-duplicate query cache backed by a NumPy vector index
+"""
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from metrics import metrics
+from response_cache import is_context_dependent, normalize_query
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+CONTRACTIONS = {
+    "what's": "what is", "who's": "who is", "where's": "where is", "how's": "how is", "it's": "it is",
+    "that's": "that is", "there's": "there is", "i'm": "i am", "you're": "you are", "what're": "what are",
+}
+
+# Politeness and address that do not change the question
+FILLER_PATTERN = re.compile(
+    r"\b(?:hey |ok |okay )?jarvis\b|\bplease\b|^(?:can|could|would|will) you (?=\S+ )|\btell me\b|"
+    r"\bdo you know\b|\bi (?:want|would like|need) to know\b|\bexactly\b|\bjust\b|\baway\b"
+)
+
+# Phrases rewritten to one wording before tokenizing
+PHRASES = [
+    (re.compile(r"\b%s\b" % phrase), replacement) for phrase, replacement in [
+        ("stand for", "mean"), ("short for", "mean"), ("able to", "can"), ("how far", "distance"),
+        ("how fast", "speed"), ("how tall", "height"), ("how high", "height"), ("written by", "write"),
+        ("author of", "write"), ("inventor of", "invent"), ("how to", "how do i"), ("how do you", "how do i"),
+    ]
+]
+
+# Words that ask the same thing in different words -> one canonical word
+SYNONYMS = {
+    'made': 'make', 'created': 'make', 'create': 'make', 'built': 'make', 'build': 'make',
+    'wrote': 'write', 'written': 'write', 'author': 'write',
+    'invented': 'invent', 'inventor': 'invent',
+    'discovered': 'discover', 'found': 'discover',
+    'big': 'large', 'bigger': 'large', 'biggest': 'large', 'larger': 'large', 'largest': 'large',
+    'smaller': 'small', 'smallest': 'small', 'tiny': 'small',
+    'tall': 'height', 'tallest': 'height', 'high': 'height', 'highest': 'height',
+    'fast': 'speed', 'far': 'distance',
+    'called': 'name', 'your': 'you', 'yours': 'you', 'yourself': 'you',
+    'explain': 'what', 'define': 'what', 'describe': 'what', 'meaning': 'mean', 'say': 'tell',
+}
+
+# Words that carry little of a question's meaning; weighted down rather than dropped
+STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'of', 'what', 'which', 'who', 'how', 'do', 'does', 'did',
+    'in', 'on', 'at', 'for', 'from', 'to', 'into', 'by', 'and', 'or', 'it', 'that', 'this', 'me', 'tell', 'some',
+    'there', 'many', 'much', 'have', 'has', 'can', 'i',
+}
+
+# Kept in word pairs so 'miles to kilometers' differs from 'kilometers to miles'
+DIRECTIONS = {'to', 'into', 'from'}
+
+STOPWORD_WEIGHT = 0.2
+BIGRAM_WEIGHT = 0.6
+
+# A question and its negation look alike but ask opposite things
+NEGATIONS = {'not', 'no', 'never', 'nothing', 'none', 'cannot'}
+
+# Words whose two sides swap in 'miles to km' vs 'km to miles' or 'pounds in a kilogram' vs 'kilograms in a pound'
+CONNECTIVES = ('to', 'into', 'from', 'in')
+
+# Cached queries considered per lookup, so an expired or ruled-out best match does not hide the next one
+SEARCH_CANDIDATES = 4
+
+
+def stem(word):
+    """Drop a plural ending: 'spiders' -> 'spider', 'countries' -> 'country'"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def canonical_words(text):
+    """Words of text with contractions expanded, filler dropped, and synonyms and plurals folded"""
+    text = ' '.join(CONTRACTIONS.get(word, word) for word in normalize_query(text).split())
+    text = FILLER_PATTERN.sub(' ', text)
+    for pattern, replacement in PHRASES:
+        text = pattern.sub(replacement, text)
+    words = []
+    for word in TOKEN_PATTERN.findall(text):
+        word = SYNONYMS.get(word, word)
+        if word not in STOPWORDS:
+            word = SYNONYMS.get(stem(word), stem(word))
+        words.append(word)
+    return words
+
+
+def is_negated(words):
+    return any(word in NEGATIONS or word.endswith("n't") for word in words)
+
+
+def is_reversed(a, b):
+    """Whether meaningful words on either side of a shared connective swap sides between a and b"""
+    for connective in CONNECTIVES:
+        if connective in a and connective in b:
+            sides = []
+            for words in (a, b):
+                at = words.index(connective)
+                sides.append(({word for word in words[:at] if word not in STOPWORDS},
+                              {word for word in words[at + 1:] if word not in STOPWORDS}))
+            (before_a, after_a), (before_b, after_b) = sides
+            return bool(before_a & after_b) and bool(after_a & before_b)
+    return False
+
+
+def ask_different_things(cached_query, query):
+    """Whether two similar queries still differ: other numbers, a negation on one side, or the other way round"""
+    if NUMBER_PATTERN.findall(cached_query) != NUMBER_PATTERN.findall(query):
+        return True
+    a, b = canonical_words(cached_query), canonical_words(query)
+    return is_negated(a) != is_negated(b) or is_reversed(a, b)
+
+
+class HashingEmbedder:
+    """Hashed bag of canonical words and word pairs with fixed weights, which works offline
+
+    Queries are reduced to canonical words (contractions expanded, filler
+    dropped, synonyms and plurals folded) so paraphrases share features.
+    The weights never change, so stored vectors stay comparable with new
+    ones and embed() is safe to call from any thread. The synonym lists
+    and the default threshold of SemanticCache were chosen on the tuning
+    pairs in ``benchmark.py``; ``benchmark.py semantic-pairs`` measures
+    them on a separate held-out set.
+    
+    Any object with a ``dim`` attribute and an ``embed(text)`` method that
+    returns a unit-length float32 vector can be used instead.
+    """
+    
+    def __init__(self, dim=256):
+        self.dim = dim
+    
+    def tokens(self, text):
+        """Canonical words of text"""
+        return canonical_words(text)
+    
+    def _features(self, text):
+        """(feature, weight) pairs: every word, and consecutive meaningful words"""
+        words = self.tokens(text)
+        features = [(word, STOPWORD_WEIGHT if word in STOPWORDS else 1.0) for word in words]
+        content = [word for word in words if word not in STOPWORDS or word in DIRECTIONS]
+        features.extend((f"{a} {b}", BIGRAM_WEIGHT) for a, b in zip(content, content[1:]))
+        return features
+    
+    def embed(self, text):
+        """Embed text as a unit-length float32 vector"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            hashed = zlib.crc32(feature.encode('utf-8'))
+            vector[hashed % self.dim] += -weight if hashed & 0x80000000 else weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """Contiguous float32 matrix of unit vectors with cosine top-k search
+
+    Once full, adding a vector overwrites the least recently used slot.
+    """
+    
+    def __init__(self, dim, capacity):
+        self.dim = dim
+        self.capacity = capacity
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+    
+    def add(self, vector, now=None):
+        """Store a vector and return its slot"""
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self.last_used))
+        self.vectors[slot] = vector
+        self.last_used[slot] = time.time() if now is None else now
+        return slot
+    
+    def touch(self, slot, now=None):
+        """Mark a slot as recently used"""
+        self.last_used[slot] = time.time() if now is None else now
+    
+    def search(self, query, k=1):
+        """Top-k slots and cosine scores for one query vector"""
+        slots, scores = self.search_batch(query[np.newaxis, :], k)
+        return slots[0], scores[0]
+    
+    def search_batch(self, queries, k=1):
+        """Top-k slots and cosine scores for a (n, dim) batch of queries"""
+        if self.size == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        
+        scores = queries @ self.vectors[:self.size].T
+        k = min(k, self.size)
+        if k < self.size:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(self.size), (len(queries), self.size))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class SemanticCache:
+    """Serves cached answers to queries similar to earlier ones
+
+    The most similar unexpired entry above the threshold is served, unless
+    ask_different_things() rules it out, in which case the next is tried.
+    """
+    
+    def __init__(self, embedder=None, capacity=10000, threshold=0.8, ttl=24 * 3600):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.ttl = ttl
+        self.index = VectorIndex(self.embedder.dim, capacity)
+        self.responses = [None] * capacity
+        self.expires_at = np.zeros(capacity, dtype=np.float64)
+        self._lock = threading.Lock()
+    
+    def get(self, query):
+        """Return the answer to the most similar cached query, or None"""
+        if not normalize_query(query) or is_context_dependent(query):
+            return None
+        
+        started = time.perf_counter()
+        vector = self.embedder.embed(query)
+        now = time.time()
+        hit = False
+        with self._lock:
+            slots, scores = self.index.search(vector, k=SEARCH_CANDIDATES)
+            for slot, score in zip(slots, scores):
+                if score < self.threshold:
+                    break
+                slot = int(slot)
+                if self.expires_at[slot] <= now:
+                    continue
+                cached_query, response, latency = self.responses[slot]
+                if not ask_different_things(cached_query, query):
+                    hit = True
+                    self.index.touch(slot, now)
+                    break
+        metrics.observe('semantic_cache.lookup_time', time.perf_counter() - started)
+        
+        if not hit:
+            metrics.increment('semantic_cache.miss')
+            return None
+        metrics.increment('semantic_cache.hit')
+        metrics.increment('semantic_cache.latency_saved', latency)
+        return response
+    
+    def put(self, query, response, latency=0.0):
+        """Remember the answer to query"""
+        if not response or not normalize_query(query) or is_context_dependent(query):
+            return
+        
+        vector = self.embedder.embed(query)
+        now = time.time()
+        with self._lock:
+            slots, scores = self.index.search(vector, k=1)
+            if len(slots) and scores[0] >= 1.0 - 1e-4:
+                # Same query again: refresh the existing entry
+                slot = int(slots[0])
+                self.index.touch(slot, now)
+            else:
+                slot = self.index.add(vector, now)
+            self.responses[slot] = (query, response, latency)
+            self.expires_at[slot] = now + self.ttl
+    
+    def stats(self):
+        """Hit, miss and latency-saved counters"""
+        hits = metrics.count('semantic_cache.hit')
+        misses = metrics.count('semantic_cache.miss')
+        return {
+            'entries': self.index.size,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'latency_saved': metrics.count('semantic_cache.latency_saved'),
+        }
@@ -0,0 +1,163 @@
+"""
+Speculative Execution - Prepare commands from partial transcripts while the user is still speaking
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+# Audio between partial recognitions of a phrase still being spoken, with an offline recognizer
+PARTIAL_INTERVAL = 0.5
+
+# Each partial sent to a cloud recognizer is a billed request and an upload,
+# so they are sparser and stop once the phrase is longer than a command
+CLOUD_PARTIAL_INTERVAL = 1.0
+CLOUD_PARTIAL_WINDOW = 2.0
+
+# A prepared action older than this is not trusted at commit time
+SPECULATION_TTL = 10.0
+
+# Longest a confirmed command waits for its preparation to finish
+PREPARE_TIMEOUT = 5.0
+
+# Intents whose slow first step can run ahead: name -> (SystemController
+# method that prepares the action, slot it is given)
+PREPARERS = {
+    'open_app': ('resolve_application', 'app'),
+    'close_app': ('find_app_processes', 'app'),
+}
+
+
+class PartialTranscriber:
+    """Recognizes a phrase again and again as it grows, reporting partial transcripts
+
+    ``feed(frame_data)`` appends captured PCM; every ``interval`` seconds of
+    new audio the phrase so far is recognized on a worker and
+    ``on_partial(text)`` is called. Only one recognition runs at a time and
+    audio that arrives meanwhile is picked up by the next one. With a
+    ``window``, audio past that many seconds is not recognized early.
+    """
+    
+    def __init__(self, recognize, on_partial, sample_rate, sample_width, interval=PARTIAL_INTERVAL, window=None):
+        self.recognize = recognize
+        self.on_partial = on_partial
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.interval_bytes = int(interval * sample_rate) * sample_width
+        self.window_bytes = int(window * sample_rate) * sample_width if window else None
+        self.frames = bytearray()
+        self.recognized_bytes = 0
+        self.last_text = None
+        self.busy = False
+        self.stopped = False
+        self._lock = threading.Lock()
+    
+    def feed(self, frame_data):
+        """Add captured audio, starting a partial recognition when enough is new"""
+        with self._lock:
+            if self.window_bytes and len(self.frames) >= self.window_bytes:
+                return
+            self.frames.extend(frame_data)
+            if self.busy or self.stopped or len(self.frames) - self.recognized_bytes < self.interval_bytes:
+                return
+            self.busy = True
+            self.recognized_bytes = len(self.frames)
+            prefix = bytes(self.frames)
+        thread = threading.Thread(target=self._recognize, args=(prefix,), name="partial-transcript")
+        thread.daemon = True
+        thread.start()
+    
+    def stop(self):
+        """The phrase has ended: drop partials still being recognized"""
+        with self._lock:
+            self.stopped = True
+    
+    def _recognize(self, prefix):
+        started = time.perf_counter()
+        try:
+            text = self.recognize(prefix, self.sample_rate, self.sample_width)
+        except Exception:
+            text = None
+        metrics.observe('speculation.partial_time', time.perf_counter() - started)
+        with self._lock:
+            self.busy = False
+            report = text and text != self.last_text and not self.stopped
+            if report:
+                self.last_text = text
+        if report:
+            metrics.increment('speculation.partials')
+            self.on_partial(text)
+
+
+class Speculation:
+    """An action prepared for an intent seen in a partial transcript"""
+    
+    def __init__(self, match, future):
+        self.match = match
+        self.future = future
+        self.created = time.monotonic()
+
+
+class SpeculativeExecutor:
+    """Prepares the action a partial transcript points to; nothing runs until the final transcript confirms it
+
+    Commands get their slow first step done ahead (an app's launch path, a
+    process list). Anything that is not a command is headed for Gemini, so
+    its connection is warmed with ``prewarm``. ``take(match)`` hands over
+    the prepared result only when the final transcript routes to the same
+    intent with the same slots; any other outcome discards it.
+    """
+    
+    def __init__(self, router, system_controller, prewarm=None, ttl=SPECULATION_TTL):
+        self.router = router
+        self.system_controller = system_controller
+        self.prewarm = prewarm
+        self.ttl = ttl
+        self.current = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation")
+        self._lock = threading.Lock()
+    
+    def partial(self, text):
+        """Speculate on a partial transcript"""
+        match = self.router.match(text)
+        if match is None:
+            if self.prewarm:
+                self.prewarm()
+            return
+        
+        with self._lock:
+            if self.current is not None and self.current.match == match:
+                return
+            preparer = PREPARERS.get(match.name)
+            if preparer is None or self.system_controller is None:
+                self.current = None
+                return
+            method, slot = preparer
+            prepare = getattr(self.system_controller, method)
+            self.current = Speculation(match, self.executor.submit(prepare, match.slots[slot]))
+        metrics.increment('speculation.prepared')
+    
+    def take(self, match):
+        """The action prepared for match, or None if there is none or it went stale"""
+        with self._lock:
+            speculation, self.current = self.current, None
+        if speculation is None:
+            return None
+        if speculation.match != match or time.monotonic() - speculation.created > self.ttl:
+            metrics.increment('speculation.discarded')
+            return None
+        try:
+            prepared = speculation.future.result(PREPARE_TIMEOUT)
+        except Exception:
+            metrics.increment('speculation.failed')
+            return None
+        metrics.increment('speculation.committed')
+        return prepared
+    
+    def discard(self):
+        """Forget the prepared action, e.g. when listening ends without a transcript"""
+        with self._lock:
+            if self.current is not None:
+                metrics.increment('speculation.discarded')
+            self.current = None
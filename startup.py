@@ -0,0 +1,132 @@
+"""
+Startup - Staged background initialization and startup profiling
+"""
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Records how long startup phases and lazy imports take"""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.imports = []
+        self.marks = []
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def phase(self, name):
+        """Time a block of startup work"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(self.phases, name, started)
+    
+    def import_module(self, name):
+        """Import a module on first use, timing the import"""
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        self._record(self.imports, name, started)
+        return module
+    
+    def mark(self, name):
+        """Note a milestone, e.g. the window becoming visible"""
+        with self._lock:
+            self.marks.append((name, time.perf_counter() - self.started))
+    
+    def _record(self, entries, name, started):
+        ended = time.perf_counter()
+        with self._lock:
+            entries.append((name, started - self.started, ended - started, threading.current_thread().name))
+    
+    def report(self):
+        """Human-readable timing report"""
+        lines = ["Startup profile", "=" * 50]
+        for title, entries in [("Phases", self.phases), ("Lazy imports", self.imports)]:
+            lines.append(f"{title}:")
+            for name, offset, duration, thread in sorted(entries, key=lambda entry: entry[1]):
+                lines.append(f"  {name:28s} {duration * 1000:8.1f} ms  (at {offset * 1000:7.1f} ms, {thread})")
+        lines.append("Milestones:")
+        for name, offset in self.marks:
+            lines.append(f"  {name:28s} {offset * 1000:8.1f} ms")
+        return '\n'.join(lines)
+
+
+class Component:
+    """Readiness of one background-initialized part of Jarvis"""
+    
+    PENDING = 'pending'
+    LOADING = 'loading'
+    READY = 'ready'
+    FAILED = 'failed'
+    
+    def __init__(self, name):
+        self.name = name
+        self.state = Component.PENDING
+        self.error = None
+        self.duration = None
+        self.done = threading.Event()
+    
+    def wait(self, timeout=None):
+        """Wait for initialization to finish; True if the component is ready"""
+        self.done.wait(timeout)
+        return self.state == Component.READY
+
+
+class StartupManager:
+    """Initializes components in parallel on background threads"""
+    
+    def __init__(self):
+        self.components = {}
+    
+    def start(self, name, initializer):
+        """Run initializer in the background and return its Component"""
+        component = Component(name)
+        self.components[name] = component
+        thread = threading.Thread(target=self._run, args=(component, initializer), name=f"startup-{name}")
+        thread.daemon = True
+        thread.start()
+        return component
+    
+    def _run(self, component, initializer):
+        component.state = Component.LOADING
+        started = time.perf_counter()
+        try:
+            with profiler.phase(component.name):
+                result = initializer()
+            # Initializers that follow the (success, message) convention can report failure
+            if isinstance(result, tuple) and result and result[0] is False:
+                raise RuntimeError(result[1])
+            component.state = Component.READY
+        except Exception as e:
+            print(f"Error initializing {component.name}: {e}")
+            component.error = e
+            component.state = Component.FAILED
+        component.duration = time.perf_counter() - started
+        component.done.set()
+        if all(c.done.is_set() for c in self.components.values()):
+            profiler.mark('all components ready')
+    
+    def states(self):
+        """Current state of every component"""
+        return {name: component.state for name, component in self.components.items()}
+    
+    def wait_all(self, timeout=None):
+        """Wait for every component to finish; True if all are ready"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for component in list(self.components.values()):
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            component.done.wait(remaining)
+        return all(component.state == Component.READY for component in self.components.values())
+
+
+# Shared profiler, started when Jarvis is first imported
+profiler = StartupProfiler()
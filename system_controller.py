@@ -4,8 +4,12 @@ System Controller - Handles system operations like opening/closing apps
 import subprocess
 import psutil
 import os
+import shutil
 import sys
 import pygetwindow as gw
+from app_index import AppIndex, registered_app_path
+from process_index import ProcessIndex, REFRESH_INTERVAL
+from system_sampler import SystemSampler, SAMPLE_INTERVAL, HISTORY_SECONDS, METRIC_ALIASES, describe_seconds, period_seconds
 
 class SystemController:
     """Controller for system-level operations"""
@@ -33,73 +37,200 @@ class SystemController:
             'command prompt': 'cmd.exe',
             'powershell': 'powershell.exe',
         }
+        # Start-menu shortcut names of common apps, for those not on PATH
+        self.app_shortcuts = {
+            'notepad': ['Notepad'],
+            'calculator': ['Calculator'],
+            'paint': ['Paint'],
+            'chrome': ['Google Chrome'],
+            'firefox': ['Firefox', 'Mozilla Firefox'],
+            'edge': ['Microsoft Edge'],
+            'explorer': ['File Explorer'],
+            'word': ['Word', 'Microsoft Word'],
+            'excel': ['Excel', 'Microsoft Excel'],
+            'powerpoint': ['PowerPoint', 'Microsoft PowerPoint'],
+            'vscode': ['Visual Studio Code'],
+            'vs code': ['Visual Studio Code'],
+            'visual studio code': ['Visual Studio Code'],
+            'spotify': ['Spotify'],
+            'discord': ['Discord'],
+            'teams': ['Microsoft Teams'],
+            'outlook': ['Outlook', 'Microsoft Outlook'],
+            'cmd': ['Command Prompt'],
+            'command prompt': ['Command Prompt'],
+            'powershell': ['Windows PowerShell'],
+        }
+        self.process_index = None
+        self.sampler = None
+        self.app_index = None
+        # Prime the CPU counters so a status question without the sampler never blocks to measure
+        psutil.cpu_percent(interval=None)
+    
+    def start_app_index(self):
+        """Load the installed-application index and rescan what changed, in the background"""
+        self.app_index = AppIndex()
+        self.app_index.start()
+    
+    def _app_index_ready(self):
+        """The application index once its refresh is done, else None"""
+        if self.app_index and self.app_index.ready.is_set():
+            return self.app_index
+        return None
+    
+    def start_process_index(self, interval=None):
+        """Keep an index of running processes in the background so close and list commands skip the full scan"""
+        self.process_index = ProcessIndex(interval or REFRESH_INTERVAL)
+        self.process_index.start()
+    
+    def start_system_sampler(self, interval=None, history_seconds=None):
+        """Sample CPU, memory, disk, network and load in the background so status questions answer instantly"""
+        self.sampler = SystemSampler(interval or SAMPLE_INTERVAL, history_seconds or HISTORY_SECONDS)
+        self.sampler.start()
+    
+    def _indexed(self):
+        """The process index once its first scan is done, else None"""
+        if self.process_index and self.process_index.ready.is_set():
+            return self.process_index
+        return None
+    
+    def close(self):
+        """Stop background work"""
+        if self.process_index:
+            self.process_index.stop()
+        if self.sampler:
+            self.sampler.stop()
+    
+    def resolve_application(self, app_name):
+        """Work out how to launch an application: its command line, or None if it is not installed
+        
+        This is the slow half of opening an app when there is no index (it
+        searches PATH), so it can run ahead, e.g. on a partial transcript.
+        """
+        names = self._launch_names(app_name)
+        index = self._app_index_ready()
+        for name in names:
+            if index:
+                entry = index.resolve(name)
+                if entry:
+                    return entry.command
+            else:
+                # Index still loading: search PATH
+                path = shutil.which(name)
+                if path:
+                    return [path]
+        
+        # Browsers and Office register their executable with Windows rather than PATH
+        for name in names:
+            if name.lower().endswith('.exe'):
+                path = registered_app_path(name)
+                if path:
+                    return [path]
+        
+        if index:
+            # Installed since the last scan? The next request will know
+            index.start()
+        return None
+    
+    def _launch_names(self, app_name):
+        """Names an application may be installed under, most specific first"""
+        app_name_lower = app_name.lower().strip()
+        names = [app_name_lower, f"{app_name_lower}.exe"]
+        if app_name_lower in self.common_apps:
+            # Common apps by executable, then by their Start-menu shortcut, then by the name given
+            names[:0] = [self.common_apps[app_name_lower]] + self.app_shortcuts.get(app_name_lower, [])
+        return names
+    
+    def is_application(self, app_name):
+        """Whether app_name names a known, installed or running application, without a full scan"""
+        app_name_lower = app_name.lower().strip()
+        if not app_name_lower:
+            return False
+        if app_name_lower in self.common_apps:
+            return True
+        
+        names = self._launch_names(app_name)
+        index = self._app_index_ready()
+        if index:
+            if any(index.resolve(name) for name in names):
+                return True
+        elif any(shutil.which(name) for name in names):
+            return True
+        running = self._indexed()
+        return bool(running and running.find(f"{app_name_lower}.exe"))
+    
+    def launch_application(self, app_name, command):
+        """Launch an application resolved by resolve_application"""
+        if command is None:
+            return False, f"Could not find application: {app_name}"
+        
+        try:
+            subprocess.Popen(command)
+            return True, f"Opening {app_name}"
+        except OSError as e:
+            return False, f"Could not launch {app_name}: {str(e)}"
     
     def open_application(self, app_name):
         """Open an application"""
         try:
-            app_name_lower = app_name.lower().strip()
-            
-            # Check common apps
-            if app_name_lower in self.common_apps:
-                subprocess.Popen(self.common_apps[app_name_lower])
-                return True, f"Opening {app_name}"
-            
-            # Try to open as is
-            try:
-                subprocess.Popen(app_name)
-                return True, f"Opening {app_name}"
-            except:
-                pass
-            
-            # Try with .exe extension
-            try:
-                subprocess.Popen(f"{app_name}.exe")
-                return True, f"Opening {app_name}"
-            except:
-                pass
-            
-            # Try using start command
-            try:
-                subprocess.Popen(f'start {app_name}', shell=True)
-                return True, f"Opening {app_name}"
-            except:
-                pass
-            
-            return False, f"Could not find application: {app_name}"
-            
+            return self.launch_application(app_name, self.resolve_application(app_name))
         except Exception as e:
             return False, f"Error opening {app_name}: {str(e)}"
     
+    def find_app_processes(self, app_name):
+        """Running processes of an application, the slow half of closing it"""
+        app_name_lower = app_name.lower().strip()
+        
+        # Get the process name
+        process_name = self.common_apps.get(app_name_lower, f"{app_name}.exe")
+        if not process_name.endswith('.exe'):
+            process_name += '.exe'
+        
+        index = self._indexed()
+        if index:
+            found = index.find(process_name)
+            if not found:
+                # Answer from the index; an app started since the last
+                # refresh is picked up by one run now in the background
+                index.request_refresh()
+            return [info.process for info in found]
+        
+        processes = []
+        for proc in psutil.process_iter(['name']):
+            try:
+                if proc.info['name'].lower() == process_name.lower():
+                    processes.append(proc)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, AttributeError):
+                continue
+        return processes
+    
+    def terminate_app_processes(self, app_name, processes):
+        """Terminate processes found by find_app_processes"""
+        closed = False
+        for proc in processes:
+            try:
+                proc.terminate()
+                closed = True
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        
+        if closed:
+            return True, f"Closed {app_name}"
+        else:
+            return False, f"{app_name} is not running"
+    
     def close_application(self, app_name):
         """Close an application"""
         try:
-            app_name_lower = app_name.lower().strip()
-            closed = False
-            
-            # Get the process name
-            process_name = self.common_apps.get(app_name_lower, f"{app_name}.exe")
-            if not process_name.endswith('.exe'):
-                process_name += '.exe'
-            
-            # Find and terminate the process
-            for proc in psutil.process_iter(['name']):
-                try:
-                    if proc.info['name'].lower() == process_name.lower():
-                        proc.terminate()
-                        closed = True
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            if closed:
-                return True, f"Closed {app_name}"
-            else:
-                return False, f"{app_name} is not running"
-                
+            return self.terminate_app_processes(app_name, self.find_app_processes(app_name))
         except Exception as e:
             return False, f"Error closing {app_name}: {str(e)}"
     
     def get_running_apps(self):
         """Get list of running applications"""
+        index = self._indexed()
+        if index:
+            return index.running_names()
+        
         try:
             apps = set()
             for proc in psutil.process_iter(['name']):
@@ -146,8 +277,18 @@ class SystemController:
     
     def get_system_info(self):
         """Get system information"""
+        current = self.sampler.current() if self.sampler else None
+        if current:
+            info = f"CPU Usage: {current['cpu']:.0f}%\n"
+            info += f"Memory Usage: {current['memory']:.0f}%\n"
+            info += f"Disk Usage: {current['disk']:.0f}%\n"
+            info += f"Network: {current['net_recv'] / 1024:.0f} KB/s down, {current['net_sent'] / 1024:.0f} KB/s up\n"
+            info += f"Load Average: {current['load']:.2f}"
+            return True, info
+        
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Sampler off or not sampled yet: usage since the previous call, or since startup
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
@@ -159,6 +300,36 @@ class SystemController:
         except Exception as e:
             return False, f"Error getting system info: {str(e)}"
     
+    def get_system_trend(self, metric, stat=None, period=None):
+        """Describe a system metric over a recent period: average, low, peak and now"""
+        if not self.sampler:
+            return False, "System history is turned off."
+        
+        column = METRIC_ALIASES.get(metric.lower(), metric.lower())
+        seconds = period_seconds(period)
+        summary = self.sampler.summary(column, seconds)
+        if summary is None or summary['samples'] < 2:
+            return False, "I haven't collected enough system history yet."
+        
+        if column in ('network', 'disk_read', 'disk_write', 'net_sent', 'net_recv'):
+            show = lambda value: f"{value / 1024:.0f} KB/s"
+        elif column == 'load':
+            show = lambda value: f"{value:.2f}"
+        else:
+            show = lambda value: f"{value:.0f}%"
+        label = 'CPU' if column == 'cpu' else column.replace('_', ' ')
+        span = describe_seconds(min(seconds, max(summary['covered'], 1)))
+        
+        stat = (stat or '').lower()
+        if stat in ('peak', 'max', 'maximum', 'highest'):
+            return True, f"Peak {label} over the last {span} was {show(summary['max'])} (average {show(summary['mean'])})"
+        if stat in ('lowest', 'min', 'minimum'):
+            return True, f"Lowest {label} over the last {span} was {show(summary['min'])} (average {show(summary['mean'])})"
+        if stat == 'average':
+            return True, f"Average {label} over the last {span} was {show(summary['mean'])} (peak {show(summary['max'])})"
+        return True, (f"{label[0].upper() + label[1:]} over the last {span}: average {show(summary['mean'])}, "
+                      f"low {show(summary['min'])}, peak {show(summary['max'])}, now {show(summary['latest'])}")
+    
     def shutdown_system(self):
         """Shutdown the system"""
         try:
@@ -0,0 +1,229 @@
+"""
+System Sampler - CPU, memory, disk, network and load sampled in the background into ring buffers
+"""
+import re
+import threading
+import time
+
+import numpy as np
+import psutil
+
+from metrics import metrics
+
+# Seconds between samples, and how much history is kept
+SAMPLE_INTERVAL = 2.0
+HISTORY_SECONDS = 3600
+
+# The first sample comes sooner so status questions are answered from the sampler early on
+FIRST_SAMPLE_DELAY = 0.5
+
+# Share of one core the sampler may use; it samples less often to stay within it
+CPU_BUDGET = 0.002
+
+# Columns of the system series: percentages, byte rates and the 1-minute load average
+COLUMNS = ['cpu', 'memory', 'disk', 'disk_read', 'disk_write', 'net_sent', 'net_recv', 'load']
+
+# Spoken metric names -> column
+METRIC_ALIASES = {
+    'cpu': 'cpu',
+    'processor': 'cpu',
+    'memory': 'memory',
+    'ram': 'memory',
+    'disk': 'disk',
+    'network': 'network',
+    'load': 'load',
+}
+
+# Period used when a trend question does not give one
+DEFAULT_PERIOD_SECONDS = 600
+
+UNIT_SECONDS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+PERIOD_PATTERN = re.compile(r"(?:last|past)\s+(?:(\d+|an?)\s+)?(second|minute|hour)s?")
+
+
+def period_seconds(period):
+    """Seconds in a spoken period like 'last 10 minutes' or 'past hour'; the default for None"""
+    if not period:
+        return DEFAULT_PERIOD_SECONDS
+    found = PERIOD_PATTERN.search(period.lower())
+    if not found:
+        return DEFAULT_PERIOD_SECONDS
+    amount = found.group(1)
+    count = int(amount) if amount and amount.isdigit() else 1
+    return count * UNIT_SECONDS[found.group(2)]
+
+
+def describe_seconds(seconds):
+    """'10 minutes', 'hour', '45 seconds'"""
+    for unit in ('hour', 'minute', 'second'):
+        count = int(round(seconds / UNIT_SECONDS[unit]))
+        if seconds >= UNIT_SECONDS[unit] and abs(count * UNIT_SECONDS[unit] - seconds) < UNIT_SECONDS[unit] / 2.0:
+            return unit if count == 1 else f"{count} {unit}s"
+    return f"{int(seconds)} seconds"
+
+
+class RingSeries:
+    """Fixed-size time series: timestamps and rows of values in NumPy ring buffers"""
+    
+    def __init__(self, capacity, width):
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros((capacity, width), dtype=np.float32)
+        self.count = 0
+        self.position = 0
+    
+    def append(self, timestamp, row):
+        self.times[self.position] = timestamp
+        self.values[self.position] = row
+        self.position = (self.position + 1) % len(self.times)
+        self.count = min(len(self.times), self.count + 1)
+    
+    def latest(self):
+        """(timestamp, row) of the newest entry, or None"""
+        if not self.count:
+            return None
+        index = self.position - 1
+        return self.times[index], self.values[index]
+    
+    def window(self, since):
+        """(times, values) of entries at or after since, oldest first"""
+        if self.count < len(self.times):
+            times, values = self.times[:self.count], self.values[:self.count]
+        else:
+            times = np.concatenate((self.times[self.position:], self.times[:self.position]))
+            values = np.concatenate((self.values[self.position:], self.values[:self.position]))
+        start = np.searchsorted(times, since)
+        return times[start:], values[start:]
+
+
+class SystemSampler:
+    """Samples system counters on a background thread so status questions never wait
+
+    Each sample is one row of COLUMNS plus one row of per-core CPU, kept in
+    ring buffers covering history_seconds. Byte counters are stored as
+    rates since the previous sample. The time spent sampling is tracked,
+    and the interval stretches whenever it would exceed cpu_budget.
+    """
+    
+    def __init__(self, interval=SAMPLE_INTERVAL, history_seconds=HISTORY_SECONDS, cpu_budget=CPU_BUDGET,
+                 disk_path='/'):
+        self.interval = interval
+        self.base_interval = interval
+        self.cpu_budget = cpu_budget
+        self.disk_path = disk_path
+        capacity = max(2, int(history_seconds / interval))
+        self.series = RingSeries(capacity, len(COLUMNS))
+        self.cores = RingSeries(capacity, psutil.cpu_count() or 1)
+        self.samples = 0
+        self.cpu_seconds = 0.0
+        self.started_at = None
+        self.previous = None
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Sample on a background thread"""
+        self._stop.clear()
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="system-sampler")
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def sample(self):
+        """Take one sample now"""
+        cpu_started = time.thread_time()
+        now = time.time()
+        # Non-blocking: usage since the previous call
+        per_core = psutil.cpu_percent(interval=None, percpu=True)
+        memory = psutil.virtual_memory().percent
+        try:
+            disk = psutil.disk_usage(self.disk_path).percent
+        except OSError:
+            disk = 0.0
+        disk_io = psutil.disk_io_counters()
+        net_io = psutil.net_io_counters()
+        try:
+            load = psutil.getloadavg()[0]
+        except (AttributeError, OSError):
+            load = 0.0
+        
+        counters = (
+            now,
+            disk_io.read_bytes if disk_io else 0,
+            disk_io.write_bytes if disk_io else 0,
+            net_io.bytes_sent if net_io else 0,
+            net_io.bytes_recv if net_io else 0,
+        )
+        rates = [0.0] * 4
+        if self.previous is not None:
+            elapsed = max(counters[0] - self.previous[0], 1e-6)
+            rates = [max(0.0, (current - last) / elapsed) for current, last in zip(counters[1:], self.previous[1:])]
+        self.previous = counters
+        
+        with self._lock:
+            self.series.append(now, [sum(per_core) / len(per_core), memory, disk] + rates + [load])
+            self.cores.append(now, per_core[:self.cores.values.shape[1]])
+            self.samples += 1
+        
+        cost = time.thread_time() - cpu_started
+        self.cpu_seconds += cost
+        metrics.observe('system_sampler.sample_time', cost)
+        self.ready.set()
+        return cost
+    
+    def current(self):
+        """Latest sample as a dict of COLUMNS plus 'cores', or None before the first"""
+        with self._lock:
+            latest = self.series.latest()
+            if latest is None:
+                return None
+            values = dict(zip(COLUMNS, (float(value) for value in latest[1])))
+            values['time'] = float(latest[0])
+            values['cores'] = [float(value) for value in self.cores.latest()[1]]
+        return values
+    
+    def summary(self, column, seconds):
+        """Mean, min, max and latest of a column over the last seconds, with the time actually covered"""
+        with self._lock:
+            times, values = self.series.window(time.time() - seconds)
+            if not len(times):
+                return None
+            if column == 'network':
+                data = values[:, COLUMNS.index('net_sent')] + values[:, COLUMNS.index('net_recv')]
+            else:
+                data = values[:, COLUMNS.index(column)].copy()
+            covered = float(times[-1] - times[0])
+        return {
+            'mean': float(data.mean()),
+            'min': float(data.min()),
+            'max': float(data.max()),
+            'latest': float(data[-1]),
+            'samples': len(data),
+            'covered': covered,
+        }
+    
+    def overhead(self):
+        """Share of one core spent sampling since start"""
+        if not self.started_at:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.cpu_seconds / elapsed if elapsed > 0 else 0.0
+    
+    def _run(self):
+        # Prime the CPU counters so the first sample measures a real interval
+        psutil.cpu_percent(interval=None, percpu=True)
+        delay = min(self.interval, FIRST_SAMPLE_DELAY)
+        while not self._stop.wait(delay):
+            try:
+                cost = self.sample()
+            except Exception as e:
+                print(f"System sampler error: {e}")
+                continue
+            # Sample less often if this one would break the budget
+            self.interval = max(self.base_interval, cost / self.cpu_budget)
+            delay = self.interval
@@ -92,9 +92,27 @@ def test_voice_handler():
         voice = VoiceHandler(config)
         print("  ✓ Voice handler initialized")
         
+        # Test speech recognition and the microphone
+        voice.init_recognition()
+        if voice.microphone is None:
+            print("  ✗ Microphone could not be found")
+            return False
+        # Opening the stream raises if the device cannot be used
+        with voice.microphone:
+            pass
+        print("  ✓ Microphone works")
+        
         # Test TTS
         print("  ℹ Testing text-to-speech (you should hear this)...")
-        voice.speak("Testing voice output")
+        voice.init_tts()
+        if voice.tts_worker is None:
+            print("  ✗ Text-to-speech engine could not be started")
+            return False
+        if not voice.speak("Testing voice output"):
+            print("  ✗ Text-to-speech did not finish")
+            voice.close()
+            return False
+        voice.close()
         print("  ✓ Text-to-speech works")
         
         return True
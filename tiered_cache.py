@@ -0,0 +1,223 @@
+"""
+Tiered Cache - In-memory LRU in front of a SQLite store, shared by the response and audio caches
+"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import metrics
+
+# Disk reads whose last-access times are held back and written together
+ACCESS_BATCH = 64
+
+
+class MemoryTier:
+    """In-memory LRU tier; entries hold (value, cost, expires_at, persisted)"""
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+    
+    def get(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] <= now:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+    
+    def put(self, key, value, cost, expires_at, persisted):
+        self.entries[key] = (value, cost, expires_at, persisted)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def clear(self):
+        self.entries.clear()
+
+
+class DiskTier:
+    """SQLite tier that survives restarts, bounded by entry count, total size or both
+
+    Reads only note the access time; the times are written in one
+    statement every ACCESS_BATCH reads and before anything is evicted.
+    """
+    
+    def __init__(self, path, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.accessed = {}
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, cost REAL NOT NULL, expires_at REAL, "
+            "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access)")
+        self.connection.commit()
+        self.total_bytes = self._measure()
+    
+    def _measure(self):
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+    
+    def get(self, key, now):
+        row = self.connection.execute(
+            "SELECT value, cost, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[2] is not None and row[2] <= now:
+            self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.connection.commit()
+            self.accessed.pop(key, None)
+            self.total_bytes = self._measure()
+            return None
+        self.accessed[key] = now
+        if len(self.accessed) >= ACCESS_BATCH:
+            self.write_accesses()
+            self.connection.commit()
+        return row
+    
+    def write_accesses(self):
+        """Write the access times noted since the last call"""
+        if self.accessed:
+            self.connection.executemany(
+                "UPDATE entries SET last_access = ? WHERE key = ?",
+                [(now, key) for key, now in self.accessed.items()]
+            )
+            self.accessed = {}
+    
+    def contains(self, key):
+        return self.connection.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+    
+    def put(self, key, value, cost, expires_at, now):
+        size = len(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        previous = self.connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (key, value, cost, expires_at, size, now)
+        )
+        self.total_bytes += size - (previous[0] if previous else 0)
+        self.accessed.pop(key, None)
+        self.evict(now)
+        self.connection.commit()
+    
+    def evict(self, now):
+        """Drop expired entries, then the least recently used until the store fits its bounds"""
+        self.write_accesses()
+        deleted = self.connection.execute(
+            "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        if self.max_entries is not None:
+            deleted += self.connection.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        if deleted:
+            self.total_bytes = self._measure()
+        while self.max_bytes is not None and self.total_bytes > self.max_bytes:
+            row = self.connection.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                self.total_bytes = 0
+                break
+            self.connection.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            self.total_bytes -= row[1]
+    
+    def clear(self):
+        self.connection.execute("DELETE FROM entries")
+        self.connection.commit()
+        self.accessed = {}
+        self.total_bytes = 0
+    
+    def close(self):
+        self.write_accesses()
+        self.connection.commit()
+        self.connection.close()
+
+
+class TieredCache:
+    """LRU memory tier in front of a persistent SQLite tier
+
+    Every entry carries a cost, the time it took to produce, which hits add
+    to '<name>.latency_saved'; lookups count '<name>.hit.memory',
+    '<name>.hit.disk' and '<name>.miss'. Values pass through encode/decode
+    on their way to and from disk. An entry can be kept in memory only and
+    written through to disk on a later hit.
+    """
+    
+    def __init__(self, name, path, memory_entries=256, max_entries=None, max_bytes=None, encode=None, decode=None):
+        self.name = name
+        self.encode = encode or (lambda value: value)
+        self.decode = decode or (lambda value: value)
+        self.memory = MemoryTier(memory_entries)
+        self.disk = DiskTier(path, max_entries, max_bytes)
+        self._lock = threading.Lock()
+    
+    def get(self, key, persist=False):
+        """Return the cached value for key, or None; persist writes a memory-only entry to disk on this hit"""
+        now = time.time()
+        with self._lock:
+            entry = self.memory.get(key, now)
+            tier = 'memory'
+            if entry is None:
+                row = self.disk.get(key, now)
+                tier = 'disk'
+                if row is not None:
+                    entry = (self.decode(row[0]), row[1], row[2], True)
+                    self.memory.put(key, *entry)
+            elif persist and not entry[3]:
+                self.disk.put(key, self.encode(entry[0]), entry[1], entry[2], now)
+                self.memory.put(key, entry[0], entry[1], entry[2], True)
+        
+        if entry is None:
+            metrics.increment(f'{self.name}.miss')
+            return None
+        
+        metrics.increment(f'{self.name}.hit.{tier}')
+        metrics.increment(f'{self.name}.latency_saved', entry[1])
+        return entry[0]
+    
+    def contains(self, key):
+        """Whether key is cached, without counting a lookup"""
+        with self._lock:
+            return self.memory.get(key, time.time()) is not None or self.disk.contains(key)
+    
+    def put(self, key, value, cost=0.0, expires_at=None, persist=True):
+        """Store a value with the time it took to produce; persist=False keeps it in memory only"""
+        now = time.time()
+        with self._lock:
+            self.memory.put(key, value, cost, expires_at, persist)
+            if persist:
+                self.disk.put(key, self.encode(value), cost, expires_at, now)
+    
+    def stats(self):
+        """Hit, miss and latency-saved counters"""
+        memory_hits = metrics.count(f'{self.name}.hit.memory')
+        disk_hits = metrics.count(f'{self.name}.hit.disk')
+        misses = metrics.count(f'{self.name}.miss')
+        lookups = memory_hits + disk_hits + misses
+        return {
+            'memory_hits': memory_hits,
+            'disk_hits': disk_hits,
+            'misses': misses,
+            'hit_rate': (memory_hits + disk_hits) / lookups if lookups else 0.0,
+            'latency_saved': metrics.count(f'{self.name}.latency_saved'),
+            'disk_bytes': self.disk.total_bytes,
+        }
+    
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self.memory.clear()
+            self.disk.clear()
+    
+    def close(self):
+        """Close the on-disk store"""
+        with self._lock:
+            self.disk.close()
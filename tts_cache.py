@@ -0,0 +1,101 @@
+"""
+TTS Cache - Synthesized audio for recurring phrases, in memory and on disk
+"""
+import hashlib
+import json
+import sqlite3
+import struct
+import threading
+from collections import OrderedDict
+
+from tiered_cache import TieredCache
+from tts_worker import RenderedAudio
+
+CACHE_FILE = "jarvis_tts_cache.db"
+
+# Disk budget for cached audio; least recently played phrases go first
+MAX_DISK_BYTES = 50 * 1024 * 1024
+
+# Rendered phrases kept in memory for instant playback
+MEMORY_ENTRIES = 64
+
+# Phrases remembered as rendered this session, so a second rendering is known to be a repeat
+SEEN_ENTRIES = 1024
+
+# Sample rate, channels and sample width ahead of the frames of stored audio
+AUDIO_HEADER = struct.Struct('<IHH')
+
+
+def encode_audio(rendered):
+    """RenderedAudio as one blob for the disk tier"""
+    header = AUDIO_HEADER.pack(rendered.sample_rate, rendered.channels, rendered.sample_width)
+    return sqlite3.Binary(header + rendered.frames)
+
+
+def decode_audio(blob):
+    """RenderedAudio from a blob written by encode_audio"""
+    blob = bytes(blob)
+    sample_rate, channels, sample_width = AUDIO_HEADER.unpack_from(blob)
+    return RenderedAudio(blob[AUDIO_HEADER.size:], sample_rate, channels, sample_width)
+
+
+class TTSCache:
+    """Rendered audio in a TieredCache, bounded on disk by total size
+
+    Entries are keyed on the exact text together with the voice, rate and
+    volume it was rendered with, so changing any of them renders afresh.
+    Every rendered sentence is kept in memory, but only prerendered phrases
+    and phrases that come round again are written to disk; one-off answers
+    never reach it.
+    """
+    
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_DISK_BYTES, memory_entries=MEMORY_ENTRIES):
+        self.store = TieredCache('tts_cache', path, memory_entries, max_bytes=max_bytes,
+                                 encode=encode_audio, decode=decode_audio)
+        self.seen = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def make_key(self, text, voice_settings):
+        """Cache key for text spoken with the given engine settings"""
+        material = json.dumps([text.strip(), voice_settings], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+    
+    def get(self, text, voice_settings):
+        """Return cached RenderedAudio for text, or None; a phrase played again is written to disk"""
+        return self.store.get(self.make_key(text, voice_settings), persist=True)
+    
+    def contains(self, text, voice_settings):
+        """Whether text is cached, without counting a lookup"""
+        return self.store.contains(self.make_key(text, voice_settings))
+    
+    def put(self, text, voice_settings, rendered, synthesis_time, persist=False):
+        """Store rendered audio along with how long it took to synthesize
+        
+        It goes to disk if persist is set, e.g. when prerendering, or if the
+        phrase was rendered before this session and has left memory since.
+        """
+        if not text.strip() or not rendered.frames:
+            return
+        
+        key = self.make_key(text, voice_settings)
+        with self._lock:
+            repeated = key in self.seen
+            self.seen[key] = True
+            self.seen.move_to_end(key)
+            while len(self.seen) > SEEN_ENTRIES:
+                self.seen.popitem(last=False)
+        self.store.put(key, rendered, synthesis_time, persist=persist or repeated)
+    
+    def stats(self):
+        """Hit, miss and latency-saved counters"""
+        return self.store.stats()
+    
+    def clear(self):
+        """Remove all cached audio"""
+        self.store.clear()
+        with self._lock:
+            self.seen.clear()
+    
+    def close(self):
+        """Close the on-disk store"""
+        self.store.close()
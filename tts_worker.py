@@ -0,0 +1,363 @@
+"""
+TTS Worker - A single thread owns the speech engine; sentences are rendered ahead and played with barge-in
+"""
+import itertools
+import os
+import queue
+import tempfile
+import threading
+import time
+import wave
+
+from metrics import metrics
+from startup import profiler
+from utils import split_sentences
+
+# Utterance priorities; lower is spoken first
+URGENT = 0
+NORMAL = 1
+LOW = 2
+
+# Engine property changes and shutdown jump the queue
+_CONTROL = -1
+
+# Rendered sentences waiting for playback while the next one is synthesized
+RENDER_AHEAD = 2
+
+# Sorts after every utterance: tells the playback thread to exit
+_SHUTDOWN = 99
+
+# Playback chunk; cancellation takes effect between chunks
+PLAYBACK_CHUNK_FRAMES = 1024
+
+
+class Speech:
+    """One say() request, spoken as one or more sentences"""
+    
+    def __init__(self, text, sentences, priority, on_start, generation, play=True):
+        self.text = text
+        self.sentences = sentences
+        self.priority = priority
+        self.on_start = on_start
+        self.generation = generation
+        self.play = play
+        self.submitted_at = time.perf_counter()
+        self.done = threading.Event()
+    
+    @classmethod
+    def for_text(cls, text, priority=NORMAL, on_start=None):
+        """A Speech for text, split into sentences; the worker stamps its generation when it is submitted"""
+        return cls(text, split_sentences(text) or [text], priority, on_start, None)
+
+
+class RenderedAudio:
+    """Synthesized PCM audio ready to play"""
+    
+    def __init__(self, frames, sample_rate, channels, sample_width):
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+    
+    @classmethod
+    def from_wav(cls, path):
+        with wave.open(path, 'rb') as wav:
+            return cls(wav.readframes(wav.getnframes()), wav.getframerate(), wav.getnchannels(), wav.getsampwidth())
+    
+    @property
+    def duration(self):
+        return len(self.frames) / float(self.sample_rate * self.channels * self.sample_width)
+
+
+class PyAudioPlayer:
+    """Plays rendered audio on output streams kept open per format"""
+    
+    def __init__(self):
+        pyaudio = profiler.import_module('pyaudio')
+        self.pyaudio = pyaudio
+        self.audio = pyaudio.PyAudio()
+        self.streams = {}
+    
+    def play(self, rendered, should_stop):
+        """Play audio in chunks; returns False if should_stop() interrupted it"""
+        key = (rendered.sample_rate, rendered.channels, rendered.sample_width)
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = self.audio.open(
+                format=self.audio.get_format_from_width(rendered.sample_width),
+                channels=rendered.channels,
+                rate=rendered.sample_rate,
+                output=True
+            )
+        chunk = PLAYBACK_CHUNK_FRAMES * rendered.channels * rendered.sample_width
+        for offset in range(0, len(rendered.frames), chunk):
+            if should_stop():
+                return False
+            stream.write(rendered.frames[offset:offset + chunk])
+        return True
+    
+    def close(self):
+        for stream in self.streams.values():
+            stream.close()
+        self.streams = {}
+        self.audio.terminate()
+
+
+class TTSWorker:
+    """Owns the pyttsx3 engine and speaks a priority queue of utterances
+
+    With an audio player available, the engine renders each sentence to a
+    file and a playback thread plays it while the next sentence is being
+    rendered; cancel() stops playback within one chunk, and an urgent
+    utterance plays at the next sentence boundary. Without one, the engine
+    speaks directly, one sentence at a time; so does a sentence that fails
+    to render, once the sentences queued before it have played.
+    
+    With a TTSCache, recurring sentences play from the cache without
+    synthesis; prerendered phrases are stored on disk straight away.
+    """
+    
+    def __init__(self, create_engine, player_factory=PyAudioPlayer, render=True, cache=None):
+        self.create_engine = create_engine
+        self.player_factory = player_factory
+        self.render = render
+        self.cache = cache
+        self.engine = None
+        self.player = None
+        self.voice_settings = {}
+        self.generation = 0
+        self.pending = queue.PriorityQueue()
+        self.rendered = queue.PriorityQueue(maxsize=RENDER_AHEAD)
+        self.ready = threading.Event()
+        self.speaking = threading.Event()
+        self.speaking_directly = False
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+    
+    @property
+    def is_speaking(self):
+        return self.speaking.is_set()
+    
+    def start(self):
+        """Start the synthesis thread, which creates the engine"""
+        thread = threading.Thread(target=self._synthesize_loop, name="tts-synthesis")
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+    
+    def say(self, text, priority=NORMAL, on_start=None):
+        """Queue text to be spoken sentence by sentence; returns its Speech"""
+        return self.submit(Speech.for_text(text, priority, on_start))
+    
+    def submit(self, speech):
+        """Queue a Speech created ahead, e.g. while the worker was starting; returns it"""
+        with self._lock:
+            speech.generation = self.generation
+            for index in range(len(speech.sentences)):
+                self.pending.put((speech.priority, next(self._sequence), speech, index, time.perf_counter()))
+        return speech
+    
+    def prerender(self, phrases):
+        """Render phrases into the cache in the background, ahead of being spoken; returns their Speech"""
+        speeches = []
+        with self._lock:
+            for text in phrases:
+                speech = Speech(text, split_sentences(text) or [text], LOW, None, self.generation, play=False)
+                for index, sentence in enumerate(speech.sentences):
+                    self.pending.put((LOW, next(self._sequence), speech, index, time.perf_counter()))
+                speeches.append(speech)
+        return speeches
+    
+    def cancel(self):
+        """Barge-in: drop everything queued and stop what is playing"""
+        with self._lock:
+            self.generation += 1
+            dropped = self._drain(self.pending) + self._drain(self.rendered)
+        metrics.increment('tts.cancelled')
+        if dropped:
+            metrics.increment('tts.cancelled_sentences', dropped)
+        if self.speaking_directly and self.engine is not None:
+            # Speaking directly: only the engine can interrupt itself
+            try:
+                self.engine.stop()
+            except Exception:
+                pass
+    
+    def set_property(self, name, value):
+        """Change an engine property on the thread that owns the engine"""
+        self.pending.put((_CONTROL, next(self._sequence), None, name, value))
+    
+    def stop(self):
+        """Cancel speech and end the worker threads"""
+        self.cancel()
+        self.pending.put((_CONTROL, next(self._sequence), None, None, None))
+    
+    def _drain(self, items):
+        """Empty a queue of sentences, finishing their Speech; control and prerender items are kept"""
+        dropped = 0
+        kept = []
+        while True:
+            try:
+                item = items.get_nowait()
+            except queue.Empty:
+                break
+            items.task_done()
+            speech = item[2]
+            if speech is None or not speech.play:
+                kept.append(item)
+                continue
+            speech.done.set()
+            dropped += 1
+        for item in kept:
+            items.put_nowait(item)
+        return dropped
+    
+    def _cancelled(self, speech):
+        return speech.generation != self.generation
+    
+    def _synthesize_loop(self):
+        try:
+            self.engine = self.create_engine()
+            self.voice_settings = {name: self.engine.getProperty(name) for name in ('voice', 'rate', 'volume')}
+        except Exception as e:
+            print(f"TTS Error: {e}")
+        if self.engine is not None and self.render and self.player_factory:
+            try:
+                self.player = self.player_factory()
+                playback = threading.Thread(target=self._playback_loop, name="tts-playback")
+                playback.daemon = True
+                playback.start()
+                self._threads.append(playback)
+            except Exception as e:
+                print(f"TTS playback unavailable, speaking directly: {e}")
+                self.player = None
+        self.ready.set()
+        
+        while True:
+            priority, _, speech, index, queued_at = self.pending.get()
+            if priority == _CONTROL:
+                if index is None:
+                    break
+                self._apply_property(index, queued_at)
+                continue
+            if not speech.play:
+                self._prerender(speech, index)
+                continue
+            if self.engine is None or self._cancelled(speech):
+                speech.done.set()
+                continue
+            metrics.observe('tts.queue_latency', time.perf_counter() - queued_at)
+            if self.player:
+                try:
+                    rendered = self._render(speech.sentences[index])
+                except Exception as e:
+                    # e.g. save_to_file writes AIFF on macOS: speak this
+                    # sentence directly once the ones queued before it played
+                    print(f"TTS Error: {e}")
+                    metrics.increment('tts.render_failed')
+                    self.rendered.join()
+                    rendered = None
+                if self._cancelled(speech):
+                    speech.done.set()
+                elif rendered is None:
+                    self._speak_directly(speech, index)
+                else:
+                    self.rendered.put((priority, next(self._sequence), speech, index, rendered))
+                continue
+            self._speak_directly(speech, index)
+        
+        if self.player:
+            self.rendered.put((_SHUTDOWN, next(self._sequence), None, None, None))
+        if self.cache:
+            self.cache.close()
+    
+    def _speak_directly(self, speech, index):
+        """Speak one sentence with the engine, on the synthesis thread"""
+        try:
+            self._started(speech, index)
+            self.speaking.set()
+            self.speaking_directly = True
+            self.engine.say(speech.sentences[index])
+            self.engine.runAndWait()
+        except Exception as e:
+            print(f"TTS Error: {e}")
+        finally:
+            self.speaking_directly = False
+            self.speaking.clear()
+            if index == len(speech.sentences) - 1 or self._cancelled(speech):
+                speech.done.set()
+    
+    def _apply_property(self, name, value):
+        if self.engine is not None:
+            try:
+                self.engine.setProperty(name, value)
+                self.voice_settings[name] = value
+            except Exception as e:
+                print(f"TTS Error: {e}")
+    
+    def _prerender(self, speech, index):
+        """Render a sentence into the cache only; nothing to gain without both"""
+        try:
+            sentence = speech.sentences[index]
+            if self.engine is not None and self.player and self.cache and \
+                    not self.cache.contains(sentence, self.voice_settings):
+                self._render(sentence, lookup=False, persist=True)
+        except Exception as e:
+            print(f"TTS Error: {e}")
+        finally:
+            if index == len(speech.sentences) - 1:
+                speech.done.set()
+    
+    def _render(self, sentence, lookup=True, persist=False):
+        """PCM for one sentence, from the cache or synthesized with the engine; persist stores it on disk"""
+        if self.cache and lookup:
+            rendered = self.cache.get(sentence, self.voice_settings)
+            if rendered is not None:
+                return rendered
+        started = time.perf_counter()
+        handle, path = tempfile.mkstemp(suffix='.wav', prefix='jarvis-tts-')
+        os.close(handle)
+        try:
+            self.engine.save_to_file(sentence, path)
+            self.engine.runAndWait()
+            rendered = RenderedAudio.from_wav(path)
+        finally:
+            os.remove(path)
+        synthesis_time = time.perf_counter() - started
+        metrics.observe('tts.synthesis_time', synthesis_time)
+        if self.cache:
+            self.cache.put(sentence, self.voice_settings, rendered, synthesis_time, persist=persist)
+        return rendered
+    
+    def _playback_loop(self):
+        while True:
+            _, _, speech, index, rendered = self.rendered.get()
+            if speech is None:
+                self.rendered.task_done()
+                break
+            if not self._cancelled(speech):
+                self._started(speech, index)
+                self.speaking.set()
+                try:
+                    self.player.play(rendered, lambda: self._cancelled(speech))
+                except Exception as e:
+                    print(f"TTS playback error: {e}")
+            if self._cancelled(speech) or (self.pending.empty() and self.rendered.empty()):
+                self.speaking.clear()
+            if index == len(speech.sentences) - 1 or self._cancelled(speech):
+                speech.done.set()
+            self.rendered.task_done()
+        self.speaking.clear()
+        self.player.close()
+    
+    def _started(self, speech, index):
+        """First audio of a Speech: report latency and call its on_start"""
+        if index != 0:
+            return
+        metrics.observe('tts.time_to_first_audio', time.perf_counter() - speech.submitted_at)
+        if speech.on_start:
+            try:
+                speech.on_start()
+            except Exception as e:
+                print(f"Speech callback error: {e}")
@@ -25,35 +25,21 @@ def format_date():
     now = datetime.datetime.now()
     return now.strftime("%B %d, %Y")
 
+OPEN_APP_PATTERN = re.compile(r'(?:open|launch|start|run)\s+(.+)')
+CLOSE_APP_PATTERN = re.compile(r'(?:close|quit|exit|stop)\s+(.+)')
+
 def extract_app_name(text):
     """Extract application name from command"""
-    # Patterns for opening apps
-    patterns = [
-        r'open\s+(.+)',
-        r'launch\s+(.+)',
-        r'start\s+(.+)',
-        r'run\s+(.+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text.lower())
-        if match:
-            return match.group(1).strip()
+    match = OPEN_APP_PATTERN.search(text.lower())
+    if match:
+        return match.group(1).strip()
     return None
 
 def extract_close_app_name(text):
     """Extract application name for closing"""
-    patterns = [
-        r'close\s+(.+)',
-        r'quit\s+(.+)',
-        r'exit\s+(.+)',
-        r'stop\s+(.+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text.lower())
-        if match:
-            return match.group(1).strip()
+    match = CLOSE_APP_PATTERN.search(text.lower())
+    if match:
+        return match.group(1).strip()
     return None
 
 def clean_text(text):
@@ -62,6 +48,36 @@ def clean_text(text):
     text = re.sub(r'\s+', ' ', text)
     return text
 
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)"""
+    return (len(text) + 3) // 4
+
+SENTENCE_BREAK_PATTERN = re.compile(r'(?<=[.!?])\s+|\n+')
+
+class SentenceBuffer:
+    """Accumulate streamed text and release complete sentences"""
+    
+    def __init__(self):
+        self.pending = ''
+    
+    def feed(self, text):
+        """Add a chunk and return the sentences it completed"""
+        self.pending += text
+        parts = SENTENCE_BREAK_PATTERN.split(self.pending)
+        self.pending = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+    
+    def flush(self):
+        """Return whatever text is left as a final sentence"""
+        rest = self.pending.strip()
+        self.pending = ''
+        return [rest] if rest else []
+
+def split_sentences(text):
+    """Split text into sentences"""
+    buffer = SentenceBuffer()
+    return buffer.feed(text) + buffer.flush()
+
 def is_question(text):
     """Check if text is a question"""
     question_words = ['what', 'when', 'where', 'who', 'why', 'how', 'is', 'are', 'can', 'could', 'would', 'should']
@@ -1,70 +1,251 @@
 """
 Voice Handler - Speech recognition and text-to-speech
 """
-import speech_recognition as sr
-import pyttsx3
+from startup import profiler
+from metrics import metrics
+from concurrent.futures import ThreadPoolExecutor
 import threading
-import queue
+import time
+
+# How long listening waits for a device still initializing
+DEVICE_READY_TIMEOUT = 15
+
+# Longest speak() waits: time for the speech worker to start plus far more
+# than the text takes to say
+SPEAK_TIMEOUT = DEVICE_READY_TIMEOUT + 10
+SPEAK_SECONDS_PER_CHAR = 0.2
+
+# Dictation: longest capture, pause that ends it, and parallel recognitions
+DICTATION_MAX_SECONDS = 120
+DICTATION_PAUSE_SECONDS = 3
+DICTATION_WORKERS = 4
 
 class VoiceHandler:
     """Handles voice input and output"""
     
     def __init__(self, config):
         self.config = config
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
         
-        # Initialize text-to-speech engine
-        self.tts_engine = pyttsx3.init()
-        self.tts_engine.setProperty('rate', config.voice_rate)
-        self.tts_engine.setProperty('volume', config.voice_volume)
+        # Devices are set up by init_recognition and init_tts, which
+        # startup runs in the background
+        self.recognizer = None
+        self.speech_recognizer = None
+        self.partial_recognizer = None
+        self.intent_router = None
+        self.microphone = None
+        self.noise_floor = None
+        self.tts_worker = None
+        self.prerender_phrases = []
+        self.queued_speech = []
+        self.recognition_ready = threading.Event()
+        self.tts_ready = threading.Event()
+        self._speech_lock = threading.Lock()
+    
+    def init_recognition(self):
+        """Open the microphone, starting from the last saved noise estimate instead of calibrating"""
+        sr = profiler.import_module('speech_recognition')
+        try:
+            self.recognizer = sr.Recognizer()
+            self.speech_recognizer = self._build_speech_recognizer()
+            self.microphone = sr.Microphone()
+            # speech_recognition's own adjustment also follows speech and drifts
+            # upward while someone talks; the noise estimate replaces it
+            self.recognizer.dynamic_energy_threshold = False
+            self.recognizer.energy_threshold = self._noise_floor_tracker().energy_threshold()
+        finally:
+            self.recognition_ready.set()
+    
+    def _noise_floor_tracker(self):
+        """The background noise estimate, loaded on first use"""
+        if self.noise_floor is None:
+            self.noise_floor = profiler.import_module('noise_floor').NoiseFloorTracker.load()
+        return self.noise_floor
+    
+    def _listen_for_phrase(self, source, timeout, phrase_time_limit, on_audio=None):
+        """recognizer.listen with its threshold following the noise estimate as audio is read
+        
+        With on_audio, the phrase is also handed over piece by piece as it is captured.
+        """
+        sr = profiler.import_module('speech_recognition')
+        noise_floor = profiler.import_module('noise_floor')
+        tracker = self._noise_floor_tracker()
+        self.recognizer.energy_threshold = tracker.energy_threshold(source.SAMPLE_WIDTH)
+        stream = source.stream
+        source.stream = noise_floor.ListeningTap(stream, tracker, self.recognizer, source.SAMPLE_WIDTH, source.SAMPLE_RATE)
+        try:
+            if on_audio is None:
+                return self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+            
+            frames = []
+            for chunk in self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit, stream=True):
+                frames.append(chunk.frame_data)
+                on_audio(chunk.frame_data)
+            return sr.AudioData(b''.join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        finally:
+            source.stream = stream
+    
+    def init_tts(self):
+        """Start the speech worker, which owns the text-to-speech engine"""
+        tts_worker = profiler.import_module('tts_worker')
+        ready_worker = None
+        try:
+            worker = tts_worker.TTSWorker(self._create_tts_engine, cache=self._create_tts_cache())
+            worker.start()
+            worker.ready.wait()
+            if worker.engine is not None:
+                ready_worker = worker
+        finally:
+            self._start_queued_speech(ready_worker)
+    
+    def _start_queued_speech(self, worker):
+        """Hand speech queued during startup to the worker, or drop it if there is none"""
+        with self._speech_lock:
+            queued, self.queued_speech = self.queued_speech, []
+            self.tts_worker = worker
+            for speech in queued:
+                if worker:
+                    worker.submit(speech)
+                else:
+                    speech.done.set()
+            if worker:
+                worker.prerender(self.prerender_phrases)
+            self.tts_ready.set()
+        if queued and worker is None:
+            print("TTS Error: speech engine is not available")
+    
+    def _create_tts_cache(self):
+        """Cache of rendered audio for recurring phrases, if enabled"""
+        if not self.config.tts_cache_enabled:
+            return None
+        tts_cache = profiler.import_module('tts_cache')
+        try:
+            return tts_cache.TTSCache(max_bytes=self.config.tts_cache_size_mb * 1024 * 1024)
+        except Exception as e:
+            print(f"TTS cache unavailable: {e}")
+            return None
+    
+    def _create_tts_engine(self):
+        """Create the pyttsx3 engine (runs on the speech worker's thread)"""
+        pyttsx3 = profiler.import_module('pyttsx3')
+        tts_engine = pyttsx3.init()
+        tts_engine.setProperty('rate', self.config.voice_rate)
+        tts_engine.setProperty('volume', self.config.voice_volume)
         
         # Try to set a better voice
-        voices = self.tts_engine.getProperty('voices')
+        voices = tts_engine.getProperty('voices')
         if len(voices) > 1:
-            self.tts_engine.setProperty('voice', voices[1].id)  # Usually female voice
-        
-        # Queue for thread-safe speech
-        self.speech_queue = queue.Queue()
-        self.speech_thread = None
-        self.is_speaking = False
-        
-        # Adjust for ambient noise
-        with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
+            tts_engine.setProperty('voice', voices[1].id)  # Usually female voice
+        return tts_engine
+    
+    @property
+    def is_speaking(self):
+        return bool(self.tts_worker and self.tts_worker.is_speaking)
+    
+    def prerender(self, phrases):
+        """Render phrases Jarvis says often into the audio cache in the background"""
+        with self._speech_lock:
+            if not self.tts_ready.is_set():
+                # Rendered once the speech worker is up
+                self.prerender_phrases.extend(phrases)
+                return
+        if self.tts_worker:
+            self.tts_worker.prerender(phrases)
     
     def speak(self, text):
-        """Convert text to speech"""
-        if not self.config.voice_enabled:
-            return
-        
-        try:
-            self.is_speaking = True
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
-            self.is_speaking = False
-        except Exception as e:
-            print(f"TTS Error: {e}")
-            self.is_speaking = False
+        """Speak text and wait until it has been said; returns whether it finished in time"""
+        speech = self.speak_async(text)
+        if not speech:
+            return False
+        return speech.done.wait(SPEAK_TIMEOUT + SPEAK_SECONDS_PER_CHAR * len(text))
     
-    def speak_async(self, text):
-        """Speak text asynchronously"""
+    def speak_async(self, text, on_start=None, priority=None):
+        """Queue text on the speech worker without waiting; on_start runs when its audio begins
+        
+        Speech asked for while the worker is still starting is queued and
+        spoken once it is ready.
+        """
         if not self.config.voice_enabled:
-            return
+            return None
         
-        thread = threading.Thread(target=self.speak, args=(text,))
-        thread.daemon = True
-        thread.start()
+        tts_worker = profiler.import_module('tts_worker')
+        priority = tts_worker.NORMAL if priority is None else priority
+        with self._speech_lock:
+            if not self.tts_ready.is_set():
+                speech = tts_worker.Speech.for_text(text, priority, on_start)
+                self.queued_speech.append(speech)
+                return speech
+        
+        if self.tts_worker is None:
+            print("TTS Error: speech engine is not available")
+            return None
+        return self.tts_worker.say(text, priority, on_start)
+    
+    def _build_speech_recognizer(self):
+        """The configured recognizer backend, or a race between several"""
+        recognizer_backends = profiler.import_module('recognizer_backends')
+        backends = recognizer_backends.available_backends(
+            self.recognizer, self.config.recognizer_backends, self.config.vosk_model_path,
+            self.config.upload_preprocessing_enabled
+        )
+        if not backends:
+            backends = [recognizer_backends.GoogleBackend(self.recognizer, self.config.upload_preprocessing_enabled)]
+        # Partial transcripts stay on the device when an offline backend is configured
+        self.partial_recognizer = next((backend for backend in backends if backend.offline), None)
+        if self.config.recognizer_mode == 'race' and len(backends) > 1:
+            return recognizer_backends.RacingRecognizer(backends, is_command=self._is_command)
+        return backends[0]
+    
+    def _is_command(self, text):
+        """Whether text is a system command, so an offline transcript can be trusted"""
+        if self.intent_router is None:
+            self.intent_router = profiler.import_module('intent_router').IntentRouter()
+        return self.intent_router.match(text) is not None
+    
+    def speech_to_text(self, audio):
+        """Transcribe audio with the configured backends"""
+        sr = profiler.import_module('speech_recognition')
+        result = self.speech_recognizer.recognize(audio)
+        if result is None:
+            raise sr.UnknownValueError()
+        return result.text
     
-    def listen(self, timeout=5, phrase_time_limit=10):
-        """Listen for voice input"""
+    def _recognize_partial(self, frame_data, sample_rate, sample_width):
+        """Transcribe the start of a phrase still being spoken, offline if possible, or None"""
+        sr = profiler.import_module('speech_recognition')
+        recognizer = self.partial_recognizer or self.speech_recognizer
+        result = recognizer.recognize(sr.AudioData(frame_data, sample_rate, sample_width))
+        return result.text if result else None
+    
+    def listen(self, timeout=5, phrase_time_limit=10, on_partial=None):
+        """Listen for voice input
+        
+        With on_partial, partial transcripts of the phrase are reported while it is still being spoken.
+        """
+        if not self.recognition_ready.wait(DEVICE_READY_TIMEOUT) or self.microphone is None:
+            return False, "Voice input is not available"
+        
+        sr = profiler.import_module('speech_recognition')
+        partials = None
         try:
             with self.microphone as source:
                 print("Listening...")
-                audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+                on_audio = None
+                if on_partial:
+                    speculative = profiler.import_module('speculative')
+                    pacing = {}
+                    if self.partial_recognizer is None:
+                        pacing = {'interval': speculative.CLOUD_PARTIAL_INTERVAL, 'window': speculative.CLOUD_PARTIAL_WINDOW}
+                    partials = speculative.PartialTranscriber(
+                        self._recognize_partial, on_partial, source.SAMPLE_RATE, source.SAMPLE_WIDTH, **pacing
+                    )
+                    on_audio = partials.feed
+                audio = self._listen_for_phrase(source, timeout, phrase_time_limit, on_audio)
+            if partials:
+                # The phrase is over; only the final transcript counts now
+                partials.stop()
             
             print("Recognizing...")
-            text = self.recognizer.recognize_google(audio)
+            text = self.speech_to_text(audio)
             return True, text
             
         except sr.WaitTimeoutError:
@@ -75,44 +256,166 @@ class VoiceHandler:
             return False, f"Could not request results; {e}"
         except Exception as e:
             return False, f"Error: {str(e)}"
+        finally:
+            if partials:
+                partials.stop()
     
-    def listen_in_background(self, callback):
-        """Listen for voice input in background"""
-        def background_listener():
-            while True:
+    def listen_dictation(self, timeout=5, max_duration=DICTATION_MAX_SECONDS):
+        """Capture long dictation and transcribe it in parallel chunks"""
+        if not self.recognition_ready.wait(DEVICE_READY_TIMEOUT) or self.microphone is None:
+            return False, "Voice input is not available"
+        
+        sr = profiler.import_module('speech_recognition')
+        try:
+            with self.microphone as source:
+                print("Listening for dictation...")
+                # Only a long pause ends dictation
+                pause_threshold = self.recognizer.pause_threshold
+                self.recognizer.pause_threshold = DICTATION_PAUSE_SECONDS
                 try:
-                    with self.microphone as source:
-                        audio = self.recognizer.listen(source, timeout=None, phrase_time_limit=10)
-                    
-                    try:
-                        text = self.recognizer.recognize_google(audio)
-                        if callback:
-                            callback(text)
-                    except sr.UnknownValueError:
-                        pass
-                    except sr.RequestError:
-                        pass
-                except Exception as e:
-                    print(f"Background listening error: {e}")
-        
-        thread = threading.Thread(target=background_listener)
-        thread.daemon = True
-        thread.start()
+                    audio = self._listen_for_phrase(source, timeout, max_duration)
+                finally:
+                    self.recognizer.pause_threshold = pause_threshold
+            
+            print("Recognizing...")
+            return self.transcribe_dictation(audio)
+            
+        except sr.WaitTimeoutError:
+            return False, "Listening timeout"
+        except sr.RequestError as e:
+            return False, f"Could not request results; {e}"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+    
+    def transcribe_dictation(self, audio, recognize=None, workers=DICTATION_WORKERS):
+        """Split audio at pauses, recognize the chunks concurrently and join them in order"""
+        sr = profiler.import_module('speech_recognition')
+        audio_processing = profiler.import_module('audio_processing')
+        recognize = recognize or self.speech_to_text
+        
+        width = audio.sample_width
+        samples = audio_processing.pcm_to_samples(audio.frame_data, width)
+        points = audio_processing.split_points(samples, audio.sample_rate)
+        chunks = [
+            sr.AudioData(audio.frame_data[start * width:end * width], audio.sample_rate, width)
+            for start, end in zip(points, points[1:])
+        ]
+        metrics.observe('dictation.chunks', len(chunks))
+        
+        def recognize_chunk(chunk):
+            try:
+                return recognize(chunk)
+            except sr.UnknownValueError:
+                # A chunk of noise or breathing
+                return ''
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as pool:
+            texts = list(pool.map(recognize_chunk, chunks))
+        metrics.observe('dictation.recognition_time', time.perf_counter() - started)
+        
+        text = ' '.join(part.strip() for part in texts if part and part.strip())
+        if not text:
+            return False, "Could not understand audio"
+        return True, text
+    
+    def listen_in_background(self, callback, source=None, on_wake=None):
+        """Listen continuously on one open audio stream; returns the listener to pause or stop it
+        
+        With the wake word enabled and enrolled, only speech that starts with
+        it, or follows it within the command window, reaches recognition.
+        """
+        continuous_listener = profiler.import_module('continuous_listener')
+        
+        def wake():
+            # Barge-in: the wake word interrupts whatever is being said
+            self.clear_speech()
+            if on_wake:
+                on_wake()
+        
+        listener = continuous_listener.ContinuousListener(
+            source or continuous_listener.MicrophoneSource(),
+            recognize=self.recognize_utterance,
+            on_text=callback,
+            gate=self.wake_word_gate(wake),
+            noise_floor=self._noise_floor_tracker()
+        )
+        listener.start()
+        return listener
+    
+    def wake_word_gate(self, on_wake=None):
+        """Gate for the configured wake word, or None to recognize everything"""
+        if not self.config.wake_word_enabled:
+            return None
+        wake_word = profiler.import_module('wake_word')
+        spotter = wake_word.WakeWordSpotter.load(wake_word.template_file(self.config.wake_word))
+        if spotter is None:
+            print(f"Wake word '{self.config.wake_word}' is not enrolled; listening to everything")
+            return None
+        return wake_word.WakeWordGate(spotter, self.config.command_window_seconds, on_wake)
+    
+    def enroll_wake_word(self, recordings=3):
+        """Record the wake word a few times and save it as templates"""
+        if not self.recognition_ready.wait(DEVICE_READY_TIMEOUT) or self.microphone is None:
+            return False, "Voice input is not available"
+        
+        wake_word = profiler.import_module('wake_word')
+        audio_processing = profiler.import_module('audio_processing')
+        spotter = wake_word.WakeWordSpotter()
+        try:
+            for index in range(recordings):
+                print(f"Say '{self.config.wake_word}' ({index + 1}/{recordings})...")
+                with self.microphone as source:
+                    audio = self._listen_for_phrase(source, 5, 2)
+                samples = audio_processing.pcm_to_samples(audio.frame_data, audio.sample_width)
+                spotter.enroll(samples, audio.sample_rate)
+            spotter.save(wake_word.template_file(self.config.wake_word))
+            return True, f"Wake word '{self.config.wake_word}' enrolled"
+        except Exception as e:
+            return False, f"Error: {str(e)}"
+    
+    def recognize_utterance(self, utterance):
+        """Transcribe an utterance cut by the continuous listener, or None"""
+        sr = profiler.import_module('speech_recognition')
+        if not self.recognition_ready.wait(DEVICE_READY_TIMEOUT) or self.recognizer is None:
+            return None
+        audio = sr.AudioData(utterance.pcm, utterance.sample_rate, utterance.sample_width)
+        try:
+            return self.speech_to_text(audio)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            print(f"Could not request results; {e}")
+            return None
+    
+    def clear_speech(self):
+        """Barge-in: drop queued speech and stop what is being said"""
+        with self._speech_lock:
+            queued, self.queued_speech = self.queued_speech, []
+        for speech in queued:
+            speech.done.set()
+        if self.tts_worker:
+            self.tts_worker.cancel()
     
     def stop_speaking(self):
         """Stop current speech"""
-        try:
-            self.tts_engine.stop()
-            self.is_speaking = False
-        except:
-            pass
+        self.clear_speech()
+    
+    def close(self):
+        """Stop the speech worker and keep the noise estimate for next time"""
+        if self.tts_worker:
+            self.tts_worker.stop()
+        if self.noise_floor:
+            self.noise_floor.save()
     
     def set_voice_rate(self, rate):
         """Set speech rate"""
-        self.tts_engine.setProperty('rate', rate)
+        if self.tts_worker:
+            self.tts_worker.set_property('rate', rate)
         self.config.voice_rate = rate
     
     def set_voice_volume(self, volume):
         """Set speech volume"""
-        self.tts_engine.setProperty('volume', volume)
+        if self.tts_worker:
+            self.tts_worker.set_property('volume', volume)
         self.config.voice_volume = volume
@@ -0,0 +1,247 @@
+"""
+Wake Word - On-device wake-word spotting with NumPy MFCCs and DTW template matching
+"""
+import glob
+import os
+import time
+import wave
+
+import numpy as np
+
+from metrics import metrics
+
+# MFCC analysis
+FRAME_MS = 25
+HOP_MS = 10
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+PRE_EMPHASIS = 0.97
+
+# Follow-up commands are recognized for this long after the wake word
+COMMAND_WINDOW_SECONDS = 5.0
+
+# Accept distance relative to the spread between enrolled templates
+THRESHOLD_MARGIN = 1.6
+
+# Threshold used with a single template, in normalized DTW distance
+DEFAULT_THRESHOLD = 2.0
+
+_filterbanks = {}
+
+
+def template_file(wake_word):
+    """Where enrolled templates for a wake word are kept"""
+    name = ''.join(c if c.isalnum() else '_' for c in wake_word.lower())
+    return f"wake_word_{name}.npz"
+
+
+def mel_filterbank(sample_rate, n_fft=N_FFT, n_mels=N_MELS):
+    """Triangular mel filters over the rfft bins, cached per sample rate"""
+    key = (sample_rate, n_fft, n_mels)
+    if key not in _filterbanks:
+        high = 2595 * np.log10(1 + (sample_rate / 2) / 700.0)
+        hz = 700 * (10 ** (np.linspace(0, high, n_mels + 2) / 2595) - 1)
+        bins = np.floor((n_fft + 1) * hz / sample_rate).astype(int)
+        bank = np.zeros((n_mels, n_fft // 2 + 1))
+        for m in range(1, n_mels + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            if center > left:
+                bank[m - 1, left:center] = (np.arange(left, center) - left) / float(center - left)
+            if right > center:
+                bank[m - 1, center:right] = (right - np.arange(center, right)) / float(right - center)
+        n = np.arange(n_mels)
+        dct = np.cos(np.pi / n_mels * (n + 0.5)[None, :] * np.arange(N_MFCC)[:, None]) * np.sqrt(2.0 / n_mels)
+        dct[0] /= np.sqrt(2.0)
+        _filterbanks[key] = (bank, dct, np.hamming(int(sample_rate * FRAME_MS / 1000)))
+    return _filterbanks[key]
+
+
+def mfcc(samples, sample_rate):
+    """MFCCs (frames x coefficients 1..12) of float samples"""
+    bank, dct, window = mel_filterbank(sample_rate)
+    frame_length = len(window)
+    hop = int(sample_rate * HOP_MS / 1000)
+    samples = np.asarray(samples, dtype=np.float64)
+    if len(samples) < frame_length:
+        return np.zeros((0, N_MFCC - 1))
+    emphasized = np.append(samples[0], samples[1:] - PRE_EMPHASIS * samples[:-1])
+    frames = np.lib.stride_tricks.sliding_window_view(emphasized, frame_length)[::hop] * window
+    power = np.abs(np.fft.rfft(frames, N_FFT)) ** 2 / N_FFT
+    features = np.log(power @ bank.T + 1e-10) @ dct.T
+    # Drop c0 so loudness does not matter. No mean normalization: the
+    # utterance head scored against a template also holds the command
+    return features[:, 1:]
+
+
+def dtw_distance(template, features, open_end=False):
+    """Length-normalized DTW distance between two MFCC sequences
+
+    With open_end=True the template may match any prefix of features, so a
+    wake word followed by a command still matches.
+    """
+    n, m = len(template), len(features)
+    if n == 0 or m == 0:
+        return np.inf
+    cost = np.sqrt(((template[:, None, :] - features[None, :, :]) ** 2).sum(axis=2))
+    total = np.full((n + 1, m + 1), np.inf)
+    total[0, 0] = 0.0
+    # Cells on one anti-diagonal only depend on the two before it
+    for k in range(2, n + m + 1):
+        i = np.arange(max(1, k - m), min(n, k - 1) + 1)
+        j = k - i
+        total[i, j] = cost[i - 1, j - 1] + np.minimum(np.minimum(total[i - 1, j], total[i, j - 1]), total[i - 1, j - 1])
+    if not open_end:
+        return total[n, m] / (n + m)
+    ends = np.arange(max(1, n // 2), m + 1)
+    if len(ends) == 0:
+        # Far too short to hold the template
+        return np.inf
+    return float(np.min(total[n, ends] / (n + ends)))
+
+
+def read_wav(path):
+    """Float samples and sample rate of a 16-bit WAV file"""
+    with wave.open(path, 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+        if wav.getnchannels() > 1:
+            samples = samples.reshape(-1, wav.getnchannels()).mean(axis=1)
+        return samples, wav.getframerate()
+
+
+class WakeWordSpotter:
+    """Detects an enrolled wake word by DTW distance to recorded templates"""
+    
+    def __init__(self, templates=None, threshold=None):
+        self.templates = list(templates or [])
+        self.fixed_threshold = threshold
+        self.threshold = threshold or DEFAULT_THRESHOLD
+        self._calibrate()
+    
+    def enroll(self, samples, sample_rate):
+        """Add a recording of the wake word as a template"""
+        features = mfcc(samples, sample_rate)
+        if len(features) == 0:
+            raise ValueError("Recording is too short")
+        self.templates.append(features)
+        self._calibrate()
+    
+    def _calibrate(self):
+        """Derive the threshold from how far apart the templates are"""
+        if self.fixed_threshold or len(self.templates) < 2:
+            return
+        distances = [
+            dtw_distance(a, b)
+            for index, a in enumerate(self.templates)
+            for b in self.templates[index + 1:]
+        ]
+        self.threshold = max(distances) * THRESHOLD_MARGIN
+    
+    def score(self, samples, sample_rate):
+        """Distance from the start of samples to the closest template"""
+        if not self.templates:
+            return np.inf
+        longest = max(len(template) for template in self.templates)
+        # Only the start of an utterance can hold the wake word
+        hop = int(sample_rate * HOP_MS / 1000)
+        head = samples[:int((longest * 1.5 + 3) * hop)]
+        features = mfcc(head, sample_rate)
+        return min(dtw_distance(template, features, open_end=True) for template in self.templates)
+    
+    def detect(self, samples, sample_rate):
+        """True if samples start with the wake word"""
+        started = time.perf_counter()
+        detected = self.score(samples, sample_rate) <= self.threshold
+        metrics.observe('wake_word.spot_time', time.perf_counter() - started)
+        return detected
+    
+    def wake_word_samples(self, sample_rate):
+        """Typical length of the wake word in samples"""
+        hop = int(sample_rate * HOP_MS / 1000)
+        return int(np.mean([len(template) for template in self.templates]) * hop)
+    
+    def save(self, path):
+        np.savez(path, *self.templates, threshold=self.threshold)
+    
+    @classmethod
+    def load(cls, path):
+        """Spotter with templates saved by save(), or None if there are none"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            templates = [data[key] for key in sorted(data.files, key=lambda k: (len(k), k)) if key.startswith('arr_')]
+            return cls(templates, threshold=float(data['threshold']))
+
+
+class WakeWordGate:
+    """Lets utterances through to recognition only after the wake word
+
+    An utterance that starts with the wake word is recognized (the command
+    may follow it without a pause) and opens a command window; utterances
+    inside the window are recognized without repeating the wake word.
+    """
+    
+    def __init__(self, spotter, command_window=COMMAND_WINDOW_SECONDS, on_wake=None):
+        self.spotter = spotter
+        self.command_window = command_window
+        self.on_wake = on_wake
+        self.window_until = 0.0
+    
+    def __call__(self, utterance):
+        now = time.perf_counter()
+        if now < self.window_until:
+            self.window_until = now + self.command_window
+            metrics.increment('wake_word.in_window')
+            return True
+        
+        samples = utterance.samples.astype(np.float32) / 32768.0
+        if not self.spotter.detect(samples, utterance.sample_rate):
+            metrics.increment('wake_word.rejected')
+            return False
+        
+        metrics.increment('wake_word.detected')
+        self.window_until = now + self.command_window
+        if self.on_wake:
+            self.on_wake()
+        # Just the wake word: wait for the command in the window
+        return len(samples) > self.spotter.wake_word_samples(utterance.sample_rate) * 1.5
+
+
+def evaluate(spotter, positives, negatives):
+    """False-accept and false-reject rates and CPU cost on recorded WAV fixtures
+
+    positives and negatives are lists of WAV paths; positives start with the
+    wake word, negatives do not contain it.
+    """
+    audio_seconds = 0.0
+    cpu = 0.0
+    results = {}
+    for label, paths in [('positive', positives), ('negative', negatives)]:
+        accepted = 0
+        for path in paths:
+            samples, sample_rate = read_wav(path)
+            audio_seconds += len(samples) / float(sample_rate)
+            started = time.process_time()
+            accepted += spotter.detect(samples, sample_rate)
+            cpu += time.process_time() - started
+        results[label] = (accepted, len(paths))
+    
+    accepted, positive_count = results['positive']
+    false_accepts, negative_count = results['negative']
+    return {
+        'false_reject_rate': 1.0 - accepted / float(positive_count) if positive_count else 0.0,
+        'false_accept_rate': false_accepts / float(negative_count) if negative_count else 0.0,
+        'cpu_ms_per_audio_second': cpu * 1000 / audio_seconds if audio_seconds else 0.0,
+        'positives': positive_count,
+        'negatives': negative_count,
+    }
+
+
+def fixture_paths(directory):
+    """(enrollment, positive, negative) WAV paths from a fixture directory
+
+    Expected layout: enroll/*.wav, positive/*.wav and negative/*.wav.
+    """
+    return [sorted(glob.glob(os.path.join(directory, name, '*.wav'))) for name in ('enroll', 'positive', 'negative')]